@@ -1,14 +1,41 @@
 from flask import Flask
+from flask.json.provider import DefaultJSONProvider
 from config import FLASK_SECRET_KEY
 
 from app.storage import ensure_dirs_and_files
+from app.statedb import init_state_db
+from app.seats import init_seats
+from app.snapshots import start_snapshot_scheduler
+from app.assets import build_assets, asset_url
+from app.compression import init_compression
+from app.records import Record
+
+
+class RecordJSONProvider(DefaultJSONProvider):
+    """jsonify() renders storage records exactly like the dicts they replaced."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Record):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
 
 
 def create_app():
     app = Flask(__name__, template_folder="../templates", static_folder="../static")
     app.secret_key = FLASK_SECRET_KEY
+    app.json = RecordJSONProvider(app)
 
+    init_state_db()
     ensure_dirs_and_files()
+    init_seats()
+    start_snapshot_scheduler()
+    try:
+        build_assets()
+    except OSError:
+        pass  # read-only checkout: asset_url() falls back to the plain /static files
+    app.jinja_env.globals["asset_url"] = asset_url
+    init_compression(app)
 
     from app.routes.pages import bp_pages
     from app.routes.student import bp_student
@@ -17,6 +44,8 @@ def create_app():
     from app.routes.exports import bp_exports
     from app.routes.printables import bp_printables
     from app.routes.templates_download import bp_templates
+    from app.routes.events import bp_events
+    from app.routes.assets import bp_assets
 
     app.register_blueprint(bp_pages)
     app.register_blueprint(bp_student)
@@ -25,5 +54,7 @@ def create_app():
     app.register_blueprint(bp_exports)
     app.register_blueprint(bp_printables)
     app.register_blueprint(bp_templates)
+    app.register_blueprint(bp_events)
+    app.register_blueprint(bp_assets)
 
     return app
@@ -0,0 +1,116 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+
+from config import STATIC_DIR, ASSETS_DIST_DIR, ASSET_FILES
+
+# Optional minifiers and brotli: used when installed, otherwise CSS and JS get a
+# conservative comment/whitespace pass and only the gzip variant is produced.
+try:
+    import rjsmin  # type: ignore
+except Exception:
+    rjsmin = None
+try:
+    import rcssmin  # type: ignore
+except Exception:
+    rcssmin = None
+try:
+    import brotli  # type: ignore
+except Exception:
+    brotli = None
+
+MANIFEST_NAME = "manifest.json"
+CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+TEMPLATE_TICK_RE = re.compile(r"(?<!\\)`")
+
+_manifest = {}  # source name -> hashed file name inside ASSETS_DIST_DIR
+
+
+def _strip_js(text: str) -> str:
+    # Line by line: indentation, blank lines and whole-line // comments go; line breaks
+    # stay (automatic semicolon insertion) and lines inside multi-line template
+    # literals are kept as written.
+    out, in_template = [], False
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if in_template:
+            out.append(line)
+        elif stripped and not stripped.startswith("//"):
+            out.append(stripped)
+        if len(TEMPLATE_TICK_RE.findall(line)) % 2:
+            in_template = not in_template
+    return "\n".join(out) + "\n"
+
+
+def minify(name: str, text: str) -> str:
+    text = text.replace("\r\n", "\n")
+    if name.endswith(".js"):
+        return rjsmin.jsmin(text) if rjsmin else _strip_js(text)
+    if name.endswith(".css"):
+        if rcssmin:
+            return rcssmin.cssmin(text)
+        text = CSS_COMMENT_RE.sub("", text)
+        return "\n".join(line.strip() for line in text.split("\n") if line.strip()) + "\n"
+    return text
+
+
+def _write_atomic(path, data: bytes):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def build_assets():
+    """
+    Minify, fingerprint and precompress ASSET_FILES into ASSETS_DIST_DIR and write the manifest.
+    Files whose content is unchanged are left alone, so every worker can run this at startup.
+    Returns the manifest.
+    """
+    os.makedirs(ASSETS_DIST_DIR, exist_ok=True)
+    manifest = {}
+    for name in ASSET_FILES:
+        src = os.path.join(STATIC_DIR, name)
+        if not os.path.exists(src):
+            continue
+        with open(src, "r", encoding="utf-8", newline="") as f:
+            body = minify(name, f.read()).encode("utf-8")
+        stem, ext = os.path.splitext(name)
+        hashed = f"{stem}.{hashlib.sha256(body).hexdigest()[:12]}{ext}"
+        path = os.path.join(ASSETS_DIST_DIR, hashed)
+        if not os.path.exists(path):
+            _write_atomic(path, body)
+        if not os.path.exists(path + ".gz"):
+            # mtime=0 keeps the .gz byte-identical across builds
+            _write_atomic(path + ".gz", gzip.compress(body, compresslevel=9, mtime=0))
+        if brotli and not os.path.exists(path + ".br"):
+            _write_atomic(path + ".br", brotli.compress(body, quality=11))
+        manifest[name] = hashed
+    _write_atomic(os.path.join(ASSETS_DIST_DIR, MANIFEST_NAME), json.dumps(manifest, indent=2).encode("utf-8"))
+    _prune(manifest)
+    _manifest.clear()
+    _manifest.update(manifest)
+    return manifest
+
+
+def _prune(manifest):
+    # earlier builds of the same assets; pages rendered from the new manifest no longer link them
+    keep = set(manifest.values())
+    stems = tuple(f"{os.path.splitext(n)[0]}." for n in manifest)
+    for fname in os.listdir(ASSETS_DIST_DIR):
+        base = re.sub(r"\.(gz|br)$", "", fname)
+        if base in keep or fname == MANIFEST_NAME or not fname.startswith(stems):
+            continue
+        try:
+            os.remove(os.path.join(ASSETS_DIST_DIR, fname))
+        except FileNotFoundError:
+            continue
+
+
+def asset_url(name: str) -> str:
+    """URL for a static asset: the fingerprinted build when there is one, else the plain file."""
+    hashed = _manifest.get(name)
+    return f"/static/dist/{hashed}" if hashed else f"/static/{name}"
+
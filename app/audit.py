@@ -0,0 +1,111 @@
+from datetime import datetime
+
+from app.storage import read_students, read_courses, read_schedules, read_approvals
+
+ISSUE_TYPES = (
+    "grade_out_of_range",
+    "unknown_course",
+    "duplicate_pick",
+    "unreviewed",
+    "approval_pending",
+    "approval_rejected",
+)
+
+
+def _grade_int(v):
+    try:
+        return int(str(v).strip())
+    except Exception:
+        return None
+
+
+def audit_all_schedules():
+    """
+    Audit every saved schedule in a single pass.
+
+    Each table is read once and turned into lookup maps up front, so the
+    per-pick checks are plain dict/set lookups (no compute_course_item calls).
+    Returns a report with per-student issue lists and totals per issue type.
+    """
+    stu_map = {s["student_id"]: s for s in read_students()}
+    course_map = {c["course_code"]: c for c in read_courses() if c.get("course_code")}
+    appr_map = {(a["student_id"], a["course_code"]): (a.get("status") or "pending").lower() for a in read_approvals()}
+
+    # grade ranges resolved once per course instead of once per pick
+    ranges = {}
+    for code, c in course_map.items():
+        ranges[code] = (_grade_int(c.get("grade_min")), _grade_int(c.get("grade_max")))
+
+    counts = {t: 0 for t in ISSUE_TYPES}
+    students_out = []
+    scheds = read_schedules()
+
+    for sched in scheds:
+        sid = sched["student_id"]
+        stu = stu_map.get(sid) or {}
+        grade_level = stu.get("grade_level") or sched.get("grade_level", "")
+        grade = _grade_int(grade_level)
+
+        issues = []
+        seen = set()
+        picks = [("academic", x) for x in (sched.get("academic_courses") or [])] + [
+            ("elective", x) for x in (sched.get("elective_courses") or [])
+        ]
+
+        for slot, code in picks:
+            if code in seen:
+                issues.append({"type": "duplicate_pick", "course_code": code, "slot": slot})
+                continue
+            seen.add(code)
+
+            course = course_map.get(code)
+            if not course:
+                issues.append({"type": "unknown_course", "course_code": code, "slot": slot})
+                continue
+
+            gmin, gmax = ranges[code]
+            if grade is not None and ((gmin is not None and grade < gmin) or (gmax is not None and grade > gmax)):
+                issues.append(
+                    {
+                        "type": "grade_out_of_range",
+                        "course_code": code,
+                        "slot": slot,
+                        "grade_min": course.get("grade_min", ""),
+                        "grade_max": course.get("grade_max", ""),
+                    }
+                )
+
+            if course.get("requires_approval", False):
+                st = appr_map.get((sid, code), "pending")
+                if st == "pending":
+                    issues.append({"type": "approval_pending", "course_code": code, "slot": slot})
+                elif st == "rejected":
+                    issues.append({"type": "approval_rejected", "course_code": code, "slot": slot})
+
+        if not sched.get("reviewed", False):
+            issues.append({"type": "unreviewed", "course_code": "", "slot": ""})
+
+        if not issues:
+            continue
+
+        for it in issues:
+            counts[it["type"]] += 1
+
+        students_out.append(
+            {
+                "student_id": sid,
+                "student_name": stu.get("student_name") or sched.get("student_name", ""),
+                "grade_level": grade_level,
+                "issues": issues,
+            }
+        )
+
+    students_out.sort(key=lambda x: (x["student_name"] or "").lower())
+
+    return {
+        "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "schedules_checked": len(scheds),
+        "students_with_issues": len(students_out),
+        "issue_counts": counts,
+        "students": students_out,
+    }
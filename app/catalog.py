@@ -0,0 +1,48 @@
+from app.storage import read_courses
+from app.httpcache import version_token
+from app.prereqs import ineligible_courses_for_student
+from app.seats import capacity_map, seat_counts
+
+# Compact catalog for client-side caching: static course fields as row arrays,
+# identified by a version token. Seat fullness and per-student eligibility
+# change far more often and come from catalog_state() instead.
+CATALOG_FIELDS = (
+    "course_code",
+    "course_name",
+    "subject_area",
+    "level",
+    "description",
+    "teacher_name",
+    "teacher_email",
+    "room",
+    "grade_min",
+    "grade_max",
+    "requires_approval",
+)
+
+
+def catalog_payload():
+    """{ version, fields, rows } for every course."""
+    rows = [[c[f] for f in CATALOG_FIELDS] for c in read_courses()]
+    return {"version": version_token("courses"), "fields": list(CATALOG_FIELDS), "rows": rows}
+
+
+def catalog_state(student_id: str = ""):
+    """{ version, full: [codes], ineligible: [codes] }; ineligible is the student's unmet prerequisites."""
+    courses = read_courses()
+    caps = capacity_map(courses)
+    taken = seat_counts()
+    full = sorted(code for code, cap in caps.items() if taken.get(code, 0) >= cap)
+    ineligible = sorted(ineligible_courses_for_student(student_id)) if student_id else []
+    return {"version": version_token("courses"), "full": full, "ineligible": ineligible}
+
+
+def offered_to_grade(course, grade: str) -> bool:
+    """grade_min..grade_max check; blank bounds are open and a non-numeric grade matches everything."""
+    try:
+        g = int(grade)
+        gmin = int(course["grade_min"]) if course["grade_min"] else g
+        gmax = int(course["grade_max"]) if course["grade_max"] else g
+    except (TypeError, ValueError):
+        return True
+    return gmin <= g <= gmax
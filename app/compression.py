@@ -0,0 +1,122 @@
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import request
+
+from config import COMPRESS_MIN_BYTES, COMPRESS_LEVEL, COMPRESS_CACHE_ENTRIES
+from app.httpcache import CONTENT_CODINGS, encoded_etag
+
+# brotli is optional; without it every compressed response is gzip
+try:
+    import brotli  # type: ignore
+except Exception:
+    brotli = None
+
+COMPRESSIBLE = ("application/json", "text/html", "text/csv", "text/plain", "text/css", "application/javascript")
+
+# (data etag, encoding) -> compressed body. The data ETags cover the path, query
+# and table versions a body was built from, so one tag always names one body.
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def _encode(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=COMPRESS_LEVEL)
+
+
+def _negotiate():
+    if brotli and request.accept_encodings["br"]:
+        return "br"
+    if request.accept_encodings["gzip"]:
+        return "gzip"
+    return None
+
+
+def _gzip_stream(chunks):
+    # gzip framing (wbits 31) around a zlib stream: output follows the input chunk by chunk
+    z = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = z.compress(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield z.flush()
+
+
+def _tag_encoded(resp, encoding):
+    etag, weak = resp.get_etag()
+    if etag and not weak:
+        resp.set_etag(encoded_etag(etag, encoding))
+
+
+def _revalidated(resp):
+    # a 304 repeats the tag of the representation the client holds
+    resp.vary.add("Accept-Encoding")
+    etag, weak = resp.get_etag()
+    if etag and not weak:
+        for coding in CONTENT_CODINGS:
+            if request.if_none_match.contains(encoded_etag(etag, coding)):
+                resp.set_etag(encoded_etag(etag, coding))
+                break
+    return resp
+
+
+def compress_response(resp):
+    """
+    after_request hook: gzip/brotli-encode sizeable text responses the client accepts.
+    Encoded responses carry the route's ETag with the coding appended.
+    """
+    if request.method == "GET" and resp.status_code == 304:
+        return _revalidated(resp)
+    if (
+        request.method != "GET"
+        or resp.status_code != 200
+        or resp.direct_passthrough  # files and SSE (send_file, event streams)
+        or "Content-Encoding" in resp.headers
+        or resp.mimetype not in COMPRESSIBLE
+    ):
+        return resp
+    resp.vary.add("Accept-Encoding")
+    if resp.is_streamed:
+        # streamed JSON lists: gzip on the fly; their size is unknown and nothing is cached
+        if request.accept_encodings["gzip"]:
+            resp.response = _gzip_stream(resp.response)
+            resp.headers["Content-Encoding"] = "gzip"
+            resp.headers.pop("Content-Length", None)
+            _tag_encoded(resp, "gzip")
+        return resp
+    encoding = _negotiate()
+    if not encoding:
+        return resp
+    body = resp.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return resp
+
+    etag, weak = resp.get_etag()
+    key = (etag, encoding) if etag and not weak else None
+    data = None
+    if key:
+        with _lock:
+            data = _cache.get(key)
+            if data is not None:
+                _cache.move_to_end(key)
+    if data is None:
+        data = _encode(body, encoding)
+        if key:
+            with _lock:
+                _cache[key] = data
+                while len(_cache) > COMPRESS_CACHE_ENTRIES:
+                    _cache.popitem(last=False)
+
+    resp.set_data(data)
+    resp.headers["Content-Encoding"] = encoding
+    if key:
+        _tag_encoded(resp, encoding)
+    return resp
+
+
+def init_compression(app):
+    app.after_request(compress_response)
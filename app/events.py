@@ -0,0 +1,86 @@
+import json
+import threading
+import time
+
+from app.statedb import connect, transaction
+
+# Change bus for live dashboards. Events are appended to the runtime database so
+# every worker process sees them; the condition below wakes streams in this
+# process immediately, and streams in other processes pick events up on their
+# next short poll of the events table (an index range read, not a CSV read).
+#
+# Each open dashboard holds one request open for as long as its stream lives,
+# so the server needs a threaded or async worker per open dashboard (the Flask
+# dev server is threaded; under gunicorn use --threads or gevent workers). A
+# stream ends after STREAM_MAX_SECONDS and the browser reconnects on its own
+# with Last-Event-ID; the reconnect checks the session again, so a logged-out
+# or demoted user stops receiving events. STREAM_MAX_SECONDS stays below
+# KEEP_SECONDS so the events missed in between are still there to resume from.
+KEEP_SECONDS = 600
+POLL_SECONDS = 1.0
+HEARTBEAT_SECONDS = 15.0
+STREAM_MAX_SECONDS = 300
+
+_cond = threading.Condition()
+
+
+def publish(kind: str, payload: dict):
+    publish_many(kind, [payload])
+
+
+def publish_many(kind: str, payloads):
+    """publish for a batch of events of one kind, appended in one transaction."""
+    now = time.time()
+    rows = [(now, kind, json.dumps(p)) for p in payloads]
+    if not rows:
+        return
+    with transaction() as conn:
+        conn.executemany("INSERT INTO events (created_at, kind, payload) VALUES (?, ?, ?)", rows)
+        conn.execute("DELETE FROM events WHERE created_at < ?", (now - KEEP_SECONDS,))
+    with _cond:
+        _cond.notify_all()
+
+
+def latest_event_id() -> int:
+    return connect().execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+
+def events_since(last_id: int, limit: int = 200):
+    rows = connect().execute(
+        "SELECT id, kind, payload FROM events WHERE id > ? ORDER BY id LIMIT ?", (last_id, limit)
+    ).fetchall()
+    return [(eid, kind, json.loads(payload)) for eid, kind, payload in rows]
+
+
+def sse_stream(last_id: int, accept=None, max_seconds: float = STREAM_MAX_SECONDS):
+    """
+    Generator of text/event-stream chunks starting after last_id.
+    accept(kind, payload) -> bool filters what this subscriber may see.
+    Ends after max_seconds so the browser reconnects (and is re-authorized).
+    """
+    yield "retry: 3000\n\n"
+    idle = 0.0
+    sent_id = last_id
+    deadline = time.monotonic() + max_seconds
+    while True:
+        batch = events_since(last_id)
+        for eid, kind, payload in batch:
+            last_id = eid
+            if accept is None or accept(kind, payload):
+                sent_id = eid
+                yield f"id: {eid}\nevent: {kind}\ndata: {json.dumps(payload)}\n\n"
+        if time.monotonic() >= deadline:
+            if last_id != sent_id:
+                # no data, so nothing is dispatched, but the reconnect resumes past filtered-out events
+                yield f"id: {last_id}\n\n"
+            return
+        if batch:
+            idle = 0.0
+            continue
+        with _cond:
+            _cond.wait(POLL_SECONDS)
+        idle += POLL_SECONDS
+        if idle >= HEARTBEAT_SECONDS:
+            # comment line keeps proxies from closing an idle connection
+            idle = 0.0
+            yield ": ping\n\n"
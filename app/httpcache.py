@@ -0,0 +1,60 @@
+import hashlib
+
+from flask import current_app, request, jsonify
+
+from app.statedb import read_versions
+from app.storage import table_versions
+
+# content codings the compression hook applies; a compressed body is tagged
+# "<data etag>-<coding>" so each encoding of the same data has its own strong ETag
+CONTENT_CODINGS = ("gzip", "br")
+
+
+def data_etag(tables, *extra):
+    """
+    Strong ETag for a GET response built only from the data versions it depends on,
+    the request path and query string, and any extra parts (e.g. the signed-in user).
+    Computing it costs one small version query instead of reading the CSV files.
+    """
+    versions = table_versions(*tables)
+    parts = [request.path, request.query_string.decode("utf-8", "replace")]
+    parts += [f"{name}={versions[name]}" for name in tables]
+    parts += [str(x) for x in extra]
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:20]
+
+
+def version_token(*tables):
+    """
+    Short token that changes whenever any of the tables change, for clients that cache
+    data across page loads. Includes the file signatures so a fresh runtime database
+    (versions restarting at 1) never reissues an old token for different data.
+    """
+    table_versions(*tables)
+    stored = read_versions(tables)
+    parts = [f"{n}={stored.get(n, (0, ''))[0]}:{stored.get(n, (0, ''))[1]}" for n in tables]
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:12]
+
+
+def encoded_etag(tag: str, coding: str) -> str:
+    return f"{tag}-{coding}"
+
+
+def client_has(tag: str) -> bool:
+    """True when If-None-Match names tag, as sent or as any of its encoded variants."""
+    inm = request.if_none_match
+    return inm.contains(tag) or any(inm.contains(encoded_etag(tag, c)) for c in CONTENT_CODINGS)
+
+
+def not_modified(tag: str):
+    return tag_response(current_app.response_class(status=304), tag)
+
+
+def cached_json(payload, tag: str):
+    return tag_response(jsonify(payload), tag)
+
+
+def tag_response(resp, tag):
+    resp.set_etag(tag)
+    # private: per-session data; no-cache: browsers must revalidate every time
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
@@ -0,0 +1,228 @@
+import csv
+import io
+
+from app.storage import (
+    _boolish,
+    read_students,
+    write_students,
+    read_courses,
+    write_courses,
+    read_teachers,
+    write_teachers,
+    read_schedules,
+    read_approvals,
+)
+from app.seats import release_many_student_seats, drop_course_seats, capacity_map, promote_waitlists
+
+MAX_REPORTED = 50  # errors / orphan ids listed per table in the summary
+
+# table -> key column, columns compared in the diff, columns every row must have
+IMPORT_TABLES = {
+    "students": {
+        "key": "student_id",
+        "columns": ("student_id", "student_name", "grade_level"),
+        "required": ("student_id", "student_name", "grade_level"),
+    },
+    "courses": {
+        "key": "course_code",
+        "columns": (
+            "course_code",
+            "course_name",
+            "subject_area",
+            "level",
+            "description",
+            "teacher_name",
+            "teacher_email",
+            "room",
+            "grade_min",
+            "grade_max",
+            "requires_approval",
+            "prerequisites",
+            "capacity",
+        ),
+        "required": ("course_code", "course_name"),
+    },
+    "teachers": {
+        "key": "teacher_email",
+        "columns": ("teacher_email", "teacher_name", "password"),
+        "required": ("teacher_email",),
+    },
+}
+
+_READERS = {"students": read_students, "courses": read_courses, "teachers": read_teachers}
+_WRITERS = {"students": write_students, "courses": write_courses, "teachers": write_teachers}
+
+
+def _normalize(table, row):
+    # same cleanup the read_* functions apply, so unchanged rows compare equal
+    out = {k: (v or "").strip() for k, v in row.items()}
+    if table == "courses" and "requires_approval" in out:
+        out["requires_approval"] = _boolish(out["requires_approval"])
+    if table == "teachers" and "teacher_email" in out:
+        out["teacher_email"] = out["teacher_email"].lower()
+    return out
+
+
+def _row_error(table, row):
+    spec = IMPORT_TABLES[table]
+    missing = [c for c in spec["required"] if not row.get(c)]
+    if missing:
+        return f"missing {', '.join(missing)}"
+    if table == "students" and not row["grade_level"].isdigit():
+        return f"grade_level {row['grade_level']!r} is not a number"
+    if table == "courses":
+        for col in ("grade_min", "grade_max", "capacity"):
+            v = row.get(col) or ""
+            if v and not v.isdigit():
+                return f"{col} {v!r} is not a number"
+    if table == "teachers" and "@" not in row["teacher_email"]:
+        return f"teacher_email {row['teacher_email']!r} is not an email address"
+    return ""
+
+
+def parse_table_upload(file_storage, table: str):
+    """
+    Stream an uploaded students/courses/teachers CSV row by row.
+    Returns (rows keyed by the table key in upload order, columns present, errors).
+    """
+    spec = IMPORT_TABLES[table]
+    stream = io.TextIOWrapper(file_storage.stream, encoding="utf-8-sig")
+    reader = csv.DictReader(stream)
+    try:
+        return _parse_rows(table, spec, reader)
+    except UnicodeDecodeError:
+        # e.g. an Excel "CSV" export saved as cp1252 or UTF-16
+        return {}, (), [{"line": reader.line_num or 1, "error": "file is not UTF-8 encoded; save it as CSV UTF-8 and upload again"}]
+
+
+def _parse_rows(table, spec, reader):
+    header = [(h or "").strip() for h in (reader.fieldnames or [])]
+    reader.fieldnames = header
+    present = tuple(c for c in spec["columns"] if c in header)
+
+    rows, errors = {}, []
+    if spec["key"] not in header:
+        return rows, present, [{"line": 1, "error": f"missing column {spec['key']}"}]
+
+    for line, raw in enumerate(reader, start=2):
+        row = _normalize(table, {c: raw.get(c, "") for c in present})
+        if not any(row.values()):
+            continue
+        err = _row_error(table, {**{c: "" for c in spec["columns"]}, **row})
+        key = row[spec["key"]]
+        if not err and key in rows:
+            err = f"duplicate {spec['key']} {key}"
+        if err:
+            errors.append({"line": line, "key": key, "error": err})
+            continue
+        rows[key] = row
+    return rows, present, errors
+
+
+def diff_table(table: str, incoming: dict, present, remove_missing: bool = True):
+    """
+    Compare incoming rows with the current table.
+    Columns missing from the upload (e.g. capacity in an SIS feed) keep their current values;
+    rows missing from the upload are removed unless remove_missing is False.
+    Returns (merged rows in table order, added keys, updated keys, removed keys).
+    """
+    spec = IMPORT_TABLES[table]
+    key = spec["key"]
+    merged, added, updated, removed = [], [], [], []
+    seen = set()
+    for cur in _READERS[table]():
+        k = cur[key]
+        if k in seen:
+            continue
+        seen.add(k)
+        old = {c: cur.get(c, "") for c in spec["columns"]}
+        new = incoming.get(k)
+        if new is None:
+            if remove_missing:
+                removed.append(k)
+            else:
+                merged.append(old)
+            continue
+        row = {**old, **{c: new[c] for c in present}}
+        if row != old:
+            updated.append(k)
+        merged.append(row)
+    for k, new in incoming.items():
+        if k not in seen:
+            added.append(k)
+            merged.append({**{c: "" for c in spec["columns"]}, **new})
+    return merged, added, updated, removed
+
+
+def _orphans(table: str, removed):
+    """Schedules, approvals and courses that point at removed rows (reported, not deleted)."""
+    gone = set(removed)
+    if not gone:
+        return {}
+    if table == "students":
+        scheds = sorted(s["student_id"] for s in read_schedules() if s["student_id"] in gone)
+        appr = sum(1 for a in read_approvals() if a["student_id"] in gone)
+        return {"schedules": scheds[:MAX_REPORTED], "schedule_count": len(scheds), "approval_count": appr}
+    if table == "courses":
+        scheds = sorted(
+            {
+                s["student_id"]
+                for s in read_schedules()
+                if gone.intersection(s["academic_courses"]) or gone.intersection(s["elective_courses"])
+            }
+        )
+        appr = sum(1 for a in read_approvals() if a["course_code"] in gone)
+        return {"schedules": scheds[:MAX_REPORTED], "schedule_count": len(scheds), "approval_count": appr}
+    courses = sorted(c["course_code"] for c in read_courses() if (c.get("teacher_email") or "").lower() in gone)
+    return {"courses": courses[:MAX_REPORTED], "course_count": len(courses)}
+
+
+def import_table_delta(table: str, file_storage, remove_missing: bool = True):
+    """
+    Validate an upload and apply only the adds/updates/removes against the current table.
+    A file with any invalid row is not applied; an unchanged file writes nothing, so
+    the table version (and every ETag and cache keyed on it) stays valid.
+    Removed students release their seats and waitlist spots (promoting whoever is next);
+    removed courses drop theirs, and courses whose capacity changed promote from their
+    waitlist. The summary reports these under "seats".
+    """
+    incoming, present, errors = parse_table_upload(file_storage, table)
+    summary = {
+        "rows": len(incoming) + len(errors),
+        "added": 0,
+        "updated": 0,
+        "removed": 0,
+        "unchanged": 0,
+        "applied": False,
+        "errors": errors[:MAX_REPORTED],
+        "error_count": len(errors),
+    }
+    if errors:
+        return summary
+
+    merged, added, updated, removed = diff_table(table, incoming, present, remove_missing)
+    summary.update(
+        added=len(added),
+        updated=len(updated),
+        removed=len(removed),
+        unchanged=len(incoming) - len(added) - len(updated),
+        orphans=_orphans(table, removed),
+    )
+    old_caps = capacity_map() if table == "courses" and updated else {}
+    if added or updated or removed:
+        _WRITERS[table](merged)
+    # removed students and courses give back their seats and waitlist spots, like the single delete paths
+    if removed and table == "students":
+        promoted = release_many_student_seats(removed)
+        summary["seats"] = {"released_students": len(removed), "promoted": len(promoted)}
+    elif table == "courses" and (removed or updated):
+        for code in removed:
+            drop_course_seats(code)
+        # a changed capacity may free seats for waitlisted students, like counselor_update_course
+        new_caps = capacity_map()
+        resized = [k for k in updated if old_caps.get(k) != new_caps.get(k)]
+        promoted = promote_waitlists(resized) if resized else []
+        if removed or resized:
+            summary["seats"] = {"dropped_courses": len(removed), "resized_courses": len(resized), "promoted": len(promoted)}
+    summary["applied"] = True
+    return summary
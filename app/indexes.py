@@ -0,0 +1,145 @@
+import hashlib
+import threading
+
+from app.storage import table_versions, read_students, read_schedules, read_courses, read_approvals
+
+# Process-local search index over the counselor student list. Each entry keeps
+# the lowercased strings the list filters match on, so resolving a filter to a
+# set of student ids is one pass over short strings: no schedule or approval
+# reads, no per-student approval counts. Names and grades are rebuilt only when
+# students change; the course text is a separate index, built on the first
+# course filter after students, schedules or courses change (checked through the
+# shared table versions), so schedule saves never rebuild the name index.
+_lock = threading.Lock()
+_state = {
+    "sig": None,
+    "rows": [],  # (student_id, name_lower, grade_level, student_name) in students.csv order
+    "by_grade": {},  # grade_level -> [row index, ...]
+}
+_hay_state = {
+    "sig": None,
+    "hay": {},  # student_id -> lowercased course text the list shows
+}
+
+
+def _refresh_locked():
+    sig = table_versions("students")["students"]
+    if sig == _state["sig"]:
+        return
+    rows = []
+    by_grade = {}
+    for stu in read_students():
+        by_grade.setdefault(stu["grade_level"], []).append(len(rows))
+        rows.append((stu["student_id"], stu["student_name"].lower(), stu["grade_level"], stu["student_name"]))
+    _state["rows"] = rows
+    _state["by_grade"] = by_grade
+    _state["sig"] = sig
+
+
+def _refresh_hay_locked():
+    versions = table_versions("students", "schedules", "courses")
+    sig = (versions["students"], versions["schedules"], versions["courses"])
+    if sig == _hay_state["sig"]:
+        return
+
+    names = {c["course_code"]: c["course_name"] for c in read_courses()}
+
+    def display(code):
+        return f"{names[code]} ({code})" if names.get(code) else code
+
+    hay = {}
+    for sched in read_schedules():
+        # what the list shows: every academic course and the top elective
+        shown = list(sched["academic_courses"]) + list(sched["elective_courses"][:1])
+        hay[sched["student_id"]] = " ".join(display(c) for c in shown).lower()
+    _hay_state["hay"] = hay
+    _hay_state["sig"] = sig
+
+
+def filter_student_ids(q_name: str = "", q_grade: str = "", q_course: str = ""):
+    """Student ids matching the counselor list filters, in students.csv order."""
+    q_name = (q_name or "").strip().lower()
+    q_grade = (q_grade or "").strip()
+    q_course = (q_course or "").strip().lower()
+    with _lock:
+        _refresh_locked()
+        rows = _state["rows"]
+        candidates = (rows[i] for i in _state["by_grade"].get(q_grade, ())) if q_grade else rows
+        if not q_course:
+            return [sid for sid, name, _grade, _display in candidates if not q_name or q_name in name]
+        _refresh_hay_locked()
+        hay = _hay_state["hay"]
+        return [
+            sid
+            for sid, name, _grade, _display in candidates
+            if (not q_name or q_name in name) and q_course in hay.get(sid, "")
+        ]
+
+
+def find_students(q: str, limit: int):
+    """
+    Name typeahead: up to limit {student_id, student_name, grade_level} whose name contains q.
+    Returns (matches, more) where more tells whether further matches were cut off.
+    """
+    q = (q or "").strip().lower()
+    out = []
+    with _lock:
+        _refresh_locked()
+        for sid, name, grade, display in _state["rows"]:
+            if q in name:
+                if len(out) == limit:
+                    return out, True
+                out.append({"student_id": sid, "student_name": display, "grade_level": grade})
+    return out, False
+
+
+# Course -> students index for printable rosters. One pass over schedules and
+# approvals per data change builds every roster; each course also gets a
+# fingerprint of exactly what its roster shows, so renders cached per course
+# stay valid until that course's enrollment, approvals or details change.
+_roster_state = {"sig": None, "rosters": {}, "fingerprints": {}}
+
+
+def _refresh_rosters_locked():
+    versions = table_versions("students", "schedules", "approvals", "courses")
+    sig = tuple(versions[n] for n in ("students", "schedules", "approvals", "courses"))
+    if sig == _roster_state["sig"]:
+        return
+
+    courses = {c["course_code"]: c for c in read_courses() if c["course_code"]}
+    names = {s["student_id"]: s for s in read_students()}
+    status = {(a["student_id"], a["course_code"]): (a["status"] or "pending").lower() for a in read_approvals()}
+
+    members = {code: [] for code in courses}
+    for s in read_schedules():
+        sid = s["student_id"]
+        stu = names.get(sid) or s
+        for code in dict.fromkeys(list(s["academic_courses"]) + list(s["elective_courses"])):
+            course = courses.get(code)
+            if course is None:
+                continue
+            default = "pending" if course["requires_approval"] else "approved"
+            members[code].append((sid, stu["student_name"], stu["grade_level"], status.get((sid, code), default)))
+
+    rosters, fingerprints = {}, {}
+    for code, rows in members.items():
+        rows.sort(key=lambda r: (r[1].lower(), r[0]))
+        rosters[code] = tuple(rows)
+        c = courses[code]
+        shown = (c["course_name"], c["teacher_name"], c["room"], c["requires_approval"], rosters[code])
+        fingerprints[code] = hashlib.sha1(repr(shown).encode("utf-8")).hexdigest()[:16]
+    _roster_state.update(sig=sig, rosters=rosters, fingerprints=fingerprints)
+
+
+def course_roster(course_code: str):
+    """(fingerprint, ((student_id, student_name, grade_level, approval_status), ...)) or (None, ()) for unknown courses."""
+    with _lock:
+        _refresh_rosters_locked()
+        return _roster_state["fingerprints"].get(course_code), _roster_state["rosters"].get(course_code, ())
+
+
+def roster_fingerprints():
+    """course_code -> roster fingerprint for every course."""
+    with _lock:
+        _refresh_rosters_locked()
+        return dict(_roster_state["fingerprints"])
@@ -0,0 +1,63 @@
+import threading
+
+from flask import current_app
+
+from config import STREAM_CHUNK_BYTES, FRAGMENT_CACHE_ENTRIES
+from app.httpcache import tag_response
+
+# (namespace, key) -> (signature, serialized row). A row is re-serialized only
+# when its signature (everything the row is built from) differs from the cached one.
+_fragments = {}
+_lock = threading.Lock()
+
+
+def cached_rows(namespace: str, items):
+    """
+    Serialized JSON rows from items, an iterable of (key, signature, build) produced lazily
+    while the response streams; build() only runs when the row's signature changed.
+    """
+    dumps = current_app.json.dumps  # taken now: the app context is gone once streaming starts
+
+    def generate():
+        for key, signature, build in items:
+            k = (namespace, key)
+            hit = _fragments.get(k)
+            if hit is not None and hit[0] == signature:
+                yield hit[1]
+                continue
+            text = dumps(build())
+            with _lock:
+                if len(_fragments) >= FRAGMENT_CACHE_ENTRIES:
+                    _fragments.clear()
+                _fragments[k] = (signature, text)
+            yield text
+
+    return generate()
+
+
+def stream_json(head: dict, key: str, fragments, tag: str = ""):
+    """
+    Response for {**head, key: [rows]} that writes head first and the rows as they are
+    produced from fragments (an iterable of serialized rows), in chunks of about
+    STREAM_CHUNK_BYTES, so the full list is never built as one string.
+    """
+    dumps = current_app.json.dumps
+    opening = dumps(head)[:-1] + (", " if head else "") + dumps(key) + ": ["
+
+    def generate():
+        buf, size = [opening], len(opening)
+        sep = ""
+        for text in fragments:
+            buf.append(sep)
+            buf.append(text)
+            size += len(text) + 1
+            sep = ", "
+            if size >= STREAM_CHUNK_BYTES:
+                yield "".join(buf)
+                buf, size = [], 0
+        buf.append("]}")
+        yield "".join(buf)
+
+    # rows are built while streaming, after the view returned: nothing below may need the request context
+    resp = current_app.response_class(generate(), mimetype="application/json")
+    return tag_response(resp, tag) if tag else resp
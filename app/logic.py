@@ -1,4 +1,3 @@
-import re
 from datetime import datetime
 
 from config import MAX_ACADEMIC_COURSES, MAX_ELECTIVE_CHOICES
@@ -8,24 +7,37 @@ from app.storage import (
     read_courses,
     write_courses,
     read_schedules,
+    read_schedule,
     write_schedules,
+    save_schedule_row,
+    delete_schedule_row,
     read_approvals,
     write_approvals,
 )
-
-CODE_RE = re.compile(r"\(([^()]+)\)\s*$")
+from app.seats import (
+    release_student_seats,
+    release_many_student_seats,
+    seat_status_for_student,
+    release_course_seats,
+    request_course_seats,
+    request_priorities,
+)
+from app.events import publish, publish_many
+from app.records import course_code_of
+from app.indexes import filter_student_ids
 
 
 def extract_course_code(course_display: str) -> str:
-    if not course_display:
-        return ""
-    s = course_display.strip()
-    m = CODE_RE.search(s)
-    if m:
-        return m.group(1).strip()
-    if len(s) <= 12 and " " not in s:
-        return s
-    return s
+    """Course code from a client-submitted entry ("English I (ENG9)" or "ENG9")."""
+    return course_code_of(course_display)
+
+
+def course_display(code: str, course_map=None) -> str:
+    """Display string joined from the catalog at render time; unknown codes show as the bare code."""
+    course = (course_map if course_map is not None else course_by_code_map()).get(code)
+    if not course or not course.get("course_name"):
+        return code
+    return f"{course['course_name']} ({code})"
 
 
 def course_by_code_map():
@@ -44,10 +56,7 @@ def get_student_by_id(sid: str):
 
 
 def get_schedule_for_student(sid: str):
-    for s in read_schedules():
-        if s["student_id"] == sid:
-            return s
-    return None
+    return read_schedule(sid)
 
 
 def upsert_schedule(
@@ -58,41 +67,67 @@ def upsert_schedule(
     elective_list,
     special_instructions: str,
 ):
-    scheds = read_schedules()
-    found = False
-    for row in scheds:
-        if row["student_id"] == student_id:
-            row["student_name"] = student_name
-            row["grade_level"] = grade_level
-            row["academic_courses"] = list(academic_list)[:MAX_ACADEMIC_COURSES]
-            row["elective_courses"] = list(elective_list)[:MAX_ELECTIVE_CHOICES]
-            row["special_instructions"] = (special_instructions or "").strip()
-            # Preserve reviewed status but don't overwrite it here
-            if "reviewed" not in row:
-                row["reviewed"] = False
-            found = True
-            break
-
-    if not found:
-        scheds.append(
-            {
-                "student_id": student_id,
-                "student_name": student_name,
-                "grade_level": grade_level,
-                "academic_courses": list(academic_list)[:MAX_ACADEMIC_COURSES],
-                "elective_courses": list(elective_list)[:MAX_ELECTIVE_CHOICES],
-                "special_instructions": (special_instructions or "").strip(),
-                "reviewed": False,
-            }
-        )
+    existing = get_schedule_for_student(student_id)
+    row = {
+        "student_id": student_id,
+        "student_name": student_name,
+        "grade_level": grade_level,
+        "academic_courses": [extract_course_code(x) for x in academic_list if x][:MAX_ACADEMIC_COURSES],
+        "elective_courses": [extract_course_code(x) for x in elective_list if x][:MAX_ELECTIVE_CHOICES],
+        "special_instructions": (special_instructions or "").strip(),
+        # Preserve reviewed status but don't overwrite it here
+        "reviewed": bool(existing.get("reviewed", False)) if existing else False,
+    }
+
+    save_schedule_row(row)
+    publish("schedule", _schedule_event(row, previous=existing))
+
 
-    write_schedules(scheds)
+def _row_codes(row):
+    return {c for c in (row.get("academic_courses") or []) + (row.get("elective_courses") or []) if c}
+
+
+def _schedule_event(row, previous=None):
+    """
+    Live-update payload for a saved schedule. removed_codes lists courses the previous
+    row had and this one dropped, so those courses' teachers hear about the change too.
+    """
+    codes = _row_codes(row)
+    return {
+        "student_id": row["student_id"],
+        "scheduled": True,
+        "reviewed": bool(row.get("reviewed", False)),
+        "course_codes": sorted(codes),
+        "removed_codes": sorted(_row_codes(previous) - codes) if previous else [],
+    }
+
+
+def _dropped_event(row):
+    # the schedule is gone: every course it had lost the student
+    return {
+        "student_id": row["student_id"],
+        "scheduled": False,
+        "reviewed": False,
+        "course_codes": [],
+        "removed_codes": sorted(_row_codes(row)),
+    }
 
 
 def reset_student_schedule(student_id: str):
-    scheds = read_schedules()
-    scheds = [s for s in scheds if s["student_id"] != student_id]
-    write_schedules(scheds)
+    """
+    Drop the student's schedule and approvals and free their seats; the same reset
+    apply_bulk_operations performs.
+    """
+    existing = get_schedule_for_student(student_id)
+    if existing:
+        delete_schedule_row(student_id)
+    appr = read_approvals()
+    kept = [a for a in appr if a["student_id"] != student_id]
+    if len(kept) != len(appr):
+        write_approvals(kept)
+    release_student_seats(student_id)
+    if existing:
+        publish("schedule", _dropped_event(existing))
 
 
 def delete_student_record(student_id: str):
@@ -102,9 +137,172 @@ def delete_student_record(student_id: str):
 
     reset_student_schedule(student_id)
 
-    appr = read_approvals()
-    appr = [a for a in appr if a["student_id"] != student_id]
-    write_approvals(appr)
+
+BULK_ACTIONS = ("sign_off", "unsign", "reset", "delete")
+
+
+def apply_bulk_operations(operations):
+    """
+    Apply a batch of {"action", "student_id"} operations in memory and persist each
+    affected table once. Actions: sign_off, unsign, reset (schedule + approvals),
+    delete (student record + reset). Items are applied in order; returns one
+    {"student_id", "action", "ok"[, "error"]} result per item.
+    """
+    studs = read_students()
+    scheds = read_schedules()
+    approvals = read_approvals()
+
+    student_ids = {s["student_id"] for s in studs}
+    sched_by_id = {s["student_id"]: s for s in scheds}
+    deleted = set()
+    cleared = set()  # students whose schedule and approvals are dropped
+    signed = {}  # student_id -> reviewed flag, last one wins
+
+    results = []
+    for op in operations:
+        action = (op.get("action", "") or "").strip().lower()
+        sid = (op.get("student_id", "") or "").strip()
+        res = {"student_id": sid, "action": action, "ok": False}
+        results.append(res)
+
+        if action not in BULK_ACTIONS:
+            res["error"] = "bad_action"
+            continue
+        if not sid:
+            res["error"] = "missing_id"
+            continue
+
+        if action in ("sign_off", "unsign"):
+            if sid not in sched_by_id or sid in cleared:
+                res["error"] = "no_schedule"
+                continue
+            signed[sid] = action == "sign_off"
+        elif action == "delete":
+            if sid not in student_ids or sid in deleted:
+                res["error"] = "not_found"
+                continue
+            deleted.add(sid)
+            cleared.add(sid)
+            signed.pop(sid, None)
+        else:
+            cleared.add(sid)
+            signed.pop(sid, None)
+        res["ok"] = True
+
+    if deleted:
+        write_students([s for s in studs if s["student_id"] not in deleted])
+
+    dropped = [sched_by_id[sid] for sid in sorted(cleared) if sid in sched_by_id]
+    changed = [
+        sched_by_id[sid]
+        for sid in signed
+        if sid not in cleared and sched_by_id[sid].get("reviewed", False) != signed[sid]
+    ]
+    for row in changed:
+        row["reviewed"] = signed[row["student_id"]]
+    if dropped or changed:
+        write_schedules([s for s in scheds if s["student_id"] not in cleared])
+
+    if cleared:
+        kept = [a for a in approvals if a["student_id"] not in cleared]
+        if len(kept) != len(approvals):
+            write_approvals(kept)
+        release_many_student_seats(sorted(cleared))
+
+    publish_many("schedule", [_dropped_event(row) for row in dropped] + [_schedule_event(row) for row in changed])
+
+    return results
+
+
+def set_approvals(course_code: str, student_ids, status: str, teacher_email: str, note: str = ""):
+    """
+    Record one teacher decision for several students in a course: approvals.csv is
+    updated through a (student_id, course_code) index and written once.
+    Rejections free the seat (promoting from the waitlist); un-rejecting a course
+    asks for the seat again. Seat changes run in one
+    transaction and the approval events are appended together.
+    Students who do not have the course on their schedule are ignored.
+    Returns the list of student ids that were updated.
+    """
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    sched_by_id = {s["student_id"]: s for s in read_schedules()}
+    selected = {}
+    for sid in dict.fromkeys(x for x in student_ids if x):
+        sched = sched_by_id.get(sid) or {}
+        acad, elec = list(sched.get("academic_courses", [])), list(sched.get("elective_courses", []))
+        if course_code in acad or course_code in elec:
+            selected[sid] = (acad, elec)
+    if not selected:
+        return []
+
+    approvals = read_approvals()
+    index = {(a["student_id"], a["course_code"]): a for a in approvals}
+    previous = {}
+    for sid in selected:
+        row = index.get((sid, course_code))
+        if row is None:
+            row = {"student_id": sid, "course_code": course_code}
+            approvals.append(row)
+            index[(sid, course_code)] = row
+        previous[sid] = row.get("status", "")
+        row.update({"status": status, "teacher_email": teacher_email, "updated_at": now, "note": note})
+    write_approvals(approvals)
+    course_map = course_by_code_map()
+
+    # all seat changes for the decision go through one transaction
+    if status == "rejected":
+        # the seats go to the next students on the course waitlist
+        release_course_seats(course_code, list(previous))
+    else:
+        wanted = {
+            sid: request_priorities(acad, elec).get(course_code, 0)
+            for sid, (acad, elec) in selected.items()
+            if previous[sid] == "rejected"
+        }
+        if wanted:
+            request_course_seats(course_code, wanted)
+
+    events = []
+    for sid, (acad, elec) in selected.items():
+        pending_cnt, rejected_cnt = _approval_counts(acad + elec, course_map, index, sid)
+        events.append(
+            {
+                "student_id": sid,
+                "course_code": course_code,
+                "status": status,
+                "teacher_email": teacher_email,
+                "updated_at": now,
+                "pending_approvals": pending_cnt,
+                "rejected_approvals": rejected_cnt,
+            }
+        )
+    publish_many("approval", events)
+    return list(previous)
+
+
+def _approval_counts(selected_codes, course_map, approval_index, student_id):
+    pending = 0
+    rejected = 0
+    for code in selected_codes:
+        if not course_map.get(code, {}).get("requires_approval", False):
+            continue
+        st = ((approval_index.get((student_id, code)) or {}).get("status") or "pending").lower()
+        if st == "pending":
+            pending += 1
+        elif st == "rejected":
+            rejected += 1
+    return pending, rejected
+
+
+def pending_students_for_course(course_code: str):
+    """Student ids who have the course on their schedule and are still waiting on approval."""
+    status = {a["student_id"]: (a["status"] or "pending").lower() for a in read_approvals() if a["course_code"] == course_code}
+    out = []
+    for s in read_schedules():
+        codes = (s.get("academic_courses") or []) + (s.get("elective_courses") or [])
+        if course_code in codes and status.get(s["student_id"], "pending") == "pending":
+            out.append(s["student_id"])
+    return out
 
 
 def approval_status_map_for_student(student_id: str):
@@ -118,6 +316,7 @@ def approval_status_map_for_student(student_id: str):
 def ensure_approval_rows_for_schedule(student_id: str, selected_course_codes):
     course_map = course_by_code_map()
     approvals = read_approvals()
+    before = len(approvals)
 
     selected_set = {c for c in selected_course_codes if c}
 
@@ -130,6 +329,7 @@ def ensure_approval_rows_for_schedule(student_id: str, selected_course_codes):
 
     existing = {(a["student_id"], a["course_code"]) for a in approvals}
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    added = False
 
     for code in selected_set:
         course = course_map.get(code)
@@ -150,13 +350,18 @@ def ensure_approval_rows_for_schedule(student_id: str, selected_course_codes):
                     "note": "",
                 }
             )
+            added = True
 
-    write_approvals(approvals)
+    # unchanged rows keep the approvals version (and every ETag built on it)
+    if added or len(approvals) != before:
+        write_approvals(approvals)
 
 
-def compute_course_item(course_display: str, student_id: str | None = None):
-    code = extract_course_code(course_display)
-    course = course_by_code_map().get(code)
+def compute_course_item(course_ref: str, student_id: str | None = None, course_map=None, appr_map=None):
+    code = extract_course_code(course_ref)
+    if course_map is None:
+        course_map = course_by_code_map()
+    course = course_map.get(code)
 
     subject_area = ((course.get("subject_area") if course else "") or "Other")
     requires = bool(course.get("requires_approval")) if course else False
@@ -165,14 +370,16 @@ def compute_course_item(course_display: str, student_id: str | None = None):
     status = "approved"
     if requires:
         if student_id:
-            appr = approval_status_map_for_student(student_id).get(code)
+            if appr_map is None:
+                appr_map = approval_status_map_for_student(student_id)
+            appr = appr_map.get(code)
             status = (appr.get("status") if appr else "pending") or "pending"
             status = status.lower()
         else:
             status = "pending"
 
     return {
-        "display": course_display,
+        "display": course_display(code, course_map),
         "course_code": code,
         "subject_area": subject_area,
         "requires_approval": requires,
@@ -182,18 +389,30 @@ def compute_course_item(course_display: str, student_id: str | None = None):
 
 
 def schedule_items_for_student(student_id: str, sched_obj: dict):
-    academic = [compute_course_item(x, student_id) for x in (sched_obj.get("academic_courses") or [])]
-    elective = [compute_course_item(x, student_id) for x in (sched_obj.get("elective_courses") or [])]
+    course_map = course_by_code_map()
+    appr_map = approval_status_map_for_student(student_id)
+    academic = [compute_course_item(x, student_id, course_map, appr_map) for x in (sched_obj.get("academic_courses") or [])]
+    elective = [compute_course_item(x, student_id, course_map, appr_map) for x in (sched_obj.get("elective_courses") or [])]
+
+    seats = seat_status_for_student(student_id)
+    for it in academic + elective:
+        st = seats.get(it["course_code"]) or {}
+        it["seat_status"] = st.get("seat_status", "")
+        it["waitlist_position"] = st.get("waitlist_position", 0)
     return academic, elective
 
 
-def approval_counts_for_student(student_id: str, sched_obj: dict):
-    selected_codes = [extract_course_code(x) for x in (sched_obj.get("academic_courses") or [])] + [
-        extract_course_code(x) for x in (sched_obj.get("elective_courses") or [])
-    ]
+def rejected_codes_for_student(student_id: str):
+    return {code for code, a in approval_status_map_for_student(student_id).items() if a.get("status") == "rejected"}
 
-    course_map = course_by_code_map()
-    appr_map = approval_status_map_for_student(student_id)
+
+def approval_counts_for_student(student_id: str, sched_obj: dict, course_map=None, appr_map=None):
+    selected_codes = list(sched_obj.get("academic_courses") or []) + list(sched_obj.get("elective_courses") or [])
+
+    if course_map is None:
+        course_map = course_by_code_map()
+    if appr_map is None:
+        appr_map = approval_status_map_for_student(student_id)
 
     pending = 0
     rejected = 0
@@ -214,49 +433,21 @@ def approval_counts_for_student(student_id: str, sched_obj: dict):
 
 def mark_schedule_reviewed(student_id: str, reviewed: bool = True):
     """Mark a student's schedule as reviewed (signed off) or not reviewed."""
-    scheds = read_schedules()
-    for row in scheds:
-        if row["student_id"] == student_id:
-            row["reviewed"] = reviewed
-            break
-    write_schedules(scheds)
+    row = get_schedule_for_student(student_id)
+    if row:
+        row["reviewed"] = reviewed
+        save_schedule_row(row)
+        publish("schedule", _schedule_event(row))
 
 
 def get_student_list_with_filters(q_name="", q_grade="", q_course=""):
     """Get filtered student list matching the counselor's current filters."""
-    studs = read_students()
-    sched_map = {s["student_id"]: s for s in read_schedules()}
-
-    out = []
-    for stu in studs:
-        sid = stu["student_id"]
-        sched = sched_map.get(sid)
-
-        academic = []
-        elective = []
-        if sched:
-            academic = sched["academic_courses"]
-            elective = sched["elective_courses"]
-
-        # Apply filters
-        if q_name and q_name.lower() not in stu["student_name"].lower():
-            continue
-        if q_grade and stu["grade_level"] != q_grade:
-            continue
-        if q_course:
-            hay = " ".join(academic + elective).lower()
-            if q_course.lower() not in hay:
-                continue
-
-        out.append(
-            {
-                "student_id": sid,
-                "student_name": stu["student_name"],
-                "grade_level": stu["grade_level"],
-            }
-        )
-
-    return out
+    stu_map = {s["student_id"]: s for s in read_students()}
+    return [
+        {"student_id": sid, "student_name": stu_map[sid]["student_name"], "grade_level": stu_map[sid]["grade_level"]}
+        for sid in filter_student_ids(q_name, q_grade, q_course)
+        if sid in stu_map
+    ]
 
 
 def get_next_student_id(current_id: str, student_list):
@@ -0,0 +1,245 @@
+import csv
+import io
+import re
+import threading
+
+from app.storage import (
+    _boolish,
+    table_versions,
+    read_courses,
+    read_prerequisites,
+    write_prerequisites,
+    read_course_history,
+    write_course_history,
+)
+
+PREREQ_SPLIT_RE = re.compile(r"[;|,\s]+")
+PREREQ_COLUMNS = ("course_code", "prerequisite_code")
+MAX_REPORTED = 50  # errors listed in an upload summary
+
+# Process-local eligibility cache. The prerequisite graph is rebuilt only when
+# courses.csv or prerequisites.csv change; per-student entries are dropped only
+# for students whose course history changed, so other workers that rewrite the
+# history file invalidate exactly the affected students here too.
+_lock = threading.Lock()
+_state = {
+    "catalog_sig": None,
+    "history_sig": None,
+    "prereqs": {},  # course_code -> frozenset(direct prerequisite codes)
+    "ancestors": {},  # course_code -> frozenset(all transitive prerequisite codes)
+    "history": {},  # student_id -> frozenset(passed course codes)
+    "ineligible": {},  # student_id -> frozenset(course codes the student cannot take yet)
+    "baseline": frozenset(),  # ineligible set for a student with no history
+}
+
+
+def parse_prereq_list(raw: str):
+    return [p for p in PREREQ_SPLIT_RE.split(raw or "") if p]
+
+
+def build_prereq_graph(courses, extra_edges):
+    """Merge the optional courses.csv column and prerequisites.csv into one course -> prerequisites map."""
+    graph = {}
+    for c in courses:
+        code = c.get("course_code")
+        if not code:
+            continue
+        graph.setdefault(code, set()).update(parse_prereq_list(c.get("prerequisites", "")))
+    for e in extra_edges:
+        if e["course_code"] and e["prerequisite_code"]:
+            graph.setdefault(e["course_code"], set()).add(e["prerequisite_code"])
+    for code in graph:
+        graph[code].discard(code)
+    return {k: frozenset(v) for k, v in graph.items()}
+
+
+def _ancestor_map(graph):
+    """Transitive prerequisites per course. Edges that would close a cycle are ignored."""
+    out = {}
+    visiting = set()
+
+    def visit(code):
+        if code in out:
+            return out[code]
+        if code in visiting:
+            return frozenset()
+        visiting.add(code)
+        acc = set()
+        for p in graph.get(code, ()):
+            if p in visiting:
+                continue
+            acc.add(p)
+            acc.update(visit(p))
+        visiting.discard(code)
+        out[code] = frozenset(acc)
+        return out[code]
+
+    for code in graph:
+        visit(code)
+    return out
+
+
+def _completed_closure(passed):
+    # passing a course also counts for everything below it in the DAG
+    done = set(passed)
+    for code in passed:
+        done.update(_state["ancestors"].get(code, ()))
+    return done
+
+
+def _ineligible_for(passed):
+    done = _completed_closure(passed)
+    return frozenset(code for code, req in _state["prereqs"].items() if req and not req <= done)
+
+
+def _history_by_student(rows):
+    hist = {}
+    for r in rows:
+        if not r["student_id"] or not r["course_code"] or not r["passed"]:
+            continue
+        hist.setdefault(r["student_id"], set()).add(r["course_code"])
+    return {sid: frozenset(codes) for sid, codes in hist.items()}
+
+
+def _refresh_locked():
+    versions = table_versions("courses", "prerequisites", "course_history")
+    catalog_sig = (versions["courses"], versions["prerequisites"])
+    history_sig = versions["course_history"]
+
+    if catalog_sig != _state["catalog_sig"]:
+        graph = build_prereq_graph(read_courses(), read_prerequisites())
+        # catalog edits that leave the prerequisite graph alone (names, rooms,
+        # an SIS re-import) keep every per-student entry
+        if graph != _state["prereqs"] or _state["catalog_sig"] is None:
+            _state["prereqs"] = graph
+            _state["ancestors"] = _ancestor_map(graph)
+            _state["baseline"] = _ineligible_for(frozenset())
+            _state["ineligible"] = {}
+            _state["history"] = {}
+            _state["history_sig"] = None
+        _state["catalog_sig"] = catalog_sig
+
+    if history_sig != _state["history_sig"]:
+        _apply_history_locked(_history_by_student(read_course_history()))
+        _state["history_sig"] = history_sig
+
+
+def _apply_history_locked(new_hist):
+    old_hist = _state["history"]
+    cache = _state["ineligible"]
+    changed = {sid for sid in set(old_hist) | set(new_hist) if old_hist.get(sid) != new_hist.get(sid)}
+    for sid in changed:
+        if sid in new_hist:
+            cache[sid] = _ineligible_for(new_hist[sid])
+        else:
+            cache.pop(sid, None)
+    _state["history"] = new_hist
+    return changed
+
+
+def ineligible_courses_for_student(student_id: str):
+    """Course codes whose prerequisites the student has not met (cached)."""
+    with _lock:
+        _refresh_locked()
+        return _state["ineligible"].get(student_id, _state["baseline"])
+
+
+def missing_prerequisites(student_id: str, course_code: str):
+    with _lock:
+        _refresh_locked()
+        req = _state["prereqs"].get(course_code, frozenset())
+        if not req:
+            return []
+        return sorted(req - _completed_closure(_state["history"].get(student_id, frozenset())))
+
+
+def parse_prereq_upload(file_storage):
+    """
+    Parse and validate an uploaded prerequisites CSV (course_code, prerequisite_code).
+    Both codes must be courses in courses.csv. Returns (edges in upload order, errors).
+    """
+    stream = io.TextIOWrapper(file_storage.stream, encoding="utf-8-sig")
+    reader = csv.DictReader(stream)
+    try:
+        header = [(h or "").strip() for h in (reader.fieldnames or [])]
+        missing = [c for c in PREREQ_COLUMNS if c not in header]
+        if missing:
+            return [], [{"line": 1, "error": f"missing column {', '.join(missing)}"}]
+        reader.fieldnames = header
+        known = {c["course_code"] for c in read_courses() if c["course_code"]}
+        edges, errors, seen = [], [], set()
+        for line, raw in enumerate(reader, start=2):
+            edge = {c: (raw.get(c, "") or "").strip() for c in PREREQ_COLUMNS}
+            if not any(edge.values()):
+                continue
+            unknown = [edge[c] or "(blank)" for c in PREREQ_COLUMNS if edge[c] not in known]
+            if unknown:
+                errors.append({"line": line, "error": f"unknown course {', '.join(unknown)}"})
+                continue
+            if edge["course_code"] == edge["prerequisite_code"]:
+                errors.append({"line": line, "error": f"{edge['course_code']} cannot be its own prerequisite"})
+                continue
+            key = (edge["course_code"], edge["prerequisite_code"])
+            if key not in seen:
+                seen.add(key)
+                edges.append(edge)
+    except UnicodeDecodeError:
+        return [], [{"line": reader.line_num or 1, "error": "file is not UTF-8 encoded; save it as CSV UTF-8 and upload again"}]
+    return edges, errors
+
+
+def import_prerequisites(file_storage):
+    """
+    Replace prerequisites.csv with a validated upload. A file with any invalid row is
+    not applied, and an unchanged file writes nothing (the eligibility cache stays valid).
+    """
+    edges, errors = parse_prereq_upload(file_storage)
+    summary = {"rows": len(edges) + len(errors), "applied": False, "errors": errors[:MAX_REPORTED], "error_count": len(errors)}
+    if errors:
+        return summary
+    if edges != read_prerequisites():
+        write_prerequisites(edges)
+    summary["applied"] = True
+    return summary
+
+
+def parse_history_upload(file_storage):
+    """Parse an uploaded course history CSV (student_id, course_code[, passed])."""
+    stream = io.TextIOWrapper(file_storage.stream, encoding="utf-8-sig")
+    rows = []
+    for row in csv.DictReader(stream):
+        passed_raw = (row.get("passed", "") or "").strip()
+        rows.append(
+            {
+                "student_id": (row.get("student_id", "") or "").strip(),
+                "course_code": (row.get("course_code", "") or "").strip(),
+                "passed": _boolish(passed_raw) if passed_raw else True,
+            }
+        )
+    return rows
+
+
+def import_course_history(rows, replace: bool = True):
+    """
+    Import student course history rows ({student_id, course_code, passed}).
+    replace=True swaps the whole history of every student present in the upload;
+    students not in the upload keep their existing history.
+    Only students whose passed-course set actually changed are re-evaluated.
+    """
+    current = read_course_history()
+    incoming = [r for r in rows if r.get("student_id") and r.get("course_code")]
+    incoming_ids = {r["student_id"] for r in incoming}
+
+    if replace:
+        merged = [r for r in current if r["student_id"] not in incoming_ids] + incoming
+    else:
+        seen = {(r["student_id"], r["course_code"]) for r in incoming}
+        merged = [r for r in current if (r["student_id"], r["course_code"]) not in seen] + incoming
+
+    with _lock:
+        _refresh_locked()
+        write_course_history(merged)
+        changed = _apply_history_locked(_history_by_student(merged))
+        _state["history_sig"] = table_versions("course_history")["course_history"]
+
+    return {"rows": len(incoming), "students_in_upload": len(incoming_ids), "students_changed": len(changed)}
@@ -0,0 +1,210 @@
+import re
+import sys
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+
+_intern = sys.intern
+
+CODE_RE = re.compile(r"\(([^()]+)\)\s*$")
+
+
+@lru_cache(maxsize=4096)
+def course_code_of(value: str) -> str:
+    """Canonical course code for a schedule entry: "English I (ENG9)" -> "ENG9"; a bare code is returned as is."""
+    s = (value or "").strip()
+    m = CODE_RE.search(s)
+    return _intern(m.group(1).strip() if m else s)
+
+
+class Record:
+    """
+    Base for the slotted row types returned by app.storage.read_*.
+    Rows keep the dict interface the routes already use (row["key"], .get,
+    "key" in row, row["extra"] = ..., dict(row)), so JSON output is unchanged.
+    Keys that are not fields (e.g. "seats_taken" added by a route) go to a
+    small per-row dict that is only allocated when used.
+    """
+
+    __slots__ = ("_extra",)
+    _FIELDS = ()
+
+    def __post_init__(self):
+        self._extra = None
+
+    @classmethod
+    def _field_names(cls):
+        if "_FIELDSET" not in cls.__dict__:
+            cls._FIELDS = tuple(f.name for f in fields(cls))
+            cls._FIELDSET = frozenset(cls._FIELDS)
+        return cls._FIELDSET
+
+    @classmethod
+    def from_dict(cls, d):
+        names = cls._field_names()
+        rec = cls(**{k: v for k, v in d.items() if k in names})
+        for k, v in d.items():
+            if k not in names:
+                rec[k] = v
+        return rec
+
+    def __getitem__(self, key):
+        if key in self._field_names():
+            return getattr(self, key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self._field_names():
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if self._extra is None or key not in self._extra:
+            raise KeyError(key)
+        del self._extra[key]
+
+    def __contains__(self, key):
+        return key in self._field_names() or (self._extra is not None and key in self._extra)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self._field_names()) + (len(self._extra) if self._extra else 0)
+
+    def __eq__(self, other):
+        if type(other) is type(self):
+            # field by field: no dicts built (write-behind diffs compare whole tables)
+            self._field_names()
+            return all(getattr(self, n) == getattr(other, n) for n in self._FIELDS) and (self._extra or None) == (
+                other._extra or None
+            )
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, other=(), **kw):
+        for k, v in dict(other, **kw).items():
+            self[k] = v
+
+    def keys(self):
+        self._field_names()
+        return list(self._FIELDS) + (list(self._extra) if self._extra else [])
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def values(self):
+        return [self[k] for k in self.keys()]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def copy(self):
+        """
+        Independent copy without going back through the dict interface: list fields and
+        extra keys are copied, the other field values are immutable and shared.
+        """
+        cls = type(self)
+        cls._field_names()
+        new = object.__new__(cls)
+        for name in cls._FIELDS:
+            value = getattr(self, name)
+            setattr(new, name, value[:] if type(value) is list else value)
+        new._extra = dict(self._extra) if self._extra else None
+        return new
+
+
+@dataclass(slots=True, eq=False)
+class Student(Record):
+    student_id: str = ""
+    student_name: str = ""
+    grade_level: str = ""
+
+    def __post_init__(self):
+        self._extra = None
+        self.grade_level = _intern(self.grade_level)
+
+
+@dataclass(slots=True, eq=False)
+class Course(Record):
+    course_code: str = ""
+    course_name: str = ""
+    subject_area: str = ""
+    level: str = ""
+    description: str = ""
+    teacher_name: str = ""
+    teacher_email: str = ""
+    room: str = ""
+    grade_min: str = ""
+    grade_max: str = ""
+    requires_approval: bool = False
+    prerequisites: str = ""
+    capacity: str = ""
+
+    def __post_init__(self):
+        self._extra = None
+        self.course_code = _intern(self.course_code)
+        self.subject_area = _intern(self.subject_area)
+        self.level = _intern(self.level)
+        self.teacher_email = _intern(self.teacher_email)
+        self.grade_min = _intern(self.grade_min)
+        self.grade_max = _intern(self.grade_max)
+
+
+@dataclass(slots=True, eq=False)
+class Schedule(Record):
+    student_id: str = ""
+    student_name: str = ""
+    grade_level: str = ""
+    academic_courses: list = field(default_factory=list)
+    elective_courses: list = field(default_factory=list)
+    special_instructions: str = ""
+    reviewed: bool = False
+
+    def __post_init__(self):
+        self._extra = None
+        self.grade_level = _intern(self.grade_level)
+        # schedules hold course codes; rows written before codes were stored
+        # still carry "Name (CODE)" display strings and are normalized here
+        self.academic_courses = [course_code_of(x) for x in self.academic_courses if x]
+        self.elective_courses = [course_code_of(x) for x in self.elective_courses if x]
+
+
+@dataclass(slots=True, eq=False)
+class Approval(Record):
+    student_id: str = ""
+    course_code: str = ""
+    status: str = ""
+    teacher_email: str = ""
+    updated_at: str = ""
+    note: str = ""
+
+    def __post_init__(self):
+        self._extra = None
+        self.student_id = _intern(self.student_id)
+        self.course_code = _intern(self.course_code)
+        self.status = _intern(self.status)
+        self.teacher_email = _intern(self.teacher_email)
+
+
+def plain(obj):
+    """json.dumps default= hook: records serialize as the dicts they replace."""
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,38 @@
+import mimetypes
+import os
+
+from flask import Blueprint, request, send_from_directory, abort
+from werkzeug.security import safe_join
+
+from config import ASSETS_DIST_DIR, ASSET_MAX_AGE
+
+bp_assets = Blueprint("assets", __name__)
+
+# preferred first; each is served only when its precompressed file exists
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+@bp_assets.get("/static/dist/<path:filename>")
+def dist_asset(filename):
+    """
+    Fingerprinted build of a static asset. The name changes whenever the content
+    does, so responses are immutable; the .br or .gz variant is sent when accepted.
+    """
+    root = os.path.abspath(ASSETS_DIST_DIR)
+    path = safe_join(root, filename)
+    if path is None or filename.endswith((".br", ".gz")) or not os.path.isfile(path):
+        abort(404)
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    served, encoding = filename, None
+    for enc, suffix in ENCODINGS:
+        if request.accept_encodings[enc] and os.path.isfile(path + suffix):
+            served, encoding = filename + suffix, enc
+            break
+
+    resp = send_from_directory(root, served, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+    if encoding:
+        resp.headers["Content-Encoding"] = encoding
+    resp.headers["Vary"] = "Accept-Encoding"
+    resp.headers["Cache-Control"] = f"public, max-age={ASSET_MAX_AGE}, immutable"
+    return resp
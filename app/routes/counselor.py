@@ -14,10 +14,9 @@ from app.storage import (
     read_schedules,
     read_approvals,
     write_approvals,
-    STUDENTS_CSV,
-    COURSES_CSV,
-    TEACHERS_CSV,
     _boolish,
+    schedule_history,
+    table_versions,
 )
 from app.logic import (
     approval_counts_for_student,
@@ -30,14 +29,48 @@ from app.logic import (
     extract_course_code,
     ensure_approval_rows_for_schedule,
     course_by_code_map,
+    course_display,
     mark_schedule_reviewed,
     get_student_list_with_filters,
     get_next_student_id,
     get_previous_student_id,
+    rejected_codes_for_student,
+    apply_bulk_operations,
+)
+from app.audit import audit_all_schedules
+from app.httpcache import data_etag, client_has, not_modified, cached_json
+from app.jsonstream import cached_rows, stream_json
+from app.simulate import start_simulation, load_simulation, list_simulations, live_comparison, change_error, apply_changes
+from app.prereqs import parse_history_upload, import_course_history, import_prerequisites
+from app.imports import import_table_delta
+from app.snapshots import take_snapshot, list_snapshots, list_failed_snapshots
+from app.indexes import filter_student_ids
+from app.catalog import catalog_payload, catalog_state, offered_to_grade
+from app.seats import (
+    course_capacity,
+    sync_student_seats,
+    drop_course_seats,
+    request_priorities,
+    promote_waitlists,
+    waitlist_for_course,
 )
 
 bp_counselor = Blueprint("counselor", __name__)
 
+# column order of /api/counselor/students?format=rows (academic_preview is the first two courses)
+STUDENT_ROW_FIELDS = (
+    "student_id",
+    "student_name",
+    "grade_level",
+    "academic_preview",
+    "academic_count",
+    "top_elective",
+    "scheduled",
+    "reviewed",
+    "pending_approvals",
+    "rejected_approvals",
+)
+
 
 @bp_counselor.post("/api/counselor/login")
 def counselor_login():
@@ -58,12 +91,15 @@ def counselor_logout():
 @bp_counselor.route("/api/counselor/settings", methods=["GET", "POST"])
 def counselor_settings():
     if request.method == "GET":
+        tag = data_etag(("settings",))
+        if client_has(tag):
+            return not_modified(tag)
         st = read_settings()
         if "grade_submission_lock" not in st or not isinstance(st["grade_submission_lock"], dict):
             st["grade_submission_lock"] = {"9": True, "10": True, "11": True, "12": True}
         if "subject_colors" not in st or not isinstance(st["subject_colors"], dict):
             st["subject_colors"] = DEFAULT_SUBJECT_COLORS.copy()
-        return jsonify(st)
+        return cached_json(st, tag)
 
     if not is_counselor():
         return jsonify({"error": "not_authorized"}), 403
@@ -93,14 +129,23 @@ def counselor_upload_csv():
     if not is_counselor():
         return jsonify({"error": "not_authorized"}), 403
 
-    if "studentsCsv" in request.files:
-        request.files["studentsCsv"].save(STUDENTS_CSV)
-    if "coursesCsv" in request.files:
-        request.files["coursesCsv"].save(COURSES_CSV)
-    if "teachersCsv" in request.files:
-        request.files["teachersCsv"].save(TEACHERS_CSV)
+    # rows missing from the file are removed (a full SIS export) unless remove_missing=0
+    remove_missing = (request.form.get("remove_missing", "1") or "1").lower() not in ("0", "false", "no")
 
-    return jsonify({"ok": True})
+    out = {"ok": True}
+    for field, table in (("studentsCsv", "students"), ("coursesCsv", "courses"), ("teachersCsv", "teachers")):
+        if field in request.files:
+            out[table] = import_table_delta(table, request.files[field], remove_missing)
+
+    if "prerequisitesCsv" in request.files:
+        # validated like the tables above; the file is replaced only when every row is valid
+        out["prerequisites"] = import_prerequisites(request.files["prerequisitesCsv"])
+
+    if "historyCsv" in request.files:
+        # merged per student so only changed students lose their eligibility cache
+        out["history"] = import_course_history(parse_history_upload(request.files["historyCsv"]))
+
+    return jsonify(out)
 
 
 @bp_counselor.post("/api/counselor/append_student")
@@ -140,6 +185,8 @@ def counselor_append_course():
         "grade_min": (data.get("grade_min", "") or "").strip(),
         "grade_max": (data.get("grade_max", "") or "").strip(),
         "requires_approval": _boolish(data.get("requires_approval", False)),
+        "prerequisites": (data.get("prerequisites", "") or "").strip(),
+        "capacity": str(data.get("capacity", "") or "").strip(),
     }
 
     if (not row["course_code"]) or (not row["course_name"]):
@@ -187,6 +234,8 @@ def counselor_delete_course():
     appr = [a for a in appr if a["course_code"] != code]
     write_approvals(appr)
 
+    drop_course_seats(code)
+
     return jsonify({"ok": True})
 
 
@@ -220,6 +269,8 @@ def counselor_update_course():
                     "grade_min": (data.get("grade_min", c["grade_min"]) or "").strip(),
                     "grade_max": (data.get("grade_max", c["grade_max"]) or "").strip(),
                     "requires_approval": _boolish(data.get("requires_approval", c.get("requires_approval", False))),
+                    "prerequisites": (data.get("prerequisites", c.get("prerequisites", "")) or "").strip(),
+                    "capacity": str(data.get("capacity", c.get("capacity", "")) or "").strip(),
                 }
             )
         else:
@@ -229,6 +280,9 @@ def counselor_update_course():
         return jsonify({"error": "not_found"}), 404
 
     write_courses(updated_list)
+
+    # a raised capacity frees seats for waitlisted students
+    promote_waitlists([code])
     return jsonify({"ok": True})
 
 
@@ -240,13 +294,21 @@ def counselor_students():
       - per_page (int or 'all') default 50
     Filtering is unchanged (q_name, grade, course).
     Response includes: { total, page, per_page, students: [...] }
+    With format=rows the students come back as compact arrays instead:
+    { total, page, per_page, fields: [...], rows: [[...], ...] } (see STUDENT_ROW_FIELDS).
+    Either way the body is streamed: header fields first, then the rows as they are built.
     """
     if not is_counselor():
         return jsonify({"error": "not_authorized"}), 403
 
+    tag = data_etag(("students", "schedules", "approvals", "courses"))
+    if client_has(tag):
+        return not_modified(tag)
+
     q_name = (request.args.get("q_name", "") or "").strip().lower()
     q_grade = (request.args.get("grade", "") or "").strip()
     q_course = (request.args.get("course", "") or "").strip().lower()
+    compact = (request.args.get("format", "") or "").strip().lower() == "rows"
 
     # pagination params
     page_raw = request.args.get("page", "1")
@@ -271,71 +333,90 @@ def counselor_students():
             per_page = 50
 
     studs = read_students()
-    sched_map = {s["student_id"]: s for s in read_schedules()}
+    if q_name or q_grade or q_course:
+        # resolve the filters from the index first so counts are only computed for matches
+        wanted = set(filter_student_ids(q_name, q_grade, q_course))
+        studs = [s for s in studs if s["student_id"] in wanted]
+    total = len(studs)
 
-    out = []
-    for stu in studs:
-        sid = stu["student_id"]
-        sched = sched_map.get(sid)
+    # apply pagination
+    if per_page == "all":
+        per_page_val = "all"
+        page = 1
+    else:
+        per_page_val = int(per_page)
+        start = (page - 1) * per_page_val
+        studs = studs[start : start + per_page_val]
+
+    sched_map = {s["student_id"]: s for s in read_schedules()}
+    course_map = course_by_code_map()
+    appr_by_student = {}
+    for a in read_approvals():
+        appr_by_student.setdefault(a["student_id"], {})[a["course_code"]] = a
+    courses_version = table_versions("courses")["courses"]
 
+    def row(stu, sched, appr_map):
         academic = []
         elective = []
         notes = ""
         if sched:
-            academic = sched["academic_courses"]
-            elective = sched["elective_courses"]
+            academic = [course_display(c, course_map) for c in sched["academic_courses"]]
+            elective = [course_display(c, course_map) for c in sched["elective_courses"]]
             notes = sched.get("special_instructions", "")
 
-        top_elective = elective[0] if elective else ""
-        saved = bool(sched)
-        reviewed = sched.get("reviewed", False) if sched else False
-
         pending_cnt = 0
         rejected_cnt = 0
         if sched:
-            pending_cnt, rejected_cnt = approval_counts_for_student(sid, sched)
-
-        out.append(
-            {
-                "student_id": sid,
-                "student_name": stu["student_name"],
-                "grade_level": stu["grade_level"],
-                "academic_courses": academic,
-                "top_elective": top_elective,
-                "scheduled": saved,
-                "reviewed": reviewed,
-                "pending_approvals": pending_cnt,
-                "rejected_approvals": rejected_cnt,
-                "special_instructions": notes,
-            }
-        )
-
-    if q_name:
-        out = [r for r in out if q_name in r["student_name"].lower()]
-    if q_grade:
-        out = [r for r in out if r["grade_level"] == q_grade]
-    if q_course:
-        tmp = []
-        for r in out:
-            hay = " ".join(r["academic_courses"] + [r["top_elective"]]).lower()
-            if q_course in hay:
-                tmp.append(r)
-        out = tmp
-
-    total = len(out)
+            pending_cnt, rejected_cnt = approval_counts_for_student(stu["student_id"], sched, course_map, appr_map)
+
+        if compact:
+            return [
+                stu["student_id"],
+                stu["student_name"],
+                stu["grade_level"],
+                academic[:2],
+                len(academic),
+                elective[0] if elective else "",
+                int(bool(sched)),
+                int(bool(sched and sched.get("reviewed", False))),
+                pending_cnt,
+                rejected_cnt,
+            ]
+        return {
+            "student_id": stu["student_id"],
+            "student_name": stu["student_name"],
+            "grade_level": stu["grade_level"],
+            "academic_courses": academic,
+            "top_elective": elective[0] if elective else "",
+            "scheduled": bool(sched),
+            "reviewed": sched.get("reviewed", False) if sched else False,
+            "pending_approvals": pending_cnt,
+            "rejected_approvals": rejected_cnt,
+            "special_instructions": notes,
+        }
 
-    # apply pagination
-    if per_page == "all":
-        students_page = out
-        per_page_val = "all"
-        page = 1
-    else:
-        per_page_val = int(per_page)
-        start = (page - 1) * per_page_val
-        end = start + per_page_val
-        students_page = out[start:end]
+    def rows():
+        for stu in studs:
+            sid = stu["student_id"]
+            sched = sched_map.get(sid)
+            appr_map = appr_by_student.get(sid, {})
+            # everything the row is built from; unchanged rows reuse their serialized JSON
+            signature = (
+                courses_version,
+                stu["student_name"],
+                stu["grade_level"],
+                (tuple(sched["academic_courses"]), tuple(sched["elective_courses"]), sched.get("special_instructions", ""), sched.get("reviewed", False))
+                if sched
+                else None,
+                tuple(sorted((code, a["status"]) for code, a in appr_map.items())),
+            )
+            yield sid, signature, lambda stu=stu, sched=sched, appr_map=appr_map: row(stu, sched, appr_map)
 
-    return jsonify({"total": total, "page": page, "per_page": per_page_val, "students": students_page})
+    head = {"total": total, "page": page, "per_page": per_page_val}
+    if compact:
+        head["fields"] = STUDENT_ROW_FIELDS
+        return stream_json(head, "rows", cached_rows("students.rows", rows()), tag)
+    return stream_json(head, "students", cached_rows("students", rows()), tag)
 
 
 @bp_counselor.get("/api/counselor/pending_approvals")
@@ -343,30 +424,156 @@ def counselor_pending_approvals():
     if not is_counselor():
         return jsonify({"error": "not_authorized"}), 403
 
+    tag = data_etag(("approvals", "students", "courses"))
+    if client_has(tag):
+        return not_modified(tag)
+
     course_map = course_by_code_map()
     approvals = read_approvals()
     pending = [a for a in approvals if (a.get("status", "") or "").lower() == "pending"]
 
     stu_map = {s["student_id"]: s for s in read_students()}
 
-    out = []
-    for a in pending:
+    def shown(a):
         stu = stu_map.get(a["student_id"], {})
         course = course_map.get(a["course_code"], {})
-        out.append(
-            {
-                "student_id": a["student_id"],
-                "student_name": stu.get("student_name", ""),
-                "grade_level": stu.get("grade_level", ""),
-                "course_code": a["course_code"],
-                "course_name": course.get("course_name", ""),
-                "teacher_email": a.get("teacher_email", ""),
-                "updated_at": a.get("updated_at", ""),
-            }
-        )
-
-    out.sort(key=lambda x: ((x["course_name"] or "").lower(), (x["student_name"] or "").lower()))
-    return jsonify({"pending": out, "total": len(out)})
+        return {
+            "student_id": a["student_id"],
+            "student_name": stu.get("student_name", ""),
+            "grade_level": stu.get("grade_level", ""),
+            "course_code": a["course_code"],
+            "course_name": course.get("course_name", ""),
+            "teacher_email": a.get("teacher_email", ""),
+            "updated_at": a.get("updated_at", ""),
+        }
+
+    def sort_key(a):
+        course = course_map.get(a["course_code"], {})
+        stu = stu_map.get(a["student_id"], {})
+        return ((course.get("course_name", "") or "").lower(), (stu.get("student_name", "") or "").lower())
+
+    pending.sort(key=sort_key)
+
+    def rows():
+        for a in pending:
+            stu = stu_map.get(a["student_id"], {})
+            course = course_map.get(a["course_code"], {})
+            signature = (
+                stu.get("student_name", ""),
+                stu.get("grade_level", ""),
+                course.get("course_name", ""),
+                a.get("teacher_email", ""),
+                a.get("updated_at", ""),
+            )
+            yield (a["student_id"], a["course_code"]), signature, lambda a=a: shown(a)
+
+    return stream_json({"total": len(pending)}, "pending", cached_rows("pending_approvals", rows()), tag)
+
+
+@bp_counselor.get("/api/counselor/waitlist")
+def counselor_waitlist():
+    if not is_counselor():
+        return jsonify({"error": "not_authorized"}), 403
+
+    code = (request.args.get("course_code", "") or "").strip()
+    if not code:
+        return jsonify({"error": "missing_code"}), 400
+
+    stu_map = {s["student_id"]: s for s in read_students()}
+    entries = waitlist_for_course(code)
+    for e in entries:
+        stu = stu_map.get(e["student_id"], {})
+        e["student_name"] = stu.get("student_name", "")
+        e["grade_level"] = stu.get("grade_level", "")
+    return jsonify({"course_code": code, "waitlist": entries, "total": len(entries)})
+
+
+@bp_counselor.get("/api/counselor/audit")
+def counselor_audit():
+    """
+    Audit all saved schedules in one pass.
+    Response: { generated_at, schedules_checked, students_with_issues, issue_counts, students: [...] }
+    """
+    if not is_counselor():
+        return jsonify({"error": "not_authorized"}), 403
+
+    return jsonify(audit_all_schedules())
+
+
+@bp_counselor.route("/api/counselor/simulations", methods=["GET", "POST"])
+def counselor_simulations():
+    """
+    GET  -> { simulations: [...] } (newest first)
+    POST -> { name: "...", changes: [ {op: "add_section", course_code: "BIO", seats: 24},
+                                      {op: "set_capacity", course_code: "ALG1", capacity: 60} ] }
+    Runs against a snapshot in a worker process and never touches live data.
+    """
+    if not is_counselor():
+        return jsonify({"error": "not_authorized"}), 403
+
+    if request.method == "GET":
+        return jsonify({"simulations": list_simulations()})
+
+    data = request.json or {}
+    changes = data.get("changes") or []
+    if not isinstance(changes, list) or not changes:
+        return jsonify({"error": "missing_changes"}), 400
+    capacities = {c["course_code"]: course_capacity(c) for c in read_courses() if c["course_code"]}
+    for ch in changes:
+        reason = change_error(ch, capacities)
+        if reason:
+            return jsonify({"error": "bad_change", "change": ch, "reason": reason}), 400
+        capacities = apply_changes(capacities, [ch])
+
+    sim_id = start_simulation((data.get("name", "") or "").strip(), changes)
+    return jsonify({"ok": True, "id": sim_id}), 202
+
+
+@bp_counselor.get("/api/counselor/simulations/<sim_id>")
+def counselor_simulation_result(sim_id):
+    if not is_counselor():
+        return jsonify({"error": "not_authorized"}), 403
+
+    rec = load_simulation(sim_id)
+    if not rec:
+        return jsonify({"error": "not_found"}), 404
+
+    if rec.get("result"):
+        # live numbers are read now, so the comparison always reflects current seats
+        live = live_comparison()
+        for row in rec["result"]["courses"]:
+            row["live"] = live.get(row["course_code"], {"capacity": None, "enrolled": 0, "waitlisted": 0})
+    return jsonify(rec)
+
+
+@bp_counselor.get("/api/counselor/schedule_history")
+def counselor_schedule_history():
+    if not is_counselor():
+        return jsonify({"error": "not_authorized"}), 403
+
+    sid = (request.args.get("student_id", "") or "").strip()
+    if not sid:
+        return jsonify({"error": "missing_id"}), 400
+    return jsonify({"student_id": sid, "changes": schedule_history(sid)})
+
+
+@bp_counselor.get("/api/counselor/snapshots")
+def counselor_list_snapshots():
+    if not is_counselor():
+        return jsonify({"error": "not_authorized"}), 403
+    return jsonify({"snapshots": list_snapshots(), "failed": list_failed_snapshots()})
+
+
+@bp_counselor.post("/api/counselor/snapshots")
+def counselor_take_snapshot():
+    """Capture now; the archive is compressed and written in the background. Restore is CLI only."""
+    if not is_counselor():
+        return jsonify({"error": "not_authorized"}), 403
+    try:
+        name = take_snapshot()
+    except RuntimeError as e:
+        return jsonify({"error": "snapshot_busy", "detail": str(e)}), 503
+    return jsonify({"ok": True, "name": name}), 202
 
 
 @bp_counselor.get("/api/counselor/get_schedule")
@@ -391,15 +598,74 @@ def counselor_get_schedule():
             "reviewed": False,
         }
 
-    selected_codes = [extract_course_code(x) for x in sched["academic_courses"]] + [
-        extract_course_code(x) for x in sched["elective_courses"]
-    ]
+    selected_codes = list(sched["academic_courses"]) + list(sched["elective_courses"])
     ensure_approval_rows_for_schedule(sid, selected_codes)
 
     academic_items, elective_items = schedule_items_for_student(sid, sched)
     return jsonify({"schedule": sched, "schedule_items": {"academic": academic_items, "elective": elective_items}})
 
 
+@bp_counselor.get("/api/counselor/edit_payload")
+def counselor_edit_payload():
+    """
+    Everything the edit modal needs in one cacheable GET:
+      ?student_id=...&q_name=&grade=&course= (the list filters, for prev/next)
+      &catalog=<version the client has cached>
+    Response: { schedule, schedule_items, eligible_courses: [codes offered to the student's grade],
+                catalog_state, catalog (only when the client's version is stale),
+                previous_student_id, next_student_id }
+    Read-only: approval rows are reconciled when schedules are saved, not when they are opened.
+    """
+    if not is_counselor():
+        return jsonify({"error": "not_authorized"}), 403
+
+    sid = (request.args.get("student_id", "") or "").strip()
+    tag = data_etag(("students", "schedules", "approvals", "courses", "seats"))
+    if client_has(tag):
+        return not_modified(tag)
+
+    stu = get_student_by_id(sid)
+    if not stu:
+        return jsonify({"error": "no_student"}), 404
+
+    sched = get_schedule_for_student(sid)
+    if not sched:
+        sched = {
+            "student_id": stu["student_id"],
+            "student_name": stu["student_name"],
+            "grade_level": stu["grade_level"],
+            "academic_courses": [],
+            "elective_courses": [],
+            "special_instructions": "",
+            "reviewed": False,
+        }
+    academic_items, elective_items = schedule_items_for_student(sid, sched)
+
+    ids = filter_student_ids(request.args.get("q_name", ""), request.args.get("grade", ""), request.args.get("course", ""))
+    try:
+        i = ids.index(sid)
+    except ValueError:
+        prev_id = next_id = None
+    else:
+        prev_id = ids[i - 1] if i > 0 else None
+        next_id = ids[i + 1] if i + 1 < len(ids) else None
+
+    state = catalog_state()
+    have = (request.args.get("catalog", "") or "").strip()
+    return cached_json(
+        {
+            "schedule": sched,
+            "schedule_items": {"academic": academic_items, "elective": elective_items},
+            "eligible_courses": [c["course_code"] for c in read_courses() if offered_to_grade(c, stu["grade_level"])],
+            "catalog_state": state,
+            "catalog": catalog_payload() if state["version"] != have else None,
+            "previous_student_id": prev_id,
+            "next_student_id": next_id,
+        },
+        tag,
+    )
+
+
 @bp_counselor.post("/api/counselor/save_schedule")
 def counselor_save_schedule():
     if not is_counselor():
@@ -421,9 +687,18 @@ def counselor_save_schedule():
     if len(elective_list) > MAX_ELECTIVE_CHOICES:
         return jsonify({"error": "too_many_electives"}), 400
 
+    selected_codes = [extract_course_code(x) for x in academic_list] + [extract_course_code(x) for x in elective_list]
+
+    # counselors may over-enroll; seats are still counted
+    sync_student_seats(
+        sid,
+        selected_codes,
+        force=True,
+        priorities=request_priorities(selected_codes[: len(academic_list)], selected_codes[len(academic_list) :]),
+        exclude=rejected_codes_for_student(sid),
+    )
     upsert_schedule(sid, name, grade, academic_list, elective_list, notes)
 
-    selected_codes = [extract_course_code(x) for x in academic_list] + [extract_course_code(x) for x in elective_list]
     ensure_approval_rows_for_schedule(sid, selected_codes)
 
     return jsonify({"ok": True})
@@ -440,11 +715,6 @@ def counselor_reset_schedule():
         return jsonify({"error": "missing_id"}), 400
 
     reset_student_schedule(sid)
-
-    appr = read_approvals()
-    appr = [a for a in appr if a["student_id"] != sid]
-    write_approvals(appr)
-
     return jsonify({"ok": True})
 
 
@@ -478,6 +748,30 @@ def counselor_sign_off_schedule():
     return jsonify({"ok": True})
 
 
+@bp_counselor.post("/api/counselor/bulk")
+def counselor_bulk():
+    """
+    Body: {"operations": [{"action": "sign_off"|"unsign"|"reset"|"delete", "student_id": "..."}, ...]}
+    or {"action": "...", "student_ids": [...]} for one action over many students.
+    Each affected CSV is written once for the whole batch.
+    """
+    if not is_counselor():
+        return jsonify({"error": "not_authorized"}), 403
+
+    data = request.json or {}
+    ops = data.get("operations")
+    if ops is None and isinstance(data.get("student_ids"), list):
+        ops = [{"action": data.get("action", ""), "student_id": sid} for sid in data["student_ids"]]
+    if not isinstance(ops, list) or not ops:
+        return jsonify({"error": "missing_operations"}), 400
+    if not all(isinstance(op, dict) for op in ops):
+        return jsonify({"error": "bad_operations"}), 400
+
+    results = apply_bulk_operations(ops)
+    done = sum(1 for r in results if r["ok"])
+    return jsonify({"ok": True, "applied": done, "failed": len(results) - done, "results": results})
+
+
 @bp_counselor.post("/api/counselor/get_next_student")
 def counselor_get_next_student():
     if not is_counselor():
@@ -523,4 +817,4 @@ def counselor_get_previous_student():
     if prev_id:
         return jsonify({"ok": True, "previous_student_id": prev_id})
     else:
-        return jsonify({"ok": False, "message": "No previous student"})
\ No newline at end of file
+        return jsonify({"ok": False, "message": "No previous student"})
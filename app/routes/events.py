@@ -0,0 +1,53 @@
+from flask import Blueprint, Response, jsonify, request, session
+
+from app.auth import is_counselor, is_teacher
+from app.events import latest_event_id, sse_stream
+from app.storage import read_courses, table_versions
+
+bp_events = Blueprint("events", __name__)
+
+
+@bp_events.get("/api/events")
+def api_events():
+    """
+    Server-Sent Events for teacher and counselor dashboards: approval and schedule changes,
+    and seat events for waitlisted students promoted into a freed seat.
+    Streams end every few minutes; the browser reconnects and the session is checked again here.
+    """
+    if is_counselor():
+        accept = None
+    elif is_teacher():
+        teacher_email = (session.get("teacher_email") or "").lower()
+        mine = {"version": None, "codes": frozenset()}
+
+        def my_codes():
+            # courses can be reassigned while the stream is open
+            version = table_versions("courses")["courses"]
+            if version != mine["version"]:
+                mine["codes"] = frozenset(
+                    c["course_code"] for c in read_courses() if (c.get("teacher_email", "") or "").lower() == teacher_email
+                )
+                mine["version"] = version
+            return mine["codes"]
+
+        def accept(kind, payload):
+            if kind in ("approval", "seat"):
+                return payload.get("course_code") in my_codes()
+            # removed_codes: a student who dropped one of this teacher's courses leaves their roster
+            touched = set(payload.get("course_codes") or ()) | set(payload.get("removed_codes") or ())
+            return bool(my_codes() & touched)
+
+    else:
+        return jsonify({"error": "not_authorized"}), 403
+
+    # a reconnecting browser resumes after the last event it saw
+    try:
+        last_id = int(request.headers.get("Last-Event-ID", "") or request.args.get("since", ""))
+    except ValueError:
+        last_id = latest_event_id()
+
+    return Response(
+        sse_stream(last_id, accept),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
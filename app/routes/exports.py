@@ -4,7 +4,8 @@ from io import StringIO
 from flask import Blueprint, request, Response
 
 from app.auth import is_counselor
-from app.storage import read_students, read_schedules
+from app.logic import course_display
+from app.storage import read_courses, read_students, read_schedules
 from config import MAX_ACADEMIC_COURSES, MAX_ELECTIVE_CHOICES
 
 bp_exports = Blueprint("exports", __name__)
@@ -21,6 +22,7 @@ def counselor_export_filtered():
 
     studs = read_students()
     sched_map = {s["student_id"]: s for s in read_schedules()}
+    course_map = {c["course_code"]: c for c in read_courses()}
 
     rows = []
     for stu in studs:
@@ -30,8 +32,8 @@ def counselor_export_filtered():
         electives = []
         notes = ""
         if sch:
-            academic = sch["academic_courses"]
-            electives = sch["elective_courses"]
+            academic = [course_display(c, course_map) for c in sch["academic_courses"]]
+            electives = [course_display(c, course_map) for c in sch["elective_courses"]]
             notes = sch.get("special_instructions", "")
 
         rows.append(
@@ -98,6 +100,7 @@ def counselor_export_all_schedules():
         return Response("not authorized", status=403)
 
     scheds = read_schedules()
+    course_map = {c["course_code"]: c for c in read_courses()}
     sio = StringIO()
 
     header = ["student_id", "student_name", "grade_level"]
@@ -112,9 +115,9 @@ def counselor_export_all_schedules():
     for s in scheds:
         row = [s["student_id"], s["student_name"], s["grade_level"]]
         for i in range(MAX_ACADEMIC_COURSES):
-            row.append(s["academic_courses"][i] if i < len(s["academic_courses"]) else "")
+            row.append(course_display(s["academic_courses"][i], course_map) if i < len(s["academic_courses"]) else "")
         for j in range(MAX_ELECTIVE_CHOICES):
-            row.append(s["elective_courses"][j] if j < len(s["elective_courses"]) else "")
+            row.append(course_display(s["elective_courses"][j], course_map) if j < len(s["elective_courses"]) else "")
         row.append(s.get("special_instructions", ""))
         w.writerow(row)
 
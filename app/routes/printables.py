@@ -2,15 +2,18 @@ from datetime import datetime
 from io import BytesIO
 
 from flask import Blueprint, session, request, Response
-from app.auth import is_counselor, is_student
+from markupsafe import escape
+
+from app.auth import is_counselor, is_student, is_teacher
 from app.logic import (
+    course_by_code_map,
     get_student_by_id,
     get_schedule_for_student,
-    extract_course_code,
     ensure_approval_rows_for_schedule,
     schedule_items_for_student,
 )
-from app.storage import read_schedules, read_students
+from app.storage import read_courses, read_schedules, read_students
+from app.indexes import filter_student_ids, course_roster, roster_fingerprints
 
 # Optional PDF generation: weasyprint is preferred for HTML->PDF.
 # If not installed, the endpoint will return 501 with a helpful message.
@@ -40,15 +43,15 @@ def build_schedule_card_html_for_student(student_id):
             "special_instructions": "",
         }
 
-    selected_codes = [extract_course_code(x) for x in sched["academic_courses"]] + [
-        extract_course_code(x) for x in sched["elective_courses"]
-    ]
+    selected_codes = list(sched["academic_courses"]) + list(sched["elective_courses"])
     ensure_approval_rows_for_schedule(student_id, selected_codes)
 
     academic_items, elective_items = schedule_items_for_student(student_id, sched)
     now = datetime.now().strftime("%Y-%m-%d %H:%M")
 
     def badge(item):
+        if item.get("seat_status") == "waitlisted":
+            return f" <span style='font-weight:700;color:#a16207;'>[WAITLIST #{item.get('waitlist_position', 0)}]</span>"
         if not item["requires_approval"]:
             return ""
         st = (item["approval_status"] or "pending").lower()
@@ -141,6 +144,9 @@ def schedule_cards_pdf():
       { "student_ids": ["id1", "id2", ...] }
     OR
       { "all": true }  -> include all students (in students.csv)
+    OR
+      { "q_name": "...", "grade": "...", "course": "..." }  -> the students the counselor
+      list shows for those filters, resolved server-side from the student index
     Response: application/pdf (single PDF containing one card per student)
     Requires weasyprint installed. If unavailable returns 501.
     Only accessible to counselors.
@@ -165,6 +171,8 @@ def schedule_cards_pdf():
         ids = [s["student_id"] for s in students]
     elif isinstance(student_ids, list):
         ids = [str(x) for x in student_ids if x]
+    elif any(k in data for k in ("q_name", "grade", "course")):
+        ids = filter_student_ids(data.get("q_name", ""), data.get("grade", ""), data.get("course", ""))
     else:
         return "No student_ids provided", 400
 
@@ -215,4 +223,146 @@ def schedule_cards_pdf():
         return f"Failed to generate PDF: {e}", 500
 
     # Return PDF response for download
-    return Response(pdf_bytes, mimetype="application/pdf", headers={"Content-Disposition": "attachment; filename=schedule_cards.pdf"})
\ No newline at end of file
+    return Response(pdf_bytes, mimetype="application/pdf", headers={"Content-Disposition": "attachment; filename=schedule_cards.pdf"})
+
+ROSTER_CSS = """
+    body{font-family:sans-serif;color:#000;background:#fff;padding:24px;}
+    .roster{max-width:760px;margin:0 auto 18px auto;}
+    .hdr{display:flex;justify-content:space-between;align-items:flex-start;border-bottom:2px solid #000;padding-bottom:6px;}
+    .coursename{font-size:1.25rem;font-weight:600;}
+    table{width:100%;border-collapse:collapse;margin-top:10px;font-size:0.92rem;}
+    th,td{border:1px solid #000;padding:4px 6px;text-align:left;}
+    .footer{font-size:0.8rem;color:#333;margin-top:10px;}
+    .page-break{page-break-after:always;}
+"""
+
+# course_code -> (fingerprint, html) and course codes tuple -> (fingerprints, pdf bytes).
+# A fingerprint covers everything a roster shows, so an entry is reused until that
+# course's enrollment, approvals or details change. The "Generated:" time is not
+# part of the cached HTML: _roster_document fills GENERATED_SLOT when it assembles
+# a page, and a cached PDF is only reused within the minute it was stamped with.
+_roster_html_cache = {}
+_roster_pdf_cache = {}
+GENERATED_SLOT = "<!--generated-->"
+
+
+def _generated_at():
+    return datetime.now().strftime("%Y-%m-%d %H:%M")
+
+
+def roster_html_for_course(course_code, course_map=None):
+    """Inner HTML of one course roster (cached per course fingerprint), or None for unknown courses."""
+    fingerprint, rows = course_roster(course_code)
+    if fingerprint is None:
+        return None
+    hit = _roster_html_cache.get(course_code)
+    if hit and hit[0] == fingerprint:
+        return hit[1]
+
+    course = (course_map or course_by_code_map())[course_code]
+    html = ["<div class='roster'><div class='hdr'><div>"]
+    html.append(f"<div class='coursename'>{escape(course['course_name'])} ({escape(course_code)})</div>")
+    html.append(f"<div>Teacher: {escape(course['teacher_name'] or '-')} &nbsp; Room: {escape(course['room'] or '-')}</div>")
+    html.append("</div><div style='text-align:right;font-size:0.8rem;'>Acadiana Renaissance Charter Academy<br>Course Roster</div></div>")
+    html.append("<table><thead><tr><th>#</th><th>Student</th><th>ID</th><th>Grade</th>")
+    if course["requires_approval"]:
+        html.append("<th>Approval</th>")
+    html.append("</tr></thead><tbody>")
+    for i, (sid, name, grade, status) in enumerate(rows, start=1):
+        html.append(f"<tr><td>{i}</td><td>{escape(name)}</td><td>{escape(sid)}</td><td>{escape(grade)}</td>")
+        if course["requires_approval"]:
+            html.append(f"<td>{escape(status.upper())}</td>")
+        html.append("</tr>")
+    if not rows:
+        html.append("<tr><td colspan='5'>(no students requested this course)</td></tr>")
+    html.append("</tbody></table>")
+    html.append(f"<div class='footer'>{len(rows)} student(s). Generated: {GENERATED_SLOT}</div></div>")
+    out = "".join(html)
+    _roster_html_cache[course_code] = (fingerprint, out)
+    return out
+
+
+def _roster_document(inner_parts, title, generated=None):
+    body = "<div class='page-break'></div>".join(inner_parts).replace(GENERATED_SLOT, generated or _generated_at())
+    return f"<html><head><meta charset='utf-8'><title>{escape(title)}</title><style>{ROSTER_CSS}</style></head><body>{body}</body></html>"
+
+
+def _rosters_pdf(codes):
+    fingerprints = roster_fingerprints()
+    generated = _generated_at()
+    key = tuple(codes)
+    sig = (generated,) + tuple(fingerprints.get(c) for c in codes)
+    hit = _roster_pdf_cache.get(key)
+    if hit and hit[0] == sig:
+        return hit[1]
+    course_map = course_by_code_map()
+    doc = _roster_document([roster_html_for_course(c, course_map) for c in codes], "Course Rosters", generated)
+    pdf_bytes = HTML(string=doc).write_pdf(stylesheets=[CSS(string="@page { size: A4; margin: 12mm; }")])
+    if len(_roster_pdf_cache) >= 64:
+        _roster_pdf_cache.clear()
+    _roster_pdf_cache[key] = (sig, pdf_bytes)
+    return pdf_bytes
+
+
+def _may_view_roster(course_code):
+    if is_counselor():
+        return True
+    if not is_teacher():
+        return False
+    course = course_by_code_map().get(course_code) or {}
+    return (course.get("teacher_email") or "").lower() == (session.get("teacher_email") or "").lower()
+
+
+@bp_printables.get("/roster/<course_code>")
+def course_roster_page(course_code):
+    """Printable roster for one course; ?format=pdf returns it as a PDF (needs weasyprint)."""
+    course_code = course_code.strip()
+    if not _may_view_roster(course_code):
+        return "Not authorized", 403
+
+    inner = roster_html_for_course(course_code)
+    if inner is None:
+        return "Course not found", 404
+
+    if request.args.get("format") != "pdf":
+        return _roster_document([inner], f"Roster {course_code}")
+
+    if not WEASYPRINT_AVAILABLE:
+        return "PDF generation is not available on this server (weasyprint not installed).", 501
+    try:
+        pdf_bytes = _rosters_pdf([course_code])
+    except Exception as e:
+        return f"Failed to generate PDF: {e}", 500
+    return Response(
+        pdf_bytes, mimetype="application/pdf", headers={"Content-Disposition": f"attachment; filename=roster_{course_code}.pdf"}
+    )
+
+
+@bp_printables.post("/api/printables/rosters_pdf")
+def rosters_pdf():
+    """
+    POST JSON payload:
+      { "course_codes": ["BIO", ...] }  or  { "all": true }  -> every course in courses.csv
+    Response: application/pdf with one roster per page. Counselors only; needs weasyprint.
+    """
+    if not is_counselor():
+        return "Not authorized", 403
+    if not WEASYPRINT_AVAILABLE:
+        return "PDF generation is not available on this server (weasyprint not installed).", 501
+
+    data = request.json or {}
+    known = roster_fingerprints()
+    if data.get("all"):
+        codes = [c["course_code"] for c in read_courses() if c["course_code"] in known]
+    elif isinstance(data.get("course_codes"), list):
+        codes = [str(c).strip() for c in data["course_codes"] if str(c).strip() in known]
+    else:
+        return "No course_codes provided", 400
+    if not codes:
+        return "No courses selected", 400
+
+    try:
+        pdf_bytes = _rosters_pdf(codes)
+    except Exception as e:
+        return f"Failed to generate PDF: {e}", 500
+    return Response(pdf_bytes, mimetype="application/pdf", headers={"Content-Disposition": "attachment; filename=rosters.pdf"})
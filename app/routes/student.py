@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify, session
 
 from app.auth import is_student
-from app.storage import read_students, read_courses, read_settings
+from app.storage import read_courses, read_settings, read_consistent
 from app.logic import (
     get_student_by_id,
     get_schedule_for_student,
@@ -10,27 +10,38 @@ from app.logic import (
     ensure_approval_rows_for_schedule,
     schedule_items_for_student,
     approval_counts_for_student,
+    rejected_codes_for_student,
 )
-from config import MAX_ACADEMIC_COURSES, MAX_ELECTIVE_CHOICES
+from app.httpcache import data_etag, client_has, not_modified, cached_json
+from app.prereqs import ineligible_courses_for_student, missing_prerequisites
+from app.indexes import find_students
+from app.catalog import catalog_payload, catalog_state, offered_to_grade
+from app.seats import capacity_map, seat_counts, sync_student_seats, request_priorities
+from config import MAX_ACADEMIC_COURSES, MAX_ELECTIVE_CHOICES, DEFAULT_SUBJECT_COLORS
 
 bp_student = Blueprint("student", __name__)
 
 
+FIND_LIMIT_DEFAULT = 20
+FIND_LIMIT_MAX = 100
+
+
+def _limit_arg(default, maximum):
+    """?limit=N clamped to 1..maximum; missing or invalid -> default."""
+    try:
+        return max(1, min(int(request.args.get("limit", default)), maximum))
+    except (TypeError, ValueError):
+        return default
+
+
 @bp_student.get("/api/student/find")
 def api_student_find():
     q = (request.args.get("q", "") or "").lower().strip()
-    out = []
+    out, more = [], False
     if len(q) >= 2:
-        for s in read_students():
-            if q in s["student_name"].lower():
-                out.append(
-                    {
-                        "student_id": s["student_id"],
-                        "student_name": s["student_name"],
-                        "grade_level": s["grade_level"],
-                    }
-                )
-    return jsonify({"matches": out})
+        # served from the in-memory student index, not a students.csv scan per keystroke
+        out, more = find_students(q, _limit_arg(FIND_LIMIT_DEFAULT, FIND_LIMIT_MAX))
+    return jsonify({"matches": out, "more": more})
 
 
 @bp_student.post("/api/student/login")
@@ -64,6 +75,19 @@ def api_student_status():
     if not stu:
         return jsonify({"authed": False})
 
+    _ensure_approval_rows(stu)
+    return jsonify(_student_state(stu))
+
+
+def _ensure_approval_rows(stu):
+    # may write approvals.csv, so callers run it before any consistent read
+    sched = get_schedule_for_student(stu["student_id"])
+    selected_codes = list(sched["academic_courses"]) + list(sched["elective_courses"]) if sched else []
+    ensure_approval_rows_for_schedule(stu["student_id"], selected_codes)
+
+
+def _student_state(stu):
+    """The signed-in student's schedule, resolved items, approval counts and submission lock."""
     sched = get_schedule_for_student(stu["student_id"])
     if not sched:
         sched = {
@@ -79,28 +103,51 @@ def api_student_status():
     lockmap = settings.get("grade_submission_lock", {})
     allowed = lockmap.get(stu["grade_level"], True)
 
-    selected_codes = [extract_course_code(x) for x in sched["academic_courses"]] + [
-        extract_course_code(x) for x in sched["elective_courses"]
-    ]
-    ensure_approval_rows_for_schedule(stu["student_id"], selected_codes)
-
     academic_items, elective_items = schedule_items_for_student(stu["student_id"], sched)
     pending_cnt, rejected_cnt = approval_counts_for_student(stu["student_id"], sched)
 
-    return jsonify(
-        {
-            "authed": True,
-            "student": stu,
-            "schedule": {
-                "academic_courses": sched["academic_courses"],
-                "elective_courses": sched["elective_courses"],
-                "special_instructions": sched.get("special_instructions", ""),
-            },
-            "schedule_items": {"academic": academic_items, "elective": elective_items},
-            "approval_counts": {"pending": pending_cnt, "rejected": rejected_cnt},
-            "can_submit": allowed,
-        }
-    )
+    return {
+        "authed": True,
+        "student": stu,
+        "schedule": {
+            "academic_courses": sched["academic_courses"],
+            "elective_courses": sched["elective_courses"],
+            "special_instructions": sched.get("special_instructions", ""),
+        },
+        "schedule_items": {"academic": academic_items, "elective": elective_items},
+        "approval_counts": {"pending": pending_cnt, "rejected": rejected_cnt},
+        "can_submit": allowed,
+    }
+
+
+# every table the bootstrap payload is read from
+BOOTSTRAP_TABLES = ("students", "schedules", "approvals", "courses", "settings", "seats", "prerequisites", "course_history")
+
+
+@bp_student.get("/api/student/bootstrap")
+def api_student_bootstrap():
+    """
+    The student panel after sign-in in one round trip: what /api/student/status returns,
+    plus subject_colors, catalog_state (as /api/catalog/state) and, only when the
+    client's cached catalog (?catalog=<version>) is missing or stale, the catalog itself
+    (as /api/catalog). Everything comes from one consistent read of the tables.
+    """
+    if not is_student():
+        return jsonify({"authed": False})
+    stu = get_student_by_id(session["student_id"])
+    if not stu:
+        return jsonify({"authed": False})
+    _ensure_approval_rows(stu)
+    have = (request.args.get("catalog", "") or "").strip()
+
+    def build():
+        out = _student_state(stu)
+        out["subject_colors"] = read_settings().get("subject_colors") or DEFAULT_SUBJECT_COLORS.copy()
+        out["catalog_state"] = catalog_state(stu["student_id"])
+        out["catalog"] = catalog_payload() if out["catalog_state"]["version"] != have else None
+        return out
+
+    return jsonify(read_consistent(build, BOOTSTRAP_TABLES))
 
 
 @bp_student.post("/api/student/save_schedule")
@@ -128,6 +175,26 @@ def api_student_save_schedule():
     if len(elective_list) > MAX_ELECTIVE_CHOICES:
         return jsonify({"ok": False, "error": "too_many_electives"}), 400
 
+    selected_codes = [extract_course_code(x) for x in academic_list] + [
+        extract_course_code(x) for x in elective_list
+    ]
+
+    ineligible = ineligible_courses_for_student(stu["student_id"])
+    blocked = []
+    for code in selected_codes:
+        if code in ineligible:
+            blocked.append({"course_code": code, "missing": missing_prerequisites(stu["student_id"], code)})
+    if blocked:
+        return jsonify({"ok": False, "error": "prerequisites_not_met", "courses": blocked}), 400
+
+    # reserve seats atomically before writing the schedule; full courses go on the waitlist
+    seats = sync_student_seats(
+        stu["student_id"],
+        selected_codes,
+        priorities=request_priorities(selected_codes[: len(academic_list)], selected_codes[len(academic_list) :]),
+        exclude=rejected_codes_for_student(stu["student_id"]),
+    )
+
     upsert_schedule(
         stu["student_id"],
         stu["student_name"],
@@ -137,12 +204,9 @@ def api_student_save_schedule():
         special_instructions,
     )
 
-    selected_codes = [extract_course_code(x) for x in academic_list] + [
-        extract_course_code(x) for x in elective_list
-    ]
     ensure_approval_rows_for_schedule(stu["student_id"], selected_codes)
 
-    return jsonify({"ok": True})
+    return jsonify({"ok": True, "waitlisted": seats["waitlisted"]})
 
 
 @bp_student.get("/api/courses")
@@ -150,18 +214,26 @@ def api_courses():
     subj = (request.args.get("subject", "") or "").strip().lower()
     grade = (request.args.get("grade", "") or "").strip()
     nameq = (request.args.get("name", "") or "").strip().lower()
+    limit = _limit_arg(0, 1000) if request.args.get("limit") else 0
+
+    viewer = session.get("student_id", "") if is_student() else ""
+    tag = data_etag(("courses", "seats", "prerequisites", "course_history"), viewer)
+    if client_has(tag):
+        return not_modified(tag)
+
+    # signed-in students only see courses whose prerequisites they have met
+    ineligible = ineligible_courses_for_student(viewer) if viewer else frozenset()
+
+    courses = read_courses()
+    caps = capacity_map(courses)
+    taken = seat_counts()
 
     out = []
-    for c in read_courses():
-        if grade:
-            try:
-                g = int(grade)
-                gmin = int(c["grade_min"]) if c["grade_min"] else g
-                gmax = int(c["grade_max"]) if c["grade_max"] else g
-                if not (g >= gmin and g <= gmax):
-                    continue
-            except Exception:
-                pass
+    for c in courses:
+        if c["course_code"] in ineligible:
+            continue
+        if grade and not offered_to_grade(c, grade):
+            continue
 
         if subj and subj not in (c["subject_area"] or "").lower():
             continue
@@ -170,6 +242,33 @@ def api_courses():
         if nameq and nameq not in nm:
             continue
 
+        code = c["course_code"]
+        c["seats_taken"] = taken.get(code, 0)
+        c["full"] = code in caps and c["seats_taken"] >= caps[code]
         out.append(c)
-
-    return jsonify({"courses": out})
+        if limit and len(out) > limit:
+            break
+
+    more = bool(limit) and len(out) > limit
+    return cached_json({"courses": out[:limit] if more else out, "more": more}, tag)
+
+
+@bp_student.get("/api/catalog")
+def api_catalog():
+    tag = data_etag(("courses",))
+    if client_has(tag):
+        return not_modified(tag)
+    return cached_json(catalog_payload(), tag)
+
+
+@bp_student.get("/api/catalog/state")
+def api_catalog_state():
+    """
+    { version, full: [codes], ineligible: [codes] } -- what a cached catalog needs to filter
+    like /api/courses. A client whose cached version differs refetches /api/catalog.
+    """
+    viewer = session.get("student_id", "") if is_student() else ""
+    tag = data_etag(("courses", "seats", "prerequisites", "course_history"), viewer)
+    if client_has(tag):
+        return not_modified(tag)
+    return cached_json(catalog_state(viewer), tag)
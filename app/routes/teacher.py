@@ -1,5 +1,3 @@
-from datetime import datetime
-
 from flask import Blueprint, request, jsonify, session
 
 from app.auth import is_teacher
@@ -8,10 +6,15 @@ from app.storage import (
     read_courses,
     read_schedules,
     read_approvals,
-    write_approvals,
     write_courses,
 )
-from app.logic import course_by_code_map, extract_course_code, ensure_approval_rows_for_schedule
+from app.logic import (
+    course_by_code_map,
+    ensure_approval_rows_for_schedule,
+    set_approvals,
+    pending_students_for_course,
+)
+from app.httpcache import data_etag, client_has, not_modified, cached_json
 
 bp_teacher = Blueprint("teacher", __name__)
 
@@ -67,6 +70,10 @@ def api_teacher_roster():
         return jsonify({"error": "not_authorized"}), 403
 
     teacher_email = (session.get("teacher_email") or "").lower()
+    tag = data_etag(("courses", "schedules", "approvals", "students"), teacher_email)
+    if client_has(tag):
+        return not_modified(tag)
+
     course_map = course_by_code_map()
 
     # only courses assigned to this teacher
@@ -84,8 +91,7 @@ def api_teacher_roster():
         sname = s["student_name"]
         grade = s["grade_level"]
 
-        selected = (s.get("academic_courses") or []) + (s.get("elective_courses") or [])
-        codes = [extract_course_code(x) for x in selected]
+        codes = (s.get("academic_courses") or []) + (s.get("elective_courses") or [])
 
         for code in codes:
             if code not in my_codes:
@@ -126,7 +132,7 @@ def api_teacher_roster():
 
     roster_list.sort(key=sort_key)
 
-    return jsonify({"courses": roster_list})
+    return cached_json({"courses": roster_list}, tag)
 
 
 @bp_teacher.post("/api/teacher/set_approval")
@@ -146,33 +152,50 @@ def api_teacher_set_approval():
         return jsonify({"error": "missing_fields"}), 400
 
     teacher_email = (session.get("teacher_email") or "").lower()
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    course = course_by_code_map().get(course_code)
+    if not course or (course.get("teacher_email", "") or "").lower() != teacher_email:
+        return jsonify({"error": "not_your_course"}), 403
 
-    approvals = read_approvals()
-    updated = False
-    for a in approvals:
-        if a["student_id"] == student_id and a["course_code"] == course_code:
-            a["status"] = status
-            a["teacher_email"] = teacher_email
-            a["updated_at"] = now
-            a["note"] = note
-            updated = True
-            break
+    updated = set_approvals(course_code, [student_id], status, teacher_email, note)
 
-    if not updated:
-        approvals.append(
-            {
-                "student_id": student_id,
-                "course_code": course_code,
-                "status": status,
-                "teacher_email": teacher_email,
-                "updated_at": now,
-                "note": note,
-            }
-        )
-
-    write_approvals(approvals)
-    return jsonify({"ok": True})
+    return jsonify({"ok": True, "updated": bool(updated)})
+
+
+@bp_teacher.post("/api/teacher/set_approvals")
+def api_teacher_set_approvals():
+    """
+    Batch decision for one of the teacher's courses:
+      {"course_code": "BIO", "status": "approved"|"rejected", "student_ids": [...]}   (checked subset)
+      {"course_code": "BIO", "status": "approved", "all_pending": true}            (everyone still pending)
+    """
+    if not is_teacher():
+        return jsonify({"error": "not_authorized"}), 403
+
+    data = request.json or {}
+    course_code = (data.get("course_code", "") or "").strip()
+    status = (data.get("status", "") or "").strip().lower()
+    note = (data.get("note", "") or "").strip()
+
+    if status not in ("approved", "rejected"):
+        return jsonify({"error": "bad_status"}), 400
+    if not course_code:
+        return jsonify({"error": "missing_fields"}), 400
+
+    teacher_email = (session.get("teacher_email") or "").lower()
+    course = course_by_code_map().get(course_code)
+    if not course or (course.get("teacher_email", "") or "").lower() != teacher_email:
+        return jsonify({"error": "not_your_course"}), 403
+
+    if data.get("all_pending"):
+        student_ids = pending_students_for_course(course_code)
+    else:
+        raw = data.get("student_ids")
+        if not isinstance(raw, list):
+            return jsonify({"error": "missing_fields"}), 400
+        student_ids = [str(x or "").strip() for x in raw]
+
+    updated = set_approvals(course_code, student_ids, status, teacher_email, note)
+    return jsonify({"ok": True, "updated": updated, "count": len(updated)})
 
 
 @bp_teacher.post("/api/teacher/update_course_description")
@@ -30,6 +30,8 @@ def download_template(which):
                 "grade_min",
                 "grade_max",
                 "requires_approval",
+                "prerequisites",
+                "capacity",
             ]
         )
         w.writerow(
@@ -45,11 +47,19 @@ def download_template(which):
                 "9",
                 "10",
                 "TRUE",
+                "",
+                "24",
             ]
         )
     elif which == "teachers":
         w.writerow(["teacher_email", "teacher_name", "password"])
         w.writerow(["teacher@school.org", "Ms. Example", "changeme"])
+    elif which == "prerequisites":
+        w.writerow(["course_code", "prerequisite_code"])
+        w.writerow(["ALG2", "ALG1"])
+    elif which == "history":
+        w.writerow(["student_id", "course_code", "passed"])
+        w.writerow(["12345", "ALG1", "TRUE"])
     elif which == "schedules":
         header = ["student_id", "student_name", "grade_level"]
         for i in range(MAX_ACADEMIC_COURSES):
@@ -0,0 +1,363 @@
+import time
+
+from config import WAITLIST_ORDER
+from app.statedb import connect, transaction, get_meta, set_meta
+from app.events import publish_many
+from app.storage import read_courses, read_schedules, read_approvals
+
+# Waitlist heads are read through an index on (course_code, <rank columns>),
+# so finding the next student to promote is a single O(log n) index seek.
+_RANK_ORDER = {
+    "timestamp": "created_at, student_id",
+    "priority": "priority, created_at, student_id",
+}
+
+
+def _rank_sql():
+    return _RANK_ORDER.get(WAITLIST_ORDER, _RANK_ORDER["timestamp"])
+
+
+def course_capacity(course):
+    """Capacity from courses.csv; None (blank or invalid) means unlimited."""
+    raw = str((course or {}).get("capacity", "") or "").strip()
+    try:
+        cap = int(raw)
+    except Exception:
+        return None
+    return cap if cap >= 0 else None
+
+
+def capacity_map(courses=None):
+    out = {}
+    for c in courses if courses is not None else read_courses():
+        cap = course_capacity(c)
+        if c.get("course_code") and cap is not None:
+            out[c["course_code"]] = cap
+    return out
+
+
+def request_priorities(academic_codes, elective_codes):
+    """Academic picks rank 0; electives rank by their priority number (1 = top choice)."""
+    pri = {}
+    for code in academic_codes:
+        if code:
+            pri.setdefault(code, 0)
+    for i, code in enumerate(elective_codes):
+        if code:
+            pri.setdefault(code, i + 1)
+    return pri
+
+
+def _bump(conn, code, delta):
+    conn.execute(
+        "INSERT INTO seat_counts (course_code, taken) VALUES (?, MAX(?, 0)) "
+        "ON CONFLICT(course_code) DO UPDATE SET taken = MAX(taken + ?, 0)",
+        (code, delta, delta),
+    )
+
+
+def _taken(conn, code):
+    row = conn.execute("SELECT taken FROM seat_counts WHERE course_code = ?", (code,)).fetchone()
+    return row[0] if row else 0
+
+
+def _held(conn, student_id):
+    return {r[0] for r in conn.execute("SELECT course_code FROM seat_holders WHERE student_id = ?", (student_id,))}
+
+
+def _waiting(conn, student_id):
+    return {r[0] for r in conn.execute("SELECT course_code FROM waitlist WHERE student_id = ?", (student_id,))}
+
+
+def _take_seat(conn, code, student_id):
+    conn.execute("INSERT OR IGNORE INTO seat_holders (course_code, student_id) VALUES (?, ?)", (code, student_id))
+    _bump(conn, code, 1)
+
+
+def _free_seat(conn, code, student_id):
+    cur = conn.execute("DELETE FROM seat_holders WHERE course_code = ? AND student_id = ?", (code, student_id))
+    if cur.rowcount:
+        _bump(conn, code, -1)
+    return bool(cur.rowcount)
+
+
+def _promote(conn, code, caps):
+    """Fill freed seats in one course from the head of its waitlist; returns promoted student ids."""
+    cap = caps.get(code)
+    promoted = []
+    while cap is None or _taken(conn, code) < cap:
+        head = conn.execute(
+            f"SELECT student_id FROM waitlist WHERE course_code = ? ORDER BY {_rank_sql()} LIMIT 1", (code,)
+        ).fetchone()
+        if not head:
+            break
+        conn.execute("DELETE FROM waitlist WHERE course_code = ? AND student_id = ?", (code, head[0]))
+        _take_seat(conn, code, head[0])
+        promoted.append(head[0])
+    return promoted
+
+
+def _announce(promoted):
+    # after the seat transaction commits: dashboards see each promotion as a "seat" event
+    if promoted:
+        publish_many(
+            "seat", [{"student_id": sid, "course_code": code, "seat_status": "enrolled"} for code, sid in promoted]
+        )
+
+
+def seat_counts():
+    """course_code -> seats taken, straight from the counters (no schedules.csv scan)."""
+    return {code: taken for code, taken in connect().execute("SELECT course_code, taken FROM seat_counts")}
+
+
+def sync_student_seats(student_id: str, course_codes, capacities=None, force: bool = False, priorities=None, exclude=()):
+    """
+    Make the student's seats match course_codes in one atomic step.
+    Newly requested courses that are full go on the course waitlist (or are
+    over-enrolled when force is True, for counselors). Dropped courses free
+    their seat and promote the next waitlisted student. Codes in exclude
+    (e.g. rejected approvals) never hold a seat.
+    Returns {"waitlisted": [...], "promoted": [(course_code, student_id), ...]}.
+    """
+    caps = capacities if capacities is not None else capacity_map()
+    pri = priorities or {}
+    skip = set(exclude)
+    wanted = {c for c in course_codes if c and c not in skip}
+    now = time.time()
+
+    waitlisted = []
+    promoted = []
+    with transaction(bump="seats") as conn:
+        held = _held(conn, student_id)
+        waiting = _waiting(conn, student_id)
+
+        for code in sorted(held - wanted):
+            _free_seat(conn, code, student_id)
+            promoted += [(code, sid) for sid in _promote(conn, code, caps)]
+        for code in sorted(waiting - wanted):
+            conn.execute("DELETE FROM waitlist WHERE course_code = ? AND student_id = ?", (code, student_id))
+
+        for code in sorted(wanted - held):
+            cap = caps.get(code)
+            if code in waiting:
+                if force or cap is None or _taken(conn, code) < cap:
+                    conn.execute("DELETE FROM waitlist WHERE course_code = ? AND student_id = ?", (code, student_id))
+                    _take_seat(conn, code, student_id)
+                else:
+                    # keep the place in line; only the elective rank may change
+                    conn.execute(
+                        "UPDATE waitlist SET priority = ? WHERE course_code = ? AND student_id = ?",
+                        (pri.get(code, 0), code, student_id),
+                    )
+                    waitlisted.append(code)
+                continue
+            if force or cap is None or _taken(conn, code) < cap:
+                _take_seat(conn, code, student_id)
+            else:
+                conn.execute(
+                    "INSERT INTO waitlist (course_code, student_id, priority, created_at) VALUES (?, ?, ?, ?)",
+                    (code, student_id, pri.get(code, 0), now),
+                )
+                waitlisted.append(code)
+
+    _announce(promoted)
+    return {"waitlisted": waitlisted, "promoted": promoted}
+
+
+def release_student_seats(student_id: str):
+    """Free every seat and waitlist spot the student holds; returns [(course_code, promoted_student_id), ...]."""
+    return release_many_student_seats([student_id])
+
+
+def release_many_student_seats(student_ids):
+    """release_student_seats for a batch of students in one transaction."""
+    caps = capacity_map()
+    promoted = []
+    with transaction(bump="seats") as conn:
+        for student_id in student_ids:
+            held = sorted(_held(conn, student_id))
+            conn.execute("DELETE FROM waitlist WHERE student_id = ?", (student_id,))
+            for code in held:
+                _free_seat(conn, code, student_id)
+                promoted += [(code, sid) for sid in _promote(conn, code, caps)]
+    _announce(promoted)
+    return promoted
+
+
+def release_course_seats(course_code: str, student_ids):
+    """
+    Free the seats and waitlist spots several students hold in one course (e.g. after a
+    rejected approval), then fill the freed seats from the head of the course waitlist.
+    One transaction and one promotion pass. Returns [(course_code, promoted_student_id), ...].
+    """
+    caps = capacity_map()
+    with transaction(bump="seats") as conn:
+        for student_id in student_ids:
+            conn.execute("DELETE FROM waitlist WHERE course_code = ? AND student_id = ?", (course_code, student_id))
+            _free_seat(conn, course_code, student_id)
+        promoted = [(course_code, sid) for sid in _promote(conn, course_code, caps)]
+    _announce(promoted)
+    return promoted
+
+
+def request_course_seats(course_code: str, priorities):
+    """
+    Ask for a seat in one course for several students (priorities: student_id -> waitlist
+    priority), in one transaction: each takes a free seat or joins the waitlist; students
+    already seated or waiting keep their place. Returns student_id -> "enrolled" or "waitlisted".
+    """
+    cap = capacity_map().get(course_code)
+    now = time.time()
+    out = {}
+    with transaction(bump="seats") as conn:
+        holders = {r[0] for r in conn.execute("SELECT student_id FROM seat_holders WHERE course_code = ?", (course_code,))}
+        waiting = {r[0] for r in conn.execute("SELECT student_id FROM waitlist WHERE course_code = ?", (course_code,))}
+        for student_id, priority in priorities.items():
+            if student_id in holders:
+                out[student_id] = "enrolled"
+            elif student_id in waiting:
+                out[student_id] = "waitlisted"
+            elif cap is None or _taken(conn, course_code) < cap:
+                _take_seat(conn, course_code, student_id)
+                out[student_id] = "enrolled"
+            else:
+                conn.execute(
+                    "INSERT INTO waitlist (course_code, student_id, priority, created_at) VALUES (?, ?, ?, ?)",
+                    (course_code, student_id, priority, now),
+                )
+                out[student_id] = "waitlisted"
+    return out
+
+
+def promote_waitlists(course_codes=None):
+    """Promote into any free seats, e.g. after a capacity was raised."""
+    caps = capacity_map()
+    promoted = []
+    with transaction(bump="seats") as conn:
+        if course_codes is None:
+            course_codes = [r[0] for r in conn.execute("SELECT DISTINCT course_code FROM waitlist")]
+        for code in course_codes:
+            promoted += [(code, sid) for sid in _promote(conn, code, caps)]
+    _announce(promoted)
+    return promoted
+
+
+def seat_status_for_student(student_id: str):
+    """course_code -> {"seat_status": "enrolled"|"waitlisted", "waitlist_position": n} for one student."""
+    conn = connect()
+    out = {code: {"seat_status": "enrolled", "waitlist_position": 0} for code in _held(conn, student_id)}
+    order = _rank_sql()
+    rows = conn.execute(
+        "SELECT course_code, priority, created_at FROM waitlist WHERE student_id = ?", (student_id,)
+    ).fetchall()
+    for code, priority, created_at in rows:
+        # position = entries ranked ahead in the same course (index range count)
+        if order.startswith("priority"):
+            ahead = conn.execute(
+                "SELECT COUNT(*) FROM waitlist WHERE course_code = ? AND "
+                "(priority < ? OR (priority = ? AND (created_at < ? OR (created_at = ? AND student_id < ?))))",
+                (code, priority, priority, created_at, created_at, student_id),
+            ).fetchone()[0]
+        else:
+            ahead = conn.execute(
+                "SELECT COUNT(*) FROM waitlist WHERE course_code = ? AND "
+                "(created_at < ? OR (created_at = ? AND student_id < ?))",
+                (code, created_at, created_at, student_id),
+            ).fetchone()[0]
+        out[code] = {"seat_status": "waitlisted", "waitlist_position": ahead + 1}
+    return out
+
+
+def waitlist_for_course(course_code: str):
+    rows = connect().execute(
+        f"SELECT student_id, priority, created_at FROM waitlist WHERE course_code = ? ORDER BY {_rank_sql()}",
+        (course_code,),
+    ).fetchall()
+    return [
+        {"position": i + 1, "student_id": sid, "priority": pri, "created_at": created}
+        for i, (sid, pri, created) in enumerate(rows)
+    ]
+
+
+def waitlist_lengths():
+    return {code: n for code, n in connect().execute("SELECT course_code, COUNT(*) FROM waitlist GROUP BY course_code")}
+
+
+def drop_course_seats(course_code: str):
+    with transaction(bump="seats") as conn:
+        conn.execute("DELETE FROM seat_holders WHERE course_code = ?", (course_code,))
+        conn.execute("DELETE FROM seat_counts WHERE course_code = ?", (course_code,))
+        conn.execute("DELETE FROM waitlist WHERE course_code = ?", (course_code,))
+
+
+def rebuild_seat_counts():
+    """
+    Recount every seat from schedules.csv. Only needed once (or after restoring data by hand).
+    Seeds the way sync_student_seats assigns: courses whose approval was rejected hold no
+    seat, and requests past a course's capacity go on its waitlist. Academic picks are
+    seated first, then electives by rank, each in schedules.csv order.
+    """
+    caps = capacity_map()
+    rejected = {(a["student_id"], a["course_code"]) for a in read_approvals() if (a["status"] or "").lower() == "rejected"}
+    requests = []
+    for order, s in enumerate(read_schedules()):
+        sid = s["student_id"]
+        pri = request_priorities(s.get("academic_courses") or [], s.get("elective_courses") or [])
+        requests += [(p, order, code, sid) for code, p in pri.items() if (sid, code) not in rejected]
+    requests.sort()
+
+    taken, holders, waiting = {}, [], []
+    now = time.time()
+    for i, (priority, _order, code, sid) in enumerate(requests):
+        cap = caps.get(code)
+        if cap is None or taken.get(code, 0) < cap:
+            taken[code] = taken.get(code, 0) + 1
+            holders.append((code, sid))
+        else:
+            # created_at keeps the seeding order for the timestamp waitlist order
+            waiting.append((code, sid, priority, now + i * 1e-6))
+
+    with transaction(bump="seats") as conn:
+        conn.execute("DELETE FROM seat_holders")
+        conn.execute("DELETE FROM seat_counts")
+        conn.execute("DELETE FROM waitlist")
+        conn.executemany("INSERT INTO seat_holders (course_code, student_id) VALUES (?, ?)", holders)
+        conn.executemany(
+            "INSERT INTO waitlist (course_code, student_id, priority, created_at) VALUES (?, ?, ?, ?)", waiting
+        )
+        conn.execute(
+            "INSERT INTO seat_counts (course_code, taken) SELECT course_code, COUNT(*) FROM seat_holders GROUP BY course_code"
+        )
+        set_meta(conn, "seats_seeded", 1)
+
+
+SEAT_TABLES = {
+    "seat_counts": ("course_code", "taken"),
+    "seat_holders": ("course_code", "student_id"),
+    "waitlist": ("course_code", "student_id", "priority", "created_at"),
+}
+
+
+def export_seat_tables():
+    """Rows of every seat table read in one transaction (a consistent WAL read; writers keep going)."""
+    conn = connect()
+    conn.execute("BEGIN")
+    try:
+        return {t: [list(r) for r in conn.execute(f"SELECT {', '.join(cols)} FROM {t}")] for t, cols in SEAT_TABLES.items()}
+    finally:
+        conn.execute("COMMIT")
+
+
+def import_seat_tables(data):
+    """Replace the seat tables with rows from export_seat_tables() (snapshot restore)."""
+    with transaction(bump="seats") as conn:
+        for t, cols in SEAT_TABLES.items():
+            conn.execute(f"DELETE FROM {t}")
+            marks = ", ".join("?" for _ in cols)
+            conn.executemany(f"INSERT INTO {t} ({', '.join(cols)}) VALUES ({marks})", data.get(t) or [])
+        set_meta(conn, "seats_seeded", 1)
+
+
+def init_seats():
+    if not get_meta("seats_seeded"):
+        rebuild_seat_counts()
@@ -0,0 +1,233 @@
+import json
+import multiprocessing
+import os
+import re
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from config import SIMULATIONS_DIR, SIMULATION_WORKERS
+from app.storage import read_courses, read_schedules, read_approvals
+from app.seats import course_capacity, capacity_map, seat_counts, waitlist_lengths
+
+SIM_ID_RE = re.compile(r"^[0-9a-f]{12}$")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: workers start clean instead of forking a threaded web process
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, SIMULATION_WORKERS), mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def take_snapshot():
+    """
+    Immutable, picklable copy of everything allocation needs:
+      courses:   ((code, name, capacity|None), ...)
+      requests:  ((student_id, (academic codes...), (elective codes...)), ...) in schedules.csv order
+      rejected:  frozenset((student_id, course_code), ...)
+    """
+    courses = tuple((c["course_code"], c["course_name"], course_capacity(c)) for c in read_courses() if c["course_code"])
+    requests = tuple(
+        (
+            s["student_id"],
+            tuple(s["academic_courses"]),
+            tuple(s["elective_courses"]),
+        )
+        for s in read_schedules()
+    )
+    rejected = frozenset((a["student_id"], a["course_code"]) for a in read_approvals() if a["status"] == "rejected")
+    return {"taken_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "courses": courses, "requests": requests, "rejected": rejected}
+
+
+def apply_changes(capacities, changes):
+    """
+    Supported changes:
+      {"op": "set_capacity", "course_code": "ALG1", "capacity": 60}
+      {"op": "add_section", "course_code": "BIO", "seats": 24}   (seats defaults to the current capacity)
+    Changes are assumed valid; the API checks each one with change_error first.
+    """
+    caps = dict(capacities)
+    for ch in changes:
+        code = ch.get("course_code", "")
+        if ch.get("op") == "set_capacity":
+            cap = ch.get("capacity")
+            caps[code] = None if cap in (None, "") else int(cap)
+        elif ch.get("op") == "add_section":
+            current = caps.get(code)
+            seats = ch.get("seats")
+            seats = int(seats) if seats not in (None, "") else (current or 0)
+            if current is not None:
+                caps[code] = current + seats
+    return caps
+
+
+CHANGE_OPS = {"set_capacity": "capacity", "add_section": "seats"}  # op -> its number field
+
+
+def change_error(ch, capacities):
+    """
+    Why a requested change cannot be simulated, or "" when it is valid.
+    capacities: course_code -> capacity (None = unlimited) for every course in the catalog.
+    """
+    if not isinstance(ch, dict) or ch.get("op") not in CHANGE_OPS:
+        return "unknown op"
+    code = ch.get("course_code") or ""
+    if code not in capacities:
+        return f"unknown course {code!r}"
+    field = CHANGE_OPS[ch["op"]]
+    other = next(f for op, f in CHANGE_OPS.items() if op != ch["op"])
+    if other in ch:
+        return f"{ch['op']} takes {field!r}, not {other!r}"
+    value = ch.get(field)
+    if ch["op"] == "set_capacity" and field not in ch:
+        return "missing 'capacity' (blank means unlimited)"
+    if value not in (None, ""):
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            return f"{field} {value!r} is not a number"
+        if number < 0:
+            return f"{field} cannot be negative"
+    if ch["op"] == "add_section" and capacities[code] is None:
+        return f"{code} has no capacity limit; set_capacity first"
+    return ""
+
+
+def allocate(snapshot, capacities):
+    """Greedy allocation: academic picks first, then electives by priority; ties keep schedules.csv order."""
+    reqs = []
+    for order, (sid, academic, elective) in enumerate(snapshot["requests"]):
+        for code in academic:
+            reqs.append((0, order, sid, code))
+        for i, code in enumerate(elective):
+            reqs.append((i + 1, order, sid, code))
+    reqs.sort()
+
+    taken = {}
+    waiting = {}
+    seen = set()
+    for _, _, sid, code in reqs:
+        if not code or (sid, code) in seen or (sid, code) in snapshot["rejected"]:
+            continue
+        seen.add((sid, code))
+        cap = capacities.get(code)
+        if cap is None or taken.get(code, 0) < cap:
+            taken[code] = taken.get(code, 0) + 1
+        else:
+            waiting[code] = waiting.get(code, 0) + 1
+    return taken, waiting
+
+
+def run_scenario(snapshot, changes):
+    """Runs in a worker process: baseline and scenario allocation over the same snapshot."""
+    base_caps = {code: cap for code, _, cap in snapshot["courses"]}
+    new_caps = apply_changes(base_caps, changes)
+
+    base_taken, base_wait = allocate(snapshot, base_caps)
+    new_taken, new_wait = allocate(snapshot, new_caps)
+
+    courses = []
+    for code, name, _ in snapshot["courses"]:
+        courses.append(
+            {
+                "course_code": code,
+                "course_name": name,
+                "baseline": {"capacity": base_caps.get(code), "enrolled": base_taken.get(code, 0), "waitlisted": base_wait.get(code, 0)},
+                "scenario": {"capacity": new_caps.get(code), "enrolled": new_taken.get(code, 0), "waitlisted": new_wait.get(code, 0)},
+            }
+        )
+
+    return {
+        "snapshot_taken_at": snapshot["taken_at"],
+        "students": len(snapshot["requests"]),
+        "totals": {
+            "baseline": {"enrolled": sum(base_taken.values()), "waitlisted": sum(base_wait.values())},
+            "scenario": {"enrolled": sum(new_taken.values()), "waitlisted": sum(new_wait.values())},
+        },
+        "courses": courses,
+    }
+
+
+def _sim_path(sim_id):
+    return os.path.join(SIMULATIONS_DIR, f"{sim_id}.json")
+
+
+def _save(record):
+    os.makedirs(SIMULATIONS_DIR, exist_ok=True)
+    tmp = _sim_path(record["id"]) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp, _sim_path(record["id"]))
+
+
+def start_simulation(name: str, changes):
+    """Snapshot the live tables and queue the scenario on the worker pool. Returns the new simulation id."""
+    sim_id = uuid.uuid4().hex[:12]
+    record = {
+        "id": sim_id,
+        "name": name or sim_id,
+        "changes": changes,
+        "status": "running",
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "finished_at": "",
+        "error": "",
+        "result": None,
+    }
+    _save(record)
+
+    future = _get_pool().submit(run_scenario, take_snapshot(), changes)
+
+    def done(fut):
+        record["finished_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            record["result"] = fut.result()
+            record["status"] = "done"
+        except Exception as e:
+            record["status"] = "failed"
+            record["error"] = str(e)
+        _save(record)
+
+    future.add_done_callback(done)
+    return sim_id
+
+
+def load_simulation(sim_id: str):
+    if not SIM_ID_RE.match(sim_id or ""):
+        return None
+    try:
+        with open(_sim_path(sim_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def list_simulations():
+    out = []
+    if not os.path.isdir(SIMULATIONS_DIR):
+        return out
+    for fn in os.listdir(SIMULATIONS_DIR):
+        if not fn.endswith(".json"):
+            continue
+        rec = load_simulation(fn[:-5])
+        if rec:
+            out.append({k: rec.get(k) for k in ("id", "name", "changes", "status", "created_at", "finished_at", "error")})
+    out.sort(key=lambda r: r["created_at"], reverse=True)
+    return out
+
+
+def live_comparison():
+    """Current live seats per course, to put next to a stored simulation result."""
+    caps = capacity_map()
+    taken = seat_counts()
+    waiting = waitlist_lengths()
+    codes = set(caps) | set(taken) | set(waiting)
+    return {code: {"capacity": caps.get(code), "enrolled": taken.get(code, 0), "waitlisted": waiting.get(code, 0)} for code in codes}
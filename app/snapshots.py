@@ -0,0 +1,202 @@
+import io
+import json
+import logging
+import os
+import re
+import tarfile
+import threading
+import time
+from datetime import datetime
+
+from config import (
+    SNAPSHOTS_DIR,
+    SNAPSHOT_KEEP,
+    SNAPSHOT_INTERVAL_MINUTES,
+    SCHEDULES_LOG,
+)
+from app.storage import TABLE_FILES, capture_tables, bump_table_version, discard_write_behind
+from app.seats import export_seat_tables, import_seat_tables
+
+# A snapshot is one .tar.gz holding manifest.json, seats.json and every data
+# file under its usual relative path. Capturing is a quick in-memory copy taken
+# behind the storage version barrier; compressing and writing the archive
+# happens on a background thread so the caller (and every writer) moves on.
+# A write that fails leaves <name>.failed (JSON: name, failed_at, error) instead.
+SNAPSHOT_RE = re.compile(r"^snapshot-\d{8}-\d{6}-\d{3}\.tar\.gz$")
+FAILED_SUFFIX = ".failed"
+RESTORABLE = set(TABLE_FILES.values()) | {SCHEDULES_LOG}
+
+_lock = threading.Lock()  # one archive written at a time per process
+_scheduler = None
+log = logging.getLogger(__name__)
+
+
+def _snapshot_path(name):
+    return os.path.join(SNAPSHOTS_DIR, name)
+
+
+def take_snapshot(wait: bool = False, rotate: bool = True):
+    """
+    Capture a consistent copy of all tables now; the archive is written in the background. Returns its name.
+    With wait=True a failed write is raised here as well as logged and recorded.
+    """
+    versions, files, seats = capture_tables(extra=export_seat_tables)
+    now = datetime.now()
+    name = f"snapshot-{now.strftime('%Y%m%d-%H%M%S')}-{now.microsecond // 1000:03d}.tar.gz"
+    manifest = {
+        "name": name,
+        "taken_at": now.strftime("%Y-%m-%d %H:%M:%S"),
+        "versions": versions,
+        "files": sorted(files),
+    }
+    errors = []
+    t = threading.Thread(target=_write_archive_or_record, args=(name, manifest, files, seats, rotate, errors), daemon=True)
+    t.start()
+    if wait:
+        t.join()
+        if errors:
+            raise errors[0]
+    return name
+
+
+def _write_archive_or_record(name, manifest, files, seats, rotate, errors):
+    try:
+        _write_archive(name, manifest, files, seats, rotate)
+    except Exception as e:
+        log.exception("snapshot %s was not written", name)
+        errors.append(e)
+        _record_failure(name, e)
+
+
+def _record_failure(name, error):
+    for leftover in (_snapshot_path(name) + ".tmp", _snapshot_path(name)):
+        try:
+            os.remove(leftover)
+        except OSError:
+            pass
+    marker = {"name": name, "failed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "error": f"{type(error).__name__}: {error}"}
+    try:
+        os.makedirs(SNAPSHOTS_DIR, exist_ok=True)
+        with open(_snapshot_path(name) + FAILED_SUFFIX, "w", encoding="utf-8") as f:
+            json.dump(marker, f)
+    except OSError:
+        log.exception("could not record the failure of snapshot %s", name)
+
+
+def _write_archive(name, manifest, files, seats, rotate):
+    members = {"manifest.json": json.dumps(manifest, indent=2).encode("utf-8"), "seats.json": json.dumps(seats).encode("utf-8")}
+    members.update(files)
+    with _lock:
+        os.makedirs(SNAPSHOTS_DIR, exist_ok=True)
+        tmp = _snapshot_path(name) + ".tmp"
+        with tarfile.open(tmp, "w:gz") as tar:
+            for arcname, data in members.items():
+                info = tarfile.TarInfo(arcname)
+                info.size = len(data)
+                info.mtime = int(time.time())
+                tar.addfile(info, io.BytesIO(data))
+        os.replace(tmp, _snapshot_path(name))
+        if rotate:
+            rotate_snapshots()
+
+
+def list_snapshots():
+    """Snapshots newest first: [{name, size, taken_at}]."""
+    try:
+        names = [n for n in os.listdir(SNAPSHOTS_DIR) if SNAPSHOT_RE.match(n)]
+    except FileNotFoundError:
+        return []
+    out = []
+    for n in sorted(names, reverse=True):
+        try:
+            st = os.stat(_snapshot_path(n))
+        except FileNotFoundError:  # rotated away by another process
+            continue
+        out.append({"name": n, "size": st.st_size, "taken_at": datetime.fromtimestamp(st.st_mtime).strftime("%Y-%m-%d %H:%M:%S")})
+    return out
+
+
+def list_failed_snapshots():
+    """Snapshots whose archive could not be written, newest first: [{name, failed_at, error}]."""
+    try:
+        names = [n for n in os.listdir(SNAPSHOTS_DIR) if n.endswith(FAILED_SUFFIX) and SNAPSHOT_RE.match(n[: -len(FAILED_SUFFIX)])]
+    except FileNotFoundError:
+        return []
+    out = []
+    for n in sorted(names, reverse=True):
+        try:
+            with open(_snapshot_path(n), encoding="utf-8") as f:
+                out.append(json.load(f))
+        except (OSError, ValueError):
+            out.append({"name": n[: -len(FAILED_SUFFIX)], "failed_at": "", "error": "unreadable failure record"})
+    return out
+
+
+def rotate_snapshots(keep: int = SNAPSHOT_KEEP):
+    """Delete all but the newest keep snapshots and failure records. Returns the names removed."""
+    removed = []
+    stale = [s["name"] for s in list_snapshots()[max(keep, 1):]]
+    stale += [s["name"] + FAILED_SUFFIX for s in list_failed_snapshots()[max(keep, 1):]]
+    for name in stale:
+        try:
+            os.remove(_snapshot_path(name))
+            removed.append(name)
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+def restore_snapshot(name: str):
+    """
+    Put every table, settings.json and the seat state back as they were in the snapshot.
+    Meant for the CLI with the app stopped: a running process in write-behind mode
+    would flush its in-memory tables over the restored files.
+    """
+    name = os.path.basename(name or "")
+    if not SNAPSHOT_RE.match(name) or not os.path.exists(_snapshot_path(name)):
+        raise FileNotFoundError(name)
+
+    with tarfile.open(_snapshot_path(name), "r:gz") as tar:
+        members = {m.name: tar.extractfile(m).read() for m in tar.getmembers() if m.isfile()}
+    manifest = json.loads(members["manifest.json"])
+
+    for path in manifest["files"]:
+        if path not in RESTORABLE:
+            continue
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(members[path])
+        os.replace(tmp, path)
+    if SCHEDULES_LOG not in manifest["files"] and os.path.exists(SCHEDULES_LOG):
+        os.remove(SCHEDULES_LOG)
+    # journaled or in-memory saves were made after this snapshot; keeping them would undo the restore
+    discard_write_behind()
+
+    for table in TABLE_FILES:
+        bump_table_version(table)
+    import_seat_tables(json.loads(members.get("seats.json") or b"{}"))
+    return manifest
+
+
+def _scheduler_loop():
+    interval = SNAPSHOT_INTERVAL_MINUTES * 60
+    while True:
+        try:
+            snaps = list_snapshots()
+            # other worker processes run the same loop; the newest archive on disk is shared
+            age = time.time() - os.stat(_snapshot_path(snaps[0]["name"])).st_mtime if snaps else interval
+            if age >= interval:
+                age = 0
+                take_snapshot(wait=True)
+        except Exception:
+            # a failed archive write is also recorded as <name>.failed; a failed capture only here
+            log.exception("scheduled snapshot failed")
+        time.sleep(max(interval - age, 60))
+
+
+def start_snapshot_scheduler():
+    global _scheduler
+    if SNAPSHOT_INTERVAL_MINUTES <= 0 or _scheduler is not None:
+        return
+    _scheduler = threading.Thread(target=_scheduler_loop, daemon=True)
+    _scheduler.start()
@@ -0,0 +1,117 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from config import STATE_DB
+
+# Runtime state shared by every worker process lives in one SQLite file next to
+# settings.json. SQLite gives us cross-process atomic updates without a server.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    signature TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS seat_counts (
+    course_code TEXT PRIMARY KEY,
+    taken INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS seat_holders (
+    course_code TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    PRIMARY KEY (course_code, student_id)
+);
+CREATE INDEX IF NOT EXISTS seat_holders_by_student ON seat_holders (student_id);
+CREATE TABLE IF NOT EXISTS waitlist (
+    course_code TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (course_code, student_id)
+);
+CREATE INDEX IF NOT EXISTS waitlist_by_time ON waitlist (course_code, created_at, student_id);
+CREATE INDEX IF NOT EXISTS waitlist_by_priority ON waitlist (course_code, priority, created_at, student_id);
+CREATE INDEX IF NOT EXISTS waitlist_by_student ON waitlist (student_id);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_time ON events (created_at);
+"""
+
+_local = threading.local()
+
+
+def connect():
+    """Per-thread connection (re-opened after a fork so workers never share one)."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and getattr(_local, "pid", None) == os.getpid():
+        return conn
+    conn = sqlite3.connect(STATE_DB, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    _local.conn = conn
+    _local.pid = os.getpid()
+    return conn
+
+
+@contextmanager
+def transaction(bump: str = ""):
+    """
+    BEGIN IMMEDIATE takes the write lock up front, so read-check-write is atomic across processes.
+    When bump names a data version and the transaction changed any rows, that version is bumped
+    in the same commit.
+    """
+    conn = connect()
+    conn.execute("BEGIN IMMEDIATE")
+    before = conn.total_changes
+    try:
+        yield conn
+        if bump and conn.total_changes != before:
+            bump_version(conn, bump)
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def bump_version(conn, name: str, signature: str = ""):
+    conn.execute(
+        "INSERT INTO versions (name, version, signature) VALUES (?, 1, ?) "
+        "ON CONFLICT(name) DO UPDATE SET version = version + 1, signature = excluded.signature",
+        (name, signature),
+    )
+
+
+def read_versions(names):
+    """name -> (version, signature) for the requested names (missing names are absent)."""
+    names = list(names)
+    if not names:
+        return {}
+    marks = ",".join("?" for _ in names)
+    rows = connect().execute(f"SELECT name, version, signature FROM versions WHERE name IN ({marks})", names)
+    return {name: (version, sig) for name, version, sig in rows}
+
+
+def init_state_db():
+    os.makedirs(os.path.dirname(STATE_DB), exist_ok=True)
+    connect().executescript(SCHEMA)
+
+
+def get_meta(key: str, default=None):
+    row = connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+
+def set_meta(conn, key: str, value):
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, str(value)),
+    )
@@ -1,6 +1,10 @@
+import atexit
 import csv
 import json
 import os
+import threading
+import time
+from contextlib import contextmanager
 
 from config import (
     STUDENTS_CSV,
@@ -8,11 +12,36 @@ from config import (
     SCHEDULES_CSV,
     TEACHERS_CSV,
     APPROVALS_CSV,
+    PREREQUISITES_CSV,
+    COURSE_HISTORY_CSV,
     SETTINGS_JSON,
+    SCHEDULES_LOG,
+    SCHEDULES_HISTORY_LOG,
+    SCHEDULES_LOG_COMPACT_BYTES,
     MAX_ACADEMIC_COURSES,
     MAX_ELECTIVE_CHOICES,
     DEFAULT_SUBJECT_COLORS,
+    WRITE_BEHIND,
+    WRITE_BEHIND_FLUSH_MS,
+    WRITE_BEHIND_FSYNC,
+    WRITE_BEHIND_JOURNAL,
 )
+from app.statedb import transaction, bump_version, read_versions
+from app.records import Student, Course, Schedule, Approval, course_code_of, plain
+
+# Every data file has a version counter in the runtime database. Writers bump
+# it; readers compare the stored file signature so edits made outside the app
+# (or by an upload that saves the file directly) also produce a new version.
+TABLE_FILES = {
+    "students": STUDENTS_CSV,
+    "courses": COURSES_CSV,
+    "schedules": SCHEDULES_CSV,
+    "teachers": TEACHERS_CSV,
+    "approvals": APPROVALS_CSV,
+    "prerequisites": PREREQUISITES_CSV,
+    "course_history": COURSE_HISTORY_CSV,
+    "settings": SETTINGS_JSON,
+}
 
 
 def _boolish(v):
@@ -22,14 +51,108 @@ def _boolish(v):
     return s in ("1", "true", "yes", "y", "on")
 
 
+def file_signature(path):
+    """Cheap change marker for a data file: (mtime_ns, size), or None if missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+@contextmanager
+def _replace_file(path, **open_kw):
+    """Write to a temp file and rename over path, so readers (and snapshots) never see a half-written table."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8", **open_kw) as f:
+        yield f
+    os.replace(tmp, path)
+
+
+def _sig_text(name):
+    path = TABLE_FILES.get(name)
+    sig = file_signature(path) if path else None
+    return f"{sig[0]}:{sig[1]}" if sig else ""
+
+
+def bump_table_version(name: str):
+    with transaction() as conn:
+        bump_version(conn, name, _sig_text(name))
+
+
+def table_versions(*names):
+    """
+    name -> current version for each requested table; one small query in the common case.
+    Non-file versions (e.g. "seats") are maintained by their own modules.
+    """
+    stored = read_versions(names)
+    current = {n: _sig_text(n) for n in names if n in TABLE_FILES}
+    stale = [n for n, sig in current.items() if stored.get(n, (0, ""))[1] != sig]
+    if stale:
+        with transaction() as conn:
+            for n in stale:
+                row = conn.execute("SELECT signature FROM versions WHERE name = ?", (n,)).fetchone()
+                if not row or row[0] != current[n]:
+                    bump_version(conn, n, current[n])
+        stored = read_versions(names)
+    return {n: stored.get(n, (0, ""))[0] for n in names}
+
+
+def capture_tables(extra=None, attempts: int = 20):
+    """
+    Point-in-time copy of every data file and settings.json without taking the write lock.
+
+    Version barrier: every table version (plus "seats") is read before and after the
+    files are copied; a writer that committed in between changes a version and the copy
+    is simply retried, so writers never wait on a backup. extra(), if given, runs inside
+    the same window (used for the seat tables). Returns (versions, {path: bytes}, extra result).
+    """
+    names = sorted(TABLE_FILES) + ["seats"]
+    if WRITE_BEHIND:
+        flush_write_behind()
+    for _ in range(attempts):
+        before = table_versions(*names)
+        files = {}
+        for path in list(TABLE_FILES.values()) + [SCHEDULES_LOG]:
+            try:
+                with open(path, "rb") as f:
+                    files[path] = f.read()
+            except FileNotFoundError:
+                continue
+        if SCHEDULES_LOG in files:
+            # a record still being appended belongs to the next snapshot
+            files[SCHEDULES_LOG] = files[SCHEDULES_LOG][: files[SCHEDULES_LOG].rfind(b"\n") + 1]
+        extra_out = extra() if extra else None
+        if table_versions(*names) == before:
+            return before, files, extra_out
+        time.sleep(0.05)
+    raise RuntimeError("tables kept changing; snapshot not taken")
+
+
+def read_consistent(build, tables, attempts: int = 5):
+    """
+    build() run behind the same version barrier as capture_tables: retried when any of
+    tables changed while it ran, so a response assembled from several tables reflects
+    one point in time. After attempts tries the last result is returned as is.
+    """
+    out = None
+    for _ in range(attempts):
+        before = table_versions(*tables)
+        out = build()
+        if table_versions(*tables) == before:
+            break
+    return out
+
+
 def read_settings():
     with open(SETTINGS_JSON, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
 def write_settings(newdata):
-    with open(SETTINGS_JSON, "w", encoding="utf-8") as f:
+    with _replace_file(SETTINGS_JSON) as f:
         json.dump(newdata, f, indent=2)
+    bump_table_version("settings")
 
 
 def ensure_dirs_and_files():
@@ -166,6 +289,18 @@ def ensure_dirs_and_files():
             w = csv.writer(f)
             w.writerow(["student_id", "course_code", "status", "teacher_email", "updated_at", "note"])
 
+    # prerequisites.csv (optional extra prerequisite edges, one per row)
+    if not os.path.exists(PREREQUISITES_CSV):
+        with open(PREREQUISITES_CSV, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["course_code", "prerequisite_code"])
+
+    # course_history.csv (courses students have already taken)
+    if not os.path.exists(COURSE_HISTORY_CSV):
+        with open(COURSE_HISTORY_CSV, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["student_id", "course_code", "passed"])
+
     # settings.json
     if not os.path.exists(SETTINGS_JSON):
         data = {
@@ -187,6 +322,11 @@ def ensure_dirs_and_files():
     if changed:
         write_settings(st)
 
+    # saves that were journaled but not yet flushed when the last process stopped
+    replay_write_behind_journal()
+    compact_schedules_log()
+    migrate_schedules_to_codes()
+
 
 def read_students():
     rows = []
@@ -194,18 +334,18 @@ def read_students():
         r = csv.DictReader(f)
         for row in r:
             rows.append(
-                {
-                    "student_id": (row.get("student_id", "") or "").strip(),
-                    "student_name": (row.get("student_name", "") or "").strip(),
-                    "grade_level": (row.get("grade_level", "") or "").strip(),
-                }
+                Student(
+                    student_id=(row.get("student_id", "") or "").strip(),
+                    student_name=(row.get("student_name", "") or "").strip(),
+                    grade_level=(row.get("grade_level", "") or "").strip(),
+                )
             )
     return rows
 
 
 def write_students(students_list):
     fieldnames = ["student_id", "student_name", "grade_level"]
-    with open(STUDENTS_CSV, "w", newline="", encoding="utf-8") as f:
+    with _replace_file(STUDENTS_CSV, newline="") as f:
         w = csv.DictWriter(f, fieldnames=fieldnames)
         w.writeheader()
         for s in students_list:
@@ -216,6 +356,7 @@ def write_students(students_list):
                     "grade_level": s["grade_level"],
                 }
             )
+    bump_table_version("students")
 
 
 def read_courses():
@@ -224,19 +365,21 @@ def read_courses():
         r = csv.DictReader(f)
         for row in r:
             rows.append(
-                {
-                    "course_code": (row.get("course_code", "") or "").strip(),
-                    "course_name": (row.get("course_name", "") or "").strip(),
-                    "subject_area": (row.get("subject_area", "") or "").strip(),
-                    "level": (row.get("level", "") or "").strip(),
-                    "description": (row.get("description", "") or "").strip(),
-                    "teacher_name": (row.get("teacher_name", "") or "").strip(),
-                    "teacher_email": (row.get("teacher_email", "") or "").strip(),
-                    "room": (row.get("room", "") or "").strip(),
-                    "grade_min": (row.get("grade_min", "") or "").strip(),
-                    "grade_max": (row.get("grade_max", "") or "").strip(),
-                    "requires_approval": _boolish(row.get("requires_approval", "FALSE")),
-                }
+                Course(
+                    course_code=(row.get("course_code", "") or "").strip(),
+                    course_name=(row.get("course_name", "") or "").strip(),
+                    subject_area=(row.get("subject_area", "") or "").strip(),
+                    level=(row.get("level", "") or "").strip(),
+                    description=(row.get("description", "") or "").strip(),
+                    teacher_name=(row.get("teacher_name", "") or "").strip(),
+                    teacher_email=(row.get("teacher_email", "") or "").strip(),
+                    room=(row.get("room", "") or "").strip(),
+                    grade_min=(row.get("grade_min", "") or "").strip(),
+                    grade_max=(row.get("grade_max", "") or "").strip(),
+                    requires_approval=_boolish(row.get("requires_approval", "FALSE")),
+                    prerequisites=(row.get("prerequisites", "") or "").strip(),
+                    capacity=(row.get("capacity", "") or "").strip(),
+                )
             )
     return rows
 
@@ -254,14 +397,17 @@ def write_courses(courses_list):
         "grade_min",
         "grade_max",
         "requires_approval",
+        "prerequisites",
+        "capacity",
     ]
-    with open(COURSES_CSV, "w", newline="", encoding="utf-8") as f:
+    with _replace_file(COURSES_CSV, newline="") as f:
         w = csv.DictWriter(f, fieldnames=fieldorder)
         w.writeheader()
         for c in courses_list:
             row = {k: c.get(k, "") for k in fieldorder}
             row["requires_approval"] = "TRUE" if _boolish(c.get("requires_approval", False)) else "FALSE"
             w.writerow(row)
+    bump_table_version("courses")
 
 
 def append_course_row(rowdict):
@@ -277,7 +423,16 @@ def append_course_row(rowdict):
         "grade_min",
         "grade_max",
         "requires_approval",
+        "prerequisites",
+        "capacity",
     ]
+    with open(COURSES_CSV, "r", encoding="utf-8") as f:
+        header = next(csv.reader(f), [])
+    if any(k not in header for k in fieldorder):
+        # older courses.csv without the optional columns: rewrite once with the full header
+        write_courses(read_courses() + [rowdict])
+        return
+
     with open(COURSES_CSV, "a", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
         row = []
@@ -287,35 +442,221 @@ def append_course_row(rowdict):
             else:
                 row.append(rowdict.get(k, ""))
         w.writerow(row)
+    bump_table_version("courses")
 
 
 def read_schedules():
+    if WRITE_BEHIND:
+        return _wb_read("schedules")
+    return _load_schedules()
+
+
+def write_schedules(sched_list):
+    """Replace the whole table (bulk edits); folds any pending log records into the CSV."""
+    if WRITE_BEHIND:
+        _wb_write("schedules", sched_list)
+        return
+    _store_schedules(sched_list)
+
+
+def read_schedule(student_id: str):
+    """One student's schedule (a copy), or None; a lookup in the cached table, not a full read."""
+    if WRITE_BEHIND:
+        return _wb_get("schedules", student_id)
+    with _sched_lock:
+        row = _refresh_schedules_locked().get(student_id)
+        return row.copy() if row is not None else None
+
+
+def save_schedule_row(row):
+    """Insert or replace one student's schedule: appends one log record instead of rewriting the CSV."""
+    if WRITE_BEHIND:
+        _wb_upsert("schedules", row)
+        return
+    _log_schedule_change({"op": "upsert", "row": row})
+
+
+def delete_schedule_row(student_id: str):
+    if WRITE_BEHIND:
+        _wb_delete("schedules", student_id)
+        return
+    _log_schedule_change({"op": "delete", "student_id": student_id})
+
+
+# ---------------------------------------------------------------------------
+# schedules.log: append-only change records replayed over schedules.csv
+#
+# Appends, compaction and full rewrites all run under the runtime database
+# write lock (BEGIN IMMEDIATE), which works across worker processes on every
+# platform. Readers keep a per-process cache of the base table plus the log
+# offset they have applied, so a read only parses records appended since the
+# last one. Replaying a record twice is harmless (upserts carry the full row),
+# so a reader that races a compaction at worst re-applies already folded
+# records and then reloads on its next call.
+# ---------------------------------------------------------------------------
+
+_sched_lock = threading.Lock()
+_sched_cache = {"base_sig": None, "log_id": None, "log_pos": 0, "rows": {}}
+
+
+def _log_identity():
+    try:
+        st = os.stat(SCHEDULES_LOG)
+    except OSError:
+        return None, 0
+    return (st.st_dev, st.st_ino), st.st_size
+
+
+def _apply_schedule_record(rows, rec):
+    if rec.get("op") == "upsert" and rec.get("row", {}).get("student_id"):
+        row = Schedule.from_dict(rec["row"])
+        rows[row["student_id"]] = row
+    elif rec.get("op") == "delete":
+        rows.pop(rec.get("student_id", ""), None)
+
+
+def _load_schedules():
+    with _sched_lock:
+        return _copy_rows("schedules", _refresh_schedules_locked().values())
+
+
+def _refresh_schedules_locked():
+    """The cached student_id -> row map, brought up to date with the CSV and log; caller holds _sched_lock."""
+    cache = _sched_cache
+    base_sig = file_signature(SCHEDULES_CSV)
+    log_id, log_size = _log_identity()
+    if base_sig != cache["base_sig"] or log_id != cache["log_id"] or log_size < cache["log_pos"]:
+        cache["rows"] = {r["student_id"]: r for r in _read_schedules_file()}
+        cache["base_sig"] = base_sig
+        cache["log_id"] = log_id
+        cache["log_pos"] = 0
+    if log_id is not None and log_size > cache["log_pos"]:
+        with open(SCHEDULES_LOG, "rb") as f:
+            f.seek(cache["log_pos"])
+            chunk = f.read(log_size - cache["log_pos"])
+        # only complete lines; a record still being written is picked up next time
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].splitlines():
+            try:
+                _apply_schedule_record(cache["rows"], json.loads(line))
+            except ValueError:
+                continue
+        cache["log_pos"] += end
+    return cache["rows"]
+
+
+def _log_schedule_change(rec):
+    rec = dict(rec, ts=time.strftime("%Y-%m-%d %H:%M:%S"))
+    line = (json.dumps(rec, default=plain) + "\n").encode("utf-8")
+    with transaction() as conn:
+        with open(SCHEDULES_LOG, "ab") as f:
+            f.write(line)
+            size = f.tell()
+        bump_version(conn, "schedules", _sig_text("schedules"))
+    if size >= SCHEDULES_LOG_COMPACT_BYTES:
+        compact_schedules_log()
+
+
+def _store_schedules(sched_list):
+    with transaction() as conn:
+        _write_schedules_file(sched_list, conn)
+        _archive_schedules_log()
+
+
+def _archive_schedules_log():
+    """Move the log records into the history file and start a fresh (new inode) log."""
+    if not os.path.exists(SCHEDULES_LOG):
+        return
+    with open(SCHEDULES_LOG, "rb") as f:
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    if end:
+        with open(SCHEDULES_HISTORY_LOG, "ab") as h:
+            h.write(data[:end])
+    os.remove(SCHEDULES_LOG)
+
+
+def compact_schedules_log():
+    """Fold schedules.log into schedules.csv. Returns the number of records folded."""
+    with transaction() as conn:
+        if not os.path.exists(SCHEDULES_LOG):
+            return 0
+        rows = _load_schedules()
+        with open(SCHEDULES_LOG, "rb") as f:
+            folded = f.read().count(b"\n")
+        _write_schedules_file(rows, conn)
+        _archive_schedules_log()
+    return folded
+
+
+def migrate_schedules_to_codes():
+    """
+    Rewrite schedules.csv rows that still hold "Name (CODE)" display strings
+    so every course cell is a bare course code. Returns the number of rows rewritten.
+    """
+    cols = [f"period_{i+1}" for i in range(MAX_ACADEMIC_COURSES)] + [
+        f"elective_{j+1}" for j in range(MAX_ELECTIVE_CHOICES)
+    ]
+    with transaction() as conn:
+        changed = 0
+        with open(SCHEDULES_CSV, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                cells = [(row.get(c, "") or "").strip() for c in cols]
+                if any(v and course_code_of(v) != v for v in cells):
+                    changed += 1
+        if changed:
+            # Schedule records normalize to codes on load, so a plain rewrite migrates
+            _write_schedules_file(_load_schedules(), conn)
+    return changed
+
+
+def schedule_history(student_id: str = ""):
+    """Every logged schedule change (oldest first), optionally for one student."""
+    out = []
+    for path in (SCHEDULES_HISTORY_LOG, SCHEDULES_LOG):
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                sid = rec.get("student_id") or rec.get("row", {}).get("student_id", "")
+                if not student_id or sid == student_id:
+                    out.append(rec)
+    return out
+
+
+def _read_schedules_file():
     out = []
     with open(SCHEDULES_CSV, "r", encoding="utf-8") as f:
         r = csv.DictReader(f)
         for row in r:
-            obj = {
-                "student_id": (row.get("student_id", "") or "").strip(),
-                "student_name": (row.get("student_name", "") or "").strip(),
-                "grade_level": (row.get("grade_level", "") or "").strip(),
-                "academic_courses": [],
-                "elective_courses": [],
-                "special_instructions": (row.get("special_instructions", "") or "").strip(),
-                "reviewed": _boolish(row.get("reviewed", "FALSE")),
-            }
+            academic = []
+            elective = []
             for i in range(MAX_ACADEMIC_COURSES):
                 v = (row.get(f"period_{i+1}", "") or "").strip()
                 if v:
-                    obj["academic_courses"].append(v)
+                    academic.append(v)
             for j in range(MAX_ELECTIVE_CHOICES):
                 v = (row.get(f"elective_{j+1}", "") or "").strip()
                 if v:
-                    obj["elective_courses"].append(v)
+                    elective.append(v)
+            obj = Schedule(
+                student_id=(row.get("student_id", "") or "").strip(),
+                student_name=(row.get("student_name", "") or "").strip(),
+                grade_level=(row.get("grade_level", "") or "").strip(),
+                academic_courses=academic,
+                elective_courses=elective,
+                special_instructions=(row.get("special_instructions", "") or "").strip(),
+                reviewed=_boolish(row.get("reviewed", "FALSE")),
+            )
             out.append(obj)
     return out
 
 
-def write_schedules(sched_list):
+def _write_schedules_file(sched_list, conn=None):
     header = ["student_id", "student_name", "grade_level"]
     for i in range(MAX_ACADEMIC_COURSES):
         header.append(f"period_{i+1}")
@@ -324,7 +665,9 @@ def write_schedules(sched_list):
     header.append("special_instructions")
     header.append("reviewed")
 
-    with open(SCHEDULES_CSV, "w", newline="", encoding="utf-8") as f:
+    # temp file + rename: a crash mid-write never leaves a truncated table behind
+    tmp = SCHEDULES_CSV + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
         w = csv.DictWriter(f, fieldnames=header)
         w.writeheader()
         for row in sched_list:
@@ -340,6 +683,11 @@ def write_schedules(sched_list):
             for j in range(MAX_ELECTIVE_CHOICES):
                 flat[f"elective_{j+1}"] = row["elective_courses"][j] if j < len(row["elective_courses"]) else ""
             w.writerow(flat)
+    os.replace(tmp, SCHEDULES_CSV)
+    if conn is not None:
+        bump_version(conn, "schedules", _sig_text("schedules"))
+    else:
+        bump_table_version("schedules")
 
 
 def read_teachers():
@@ -357,27 +705,51 @@ def read_teachers():
     return out
 
 
+def write_teachers(teachers_list):
+    fieldnames = ["teacher_email", "teacher_name", "password"]
+    with _replace_file(TEACHERS_CSV, newline="") as f:
+        w = csv.DictWriter(f, fieldnames=fieldnames)
+        w.writeheader()
+        for t in teachers_list:
+            w.writerow({k: t.get(k, "") for k in fieldnames})
+    bump_table_version("teachers")
+
+
 def read_approvals():
+    if WRITE_BEHIND:
+        return _wb_read("approvals")
+    return _read_approvals_file()
+
+
+def write_approvals(rows):
+    if WRITE_BEHIND:
+        _wb_write("approvals", rows)
+        return
+    _write_approvals_file(rows)
+
+
+def _read_approvals_file():
     out = []
     with open(APPROVALS_CSV, "r", encoding="utf-8") as f:
         r = csv.DictReader(f)
         for row in r:
             out.append(
-                {
-                    "student_id": (row.get("student_id", "") or "").strip(),
-                    "course_code": (row.get("course_code", "") or "").strip(),
-                    "status": (row.get("status", "") or "").strip().lower(),
-                    "teacher_email": (row.get("teacher_email", "") or "").strip().lower(),
-                    "updated_at": (row.get("updated_at", "") or "").strip(),
-                    "note": (row.get("note", "") or "").strip(),
-                }
+                Approval(
+                    student_id=(row.get("student_id", "") or "").strip(),
+                    course_code=(row.get("course_code", "") or "").strip(),
+                    status=(row.get("status", "") or "").strip().lower(),
+                    teacher_email=(row.get("teacher_email", "") or "").strip().lower(),
+                    updated_at=(row.get("updated_at", "") or "").strip(),
+                    note=(row.get("note", "") or "").strip(),
+                )
             )
     return out
 
 
-def write_approvals(rows):
+def _write_approvals_file(rows):
     header = ["student_id", "course_code", "status", "teacher_email", "updated_at", "note"]
-    with open(APPROVALS_CSV, "w", newline="", encoding="utf-8") as f:
+    tmp = APPROVALS_CSV + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
         w = csv.DictWriter(f, fieldnames=header)
         w.writeheader()
         for r in rows:
@@ -391,3 +763,229 @@ def write_approvals(rows):
                     "note": r.get("note", ""),
                 }
             )
+    os.replace(tmp, APPROVALS_CSV)
+    bump_table_version("approvals")
+
+
+def read_prerequisites():
+    out = []
+    with open(PREREQUISITES_CSV, "r", encoding="utf-8") as f:
+        r = csv.DictReader(f)
+        for row in r:
+            out.append(
+                {
+                    "course_code": (row.get("course_code", "") or "").strip(),
+                    "prerequisite_code": (row.get("prerequisite_code", "") or "").strip(),
+                }
+            )
+    return out
+
+
+def write_prerequisites(rows):
+    header = ["course_code", "prerequisite_code"]
+    with _replace_file(PREREQUISITES_CSV, newline="") as f:
+        w = csv.DictWriter(f, fieldnames=header)
+        w.writeheader()
+        for r in rows:
+            w.writerow({k: r.get(k, "") for k in header})
+    bump_table_version("prerequisites")
+
+
+def read_course_history():
+    out = []
+    with open(COURSE_HISTORY_CSV, "r", encoding="utf-8") as f:
+        r = csv.DictReader(f)
+        for row in r:
+            out.append(
+                {
+                    "student_id": (row.get("student_id", "") or "").strip(),
+                    "course_code": (row.get("course_code", "") or "").strip(),
+                    "passed": _boolish(row.get("passed", "TRUE") or "TRUE"),
+                }
+            )
+    return out
+
+
+def write_course_history(rows):
+    header = ["student_id", "course_code", "passed"]
+    with _replace_file(COURSE_HISTORY_CSV, newline="") as f:
+        w = csv.DictWriter(f, fieldnames=header)
+        w.writeheader()
+        for r in rows:
+            w.writerow(
+                {
+                    "student_id": r.get("student_id", ""),
+                    "course_code": r.get("course_code", ""),
+                    "passed": "TRUE" if _boolish(r.get("passed", True)) else "FALSE",
+                }
+            )
+    bump_table_version("course_history")
+
+
+# ---------------------------------------------------------------------------
+# Write-behind for the hot tables (schedules, approvals)
+#
+# With WRITE_BEHIND on, the in-memory copy of each table is authoritative:
+# reads and writes go to memory, every write appends only the changed rows to
+# a small journal (fsync'd unless WRITE_BEHIND_FSYNC is off), and a background
+# thread rewrites the CSV at most once per WRITE_BEHIND_FLUSH_MS. A clean
+# shutdown flushes; after a crash the journal is replayed on startup.
+# Only safe when a single process serves the app.
+# ---------------------------------------------------------------------------
+
+_RECORD_TYPES = {"schedules": Schedule, "approvals": Approval}
+_WB_KEYS = {
+    "schedules": lambda r: r["student_id"],
+    "approvals": lambda r: f"{r['student_id']}\t{r['course_code']}",
+}
+_WB_FILES = {
+    "schedules": (_load_schedules, _store_schedules),
+    "approvals": (_read_approvals_file, _write_approvals_file),
+}
+
+_wb_lock = threading.RLock()
+_wb_tables = {}  # table -> {row key: row}, in table order
+_wb_dirty = set()
+_wb_flusher = None
+
+
+def _copy_rows(table, rows):
+    # cached rows are handed out as copies so callers can edit them freely
+    cls = _RECORD_TYPES[table]
+    return [r.copy() if type(r) is cls else cls.from_dict(r) for r in rows]
+
+
+def _wb_table(table):
+    # caller holds _wb_lock
+    if table not in _wb_tables:
+        key = _WB_KEYS[table]
+        _wb_tables[table] = {key(r): r for r in _WB_FILES[table][0]()}
+    return _wb_tables[table]
+
+
+def _wb_read(table):
+    with _wb_lock:
+        return _copy_rows(table, _wb_table(table).values())
+
+
+def _wb_get(table, k):
+    with _wb_lock:
+        row = _wb_table(table).get(k)
+        return row.copy() if row is not None else None
+
+
+def _wb_changed(table, entry):
+    # caller holds _wb_lock
+    _journal_append({"t": table, **entry})
+    _wb_dirty.add(table)
+    _start_flusher()
+
+
+def _wb_write(table, rows):
+    """Replace the whole table (bulk edits); journals only the rows that differ."""
+    rows = _copy_rows(table, rows)
+    key = _WB_KEYS[table]
+    new_map = {key(r): r for r in rows}
+    with _wb_lock:
+        old_map = _wb_table(table)
+        upsert = [r for k, r in new_map.items() if old_map.get(k) != r]
+        delete = [k for k in old_map if k not in new_map]
+        _wb_tables[table] = new_map
+        if upsert or delete:
+            _wb_changed(table, {"upsert": upsert, "delete": delete})
+    bump_table_version(table)
+
+
+def _wb_upsert(table, row):
+    """Insert or replace one row in place; only that row is journaled."""
+    (row,) = _copy_rows(table, [row])
+    with _wb_lock:
+        _wb_table(table)[_WB_KEYS[table](row)] = row
+        _wb_changed(table, {"upsert": [row], "delete": []})
+    bump_table_version(table)
+
+
+def _wb_delete(table, k):
+    with _wb_lock:
+        if _wb_table(table).pop(k, None) is None:
+            return
+        _wb_changed(table, {"upsert": [], "delete": [k]})
+    bump_table_version(table)
+
+
+def _journal_append(entry):
+    with open(WRITE_BEHIND_JOURNAL, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, default=plain) + "\n")
+        f.flush()
+        if WRITE_BEHIND_FSYNC:
+            os.fsync(f.fileno())
+
+
+def _start_flusher():
+    global _wb_flusher
+    if _wb_flusher is not None and _wb_flusher.is_alive():
+        return
+    _wb_flusher = threading.Thread(target=_flush_loop, name="write-behind-flusher", daemon=True)
+    _wb_flusher.start()
+
+
+def _flush_loop():
+    while True:
+        time.sleep(max(WRITE_BEHIND_FLUSH_MS, 10) / 1000.0)
+        flush_write_behind()
+
+
+def flush_write_behind():
+    """Rewrite every dirty table once and drop the journal entries they covered."""
+    with _wb_lock:
+        if not _wb_dirty:
+            return
+        for table in sorted(_wb_dirty):
+            _WB_FILES[table][1](list(_wb_tables[table].values()))
+        _wb_dirty.clear()
+        open(WRITE_BEHIND_JOURNAL, "w").close()
+
+
+def discard_write_behind():
+    """Forget in-memory tables and the journal so the next read loads the files (snapshot restore)."""
+    with _wb_lock:
+        _wb_tables.clear()
+        _wb_dirty.clear()
+        if os.path.exists(WRITE_BEHIND_JOURNAL):
+            os.remove(WRITE_BEHIND_JOURNAL)
+
+
+def replay_write_behind_journal():
+    """Apply journal entries left behind by a crash to the CSV files, then clear the journal."""
+    if not os.path.exists(WRITE_BEHIND_JOURNAL) or os.path.getsize(WRITE_BEHIND_JOURNAL) == 0:
+        return 0
+    tables = {}
+    applied = 0
+    with open(WRITE_BEHIND_JOURNAL, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break  # torn final line from the crash
+            table = entry.get("t")
+            if table not in _WB_FILES:
+                continue
+            key = _WB_KEYS[table]
+            if table not in tables:
+                tables[table] = {key(r): r for r in _WB_FILES[table][0]()}
+            rows = tables[table]
+            for k in entry.get("delete", []):
+                rows.pop(k, None)
+            for r in entry.get("upsert", []):
+                rows[key(r)] = _RECORD_TYPES[table].from_dict(r)
+            applied += 1
+    with _wb_lock:
+        for table, rows in tables.items():
+            _WB_FILES[table][1](list(rows.values()))
+            _wb_tables.pop(table, None)
+        open(WRITE_BEHIND_JOURNAL, "w").close()
+    return applied
+
+
+if WRITE_BEHIND:
+    atexit.register(flush_write_behind)
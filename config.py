@@ -15,13 +15,70 @@ COURSES_CSV   = os.path.join(DATA_DIR, "courses.csv")
 SCHEDULES_CSV = os.path.join(DATA_DIR, "schedules.csv")
 TEACHERS_CSV  = os.path.join(DATA_DIR, "teachers.csv")
 APPROVALS_CSV = os.path.join(DATA_DIR, "approvals.csv")
+PREREQUISITES_CSV = os.path.join(DATA_DIR, "prerequisites.csv")
+COURSE_HISTORY_CSV = os.path.join(DATA_DIR, "course_history.csv")
+
+# Schedule saves append one line to schedules.log; readers replay it over schedules.csv.
+# Once the log passes SCHEDULES_LOG_COMPACT_BYTES it is folded back into the CSV and its
+# records move to schedules_history.log (the permanent change history).
+SCHEDULES_LOG = os.path.join(DATA_DIR, "schedules.log")
+SCHEDULES_HISTORY_LOG = os.path.join(DATA_DIR, "schedules_history.log")
+SCHEDULES_LOG_COMPACT_BYTES = int(os.environ.get("SCHEDULER_SCHEDULES_LOG_COMPACT_BYTES", str(256 * 1024)))
 
 SETTINGS_JSON = os.path.join(STATE_DIR, "settings.json")
 
+# Small SQLite database for cross-process runtime state (seat counters, etc.)
+STATE_DB = os.path.join(STATE_DIR, "runtime.db")
+
+# What-if simulation results and worker processes
+SIMULATIONS_DIR = os.path.join(STATE_DIR, "simulations")
+SIMULATION_WORKERS = int(os.environ.get("SCHEDULER_SIMULATION_WORKERS", "2"))
+
+# Optional write-behind for schedules.csv / approvals.csv (single-process deployments only).
+# Saves go to memory plus a small fsync'd journal; a background thread rewrites the CSVs
+# at most once per WRITE_BEHIND_FLUSH_MS, and on shutdown.
+WRITE_BEHIND = os.environ.get("SCHEDULER_WRITE_BEHIND", "").lower() in ("1", "true", "yes", "on")
+WRITE_BEHIND_FLUSH_MS = int(os.environ.get("SCHEDULER_WRITE_BEHIND_FLUSH_MS", "500"))
+WRITE_BEHIND_FSYNC = os.environ.get("SCHEDULER_WRITE_BEHIND_FSYNC", "1").lower() not in ("0", "false", "no", "off")
+WRITE_BEHIND_JOURNAL = os.path.join(STATE_DIR, "writebehind.journal")
+
+# Point-in-time snapshots of every table, settings.json and the seat state
+# (python manage.py snapshot / restore). SNAPSHOT_INTERVAL_MINUTES > 0 also takes
+# one in the background on that schedule; the newest SNAPSHOT_KEEP are kept.
+SNAPSHOTS_DIR = os.path.join(STATE_DIR, "snapshots")
+SNAPSHOT_KEEP = int(os.environ.get("SCHEDULER_SNAPSHOT_KEEP", "14"))
+SNAPSHOT_INTERVAL_MINUTES = int(os.environ.get("SCHEDULER_SNAPSHOT_INTERVAL_MINUTES", "0"))
+
+# Front-end assets are minified, content-hashed and precompressed into
+# static/dist at startup (or python manage.py build-assets); pages link the
+# hashed names through static/dist/manifest.json and browsers keep them for a year.
+# Unlike the data paths these live next to the code, wherever the app is started from.
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+ASSETS_DIST_DIR = os.path.join(STATIC_DIR, "dist")
+ASSET_FILES = ("styles.css", "main.js", "teacher-description.js")
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+# gzip/brotli for API responses: bodies under COMPRESS_MIN_BYTES go out as is;
+# compressed bodies of ETag-tagged responses are kept (newest COMPRESS_CACHE_ENTRIES)
+# so a repeat of the same data is not compressed again.
+COMPRESS_MIN_BYTES = int(os.environ.get("SCHEDULER_COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_LEVEL = 6
+COMPRESS_CACHE_ENTRIES = 256
+
+# Large list endpoints stream their JSON in chunks of about STREAM_CHUNK_BYTES;
+# serialized rows are kept per row (up to FRAGMENT_CACHE_ENTRIES) and reused
+# until that row's inputs change.
+STREAM_CHUNK_BYTES = 64 * 1024
+FRAGMENT_CACHE_ENTRIES = 50000
+
 # Limits
 MAX_ACADEMIC_COURSES = 7
 MAX_ELECTIVE_CHOICES = 5
 
+# Waitlist ranking for full courses: "timestamp" (first come, first served)
+# or "priority" (elective #1 before #2 ..., academic picks first; ties by time)
+WAITLIST_ORDER = os.environ.get("SCHEDULER_WAITLIST_ORDER", "timestamp")
+
 # Default colors for subject/areas
 DEFAULT_SUBJECT_COLORS = {
     "ELA": "#2563eb",
@@ -0,0 +1,161 @@
+"""
+Maintenance commands.
+
+  python manage.py bench-memory [--students N]
+  python manage.py migrate-schedules
+  python manage.py snapshot
+  python manage.py snapshots
+  python manage.py restore NAME
+  python manage.py build-assets
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    rows = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, rows
+
+
+def cmd_bench_memory(args):
+    """Resident size of synthetic tables as plain dicts vs the slotted records from app.records."""
+    from app.records import Student, Course, Schedule, Approval
+
+    n = args.students
+    grades = ["9", "10", "11", "12"]
+    codes = [f"C{i:03d}" for i in range(120)]
+    displays = [f"Course {c} ({c})" for c in codes]
+
+    def own(s):
+        # a fresh copy per row, the way csv.DictReader hands strings out
+        return "".join(list(s))
+
+    def student(i):
+        return {"student_id": str(100000 + i), "student_name": f"Student {i}", "grade_level": own(grades[i % 4])}
+
+    def course(i):
+        return {
+            "course_code": own(codes[i]), "course_name": f"Course {i}", "subject_area": own("Science"),
+            "level": own("Regular"), "description": "", "teacher_name": own("Teacher"),
+            "teacher_email": f"t{i % 20}@school.org", "room": "", "grade_min": own("9"), "grade_max": own("12"),
+            "requires_approval": i % 5 == 0, "prerequisites": "", "capacity": own("24"),
+        }
+
+    def schedule(i):
+        return {
+            "student_id": str(100000 + i), "student_name": f"Student {i}", "grade_level": own(grades[i % 4]),
+            "academic_courses": [own(displays[(i + k) % 120]) for k in range(7)],
+            "elective_courses": [own(displays[(i + k * 3) % 120]) for k in range(5)],
+            "special_instructions": "", "reviewed": False,
+        }
+
+    def approval(i):
+        return {
+            "student_id": str(100000 + i // 2), "course_code": own(codes[i % 120]), "status": own("pending"),
+            "teacher_email": f"t{i % 20}@school.org", "updated_at": own("2025-01-01 08:00:00"), "note": "",
+        }
+
+    tables = [
+        ("students", n, student, Student),
+        ("courses", len(codes), course, Course),
+        ("schedules", n, schedule, Schedule),
+        ("approvals", n * 2, approval, Approval),
+    ]
+    print(f"{'table':<10} {'rows':>7} {'dict rows':>12} {'records':>12} {'saved':>7}")
+    total_d = total_r = 0
+    for name, count, make, cls in tables:
+        d_size, _ = _measure(lambda: [make(i) for i in range(count)])
+        r_size, _ = _measure(lambda: [cls(**make(i)) for i in range(count)])
+        total_d += d_size
+        total_r += r_size
+        print(f"{name:<10} {count:>7} {d_size / 1024:>10.0f}KB {r_size / 1024:>10.0f}KB {1 - r_size / d_size:>6.0%}")
+    print(f"{'total':<10} {'':>7} {total_d / 1024:>10.0f}KB {total_r / 1024:>10.0f}KB {1 - total_r / total_d:>6.0%}")
+
+
+def cmd_migrate_schedules(args):
+    """Convert schedules.csv course cells from display strings to course codes (also done at app startup)."""
+    from app.storage import compact_schedules_log, migrate_schedules_to_codes
+
+    compact_schedules_log()
+    n = migrate_schedules_to_codes()
+    print(f"migrated {n} schedule row(s)" if n else "schedules.csv already stores course codes")
+
+
+def cmd_snapshot(args):
+    from app.statedb import init_state_db
+    from app.snapshots import take_snapshot
+
+    init_state_db()
+    print(take_snapshot(wait=True))
+
+
+def cmd_snapshots(args):
+    from app.snapshots import list_snapshots, list_failed_snapshots
+
+    for snap in list_snapshots():
+        print(f"{snap['name']}  {snap['taken_at']}  {snap['size'] / 1024:.0f}KB")
+    for snap in list_failed_snapshots():
+        print(f"{snap['name']}  {snap['failed_at']}  FAILED: {snap['error']}")
+
+
+def cmd_restore(args):
+    """Restore a snapshot; stop the app first (always when write-behind is on)."""
+    from app.statedb import init_state_db
+    from app.snapshots import list_snapshots, restore_snapshot, take_snapshot
+
+    init_state_db()
+    if args.name not in {s["name"] for s in list_snapshots()}:
+        print(f"no snapshot named {args.name}", file=sys.stderr)
+        return 1
+    if not args.no_backup:
+        # not rotated, so the snapshot being restored cannot be pruned by this one
+        print(f"current state saved as {take_snapshot(wait=True, rotate=False)}")
+    manifest = restore_snapshot(args.name)
+    print(f"restored {manifest['name']} (taken {manifest['taken_at']}): {len(manifest['files'])} files")
+
+
+def cmd_build_assets(args):
+    from app.assets import build_assets
+    from config import ASSETS_DIST_DIR
+
+    for name, hashed in build_assets().items():
+        print(f"{name} -> {ASSETS_DIST_DIR}/{hashed}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manage.py")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("bench-memory", help="compare dict rows with slotted records")
+    p.add_argument("--students", type=int, default=2000)
+    p.set_defaults(func=cmd_bench_memory)
+
+    p = sub.add_parser("snapshot", help="write a consistent snapshot of all tables")
+    p.set_defaults(func=cmd_snapshot)
+
+    p = sub.add_parser("snapshots", help="list snapshots, newest first")
+    p.set_defaults(func=cmd_snapshots)
+
+    p = sub.add_parser("restore", help="restore tables, settings and seats from a snapshot")
+    p.add_argument("name")
+    p.add_argument("--no-backup", action="store_true", help="skip the snapshot of the current state")
+    p.set_defaults(func=cmd_restore)
+
+    p = sub.add_parser("migrate-schedules", help="store course codes instead of display strings in schedules.csv")
+    p.set_defaults(func=cmd_migrate_schedules)
+
+    p = sub.add_parser("build-assets", help="minify, fingerprint and precompress the static assets")
+    p.set_defaults(func=cmd_build_assets)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -26,6 +26,127 @@
     return resp.text().then(txt => { try { return txt ? JSON.parse(txt) : null; } catch (e) { return null; } });
   }
 
+  // Conditional GET: keep the last ETag + body per URL; a 304 reuses the stored body.
+  // Returns a minimal Response-like object ({ ok, status, json() }) so callers stay unchanged.
+  const etagCache = new Map();
+  async function fetchCached(url, signal) {
+    const hit = etagCache.get(url);
+    const r = await fetch(url, { cache: "no-store", headers: hit ? { "If-None-Match": hit.etag } : {}, signal });
+    if (r.status === 304 && hit) return { ok: true, status: 200, json: async () => JSON.parse(hit.body) };
+    if (!r.ok) return r;
+    const body = await r.text();
+    const etag = r.headers.get("ETag");
+    if (etag) etagCache.set(url, { etag, body }); else etagCache.delete(url);
+    return { ok: true, status: r.status, json: async () => JSON.parse(body) };
+  }
+
+  // Shared request layer for lookups that fire while the user types or clicks:
+  // - sharedGet: identical concurrent GETs share one fetch; it is aborted only when every caller gave up
+  // - latestOnly: starting a request on a channel aborts the one still in flight, so a slow
+  //   stale response can never overwrite newer results
+  // - typeahead: latestOnly plus a debounce, so only the query the user paused on is sent
+  const sharedRequests = new Map(); // url -> { promise, controller, waiters }
+  function sharedGet(url, signal) {
+    let entry = sharedRequests.get(url);
+    if (!entry) {
+      const controller = new AbortController();
+      entry = { controller, waiters: 0, promise: null };
+      const mine = entry;
+      entry.promise = fetchCached(url, controller.signal)
+        .then(r => (r.ok ? r.json() : Promise.reject(new Error(`HTTP ${r.status}`))))
+        .finally(() => { if (sharedRequests.get(url) === mine) sharedRequests.delete(url); });
+      sharedRequests.set(url, entry);
+    }
+    const shared = entry;
+    shared.waiters++;
+    return new Promise((resolve, reject) => {
+      const onAbort = () => {
+        shared.waiters--;
+        if (shared.waiters === 0) { shared.controller.abort(); if (sharedRequests.get(url) === shared) sharedRequests.delete(url); }
+        reject(new DOMException("Aborted", "AbortError"));
+      };
+      if (signal) { if (signal.aborted) { onAbort(); return; } signal.addEventListener("abort", onAbort, { once: true }); }
+      shared.promise.then(resolve, reject).finally(() => { if (signal) signal.removeEventListener("abort", onAbort); });
+    });
+  }
+  const channelControllers = new Map();
+  function latestOnly(channel) {
+    const prev = channelControllers.get(channel);
+    if (prev) prev.abort();
+    const controller = new AbortController();
+    channelControllers.set(channel, controller);
+    return controller.signal;
+  }
+  function isAbort(err) { return err && err.name === "AbortError"; }
+  function typeahead(channel, delayMs) {
+    let timer = null;
+    return {
+      run(url, onData, onError) {
+        clearTimeout(timer);
+        const signal = latestOnly(channel);
+        timer = setTimeout(async () => {
+          try { const d = await sharedGet(url, signal); if (!signal.aborted) onData(d); }
+          catch (err) { if (!isAbort(err) && onError) onError(err); }
+        }, delayMs);
+      },
+      cancel() { clearTimeout(timer); latestOnly(channel); }
+    };
+  }
+
+  // Course catalog cached across page loads (localStorage) and revalidated by version.
+  // Searches filter it locally; per search only the small catalog state (full and
+  // not-yet-eligible course codes) is revalidated, usually as a 304.
+  const CATALOG_KEY = "arca.catalog";
+  let catalogMem = null; // { version, courses: [...] }
+  let catalogState = null; // { full: Set, ineligible: Set } for the current viewer
+  function inflateCatalog(d) { return { version: d.version, courses: (d.rows || []).map(r => { const c = {}; d.fields.forEach((f, i) => { c[f] = r[i]; }); return c; }) }; }
+  function loadStoredCatalog() {
+    if (catalogMem) return;
+    try { const d = JSON.parse(localStorage.getItem(CATALOG_KEY) || "null"); if (d && d.fields && d.rows) catalogMem = inflateCatalog(d); } catch (e) { /* unreadable: refetched below */ }
+  }
+  // take a catalog state, and the catalog itself when one came along (e.g. from the student bootstrap)
+  function applyCatalog(st, d) {
+    catalogState = { full: new Set(st.full || []), ineligible: new Set(st.ineligible || []) };
+    if (!d) return;
+    try { localStorage.setItem(CATALOG_KEY, JSON.stringify(d)); } catch (e) { /* storage full or disabled: keep it in memory only */ }
+    catalogMem = inflateCatalog(d);
+  }
+  async function refreshCatalog() {
+    const st = await sharedGet("/api/catalog/state").catch(err => null);
+    if (!st) return false;
+    loadStoredCatalog();
+    let d = null;
+    if (!catalogMem || catalogMem.version !== st.version) {
+      d = await sharedGet("/api/catalog").catch(err => null);
+      if (!d) return false;
+    }
+    applyCatalog(st, d);
+    return true;
+  }
+  // same rules as /api/courses
+  function filterCatalog(grade, subject, name) {
+    const g = parseInt(grade, 10); const subj = (subject || "").trim().toLowerCase(); const nq = (name || "").trim().toLowerCase();
+    return catalogMem.courses.filter(c => {
+      if (catalogState.ineligible.has(c.course_code)) return false;
+      if (!isNaN(g)) {
+        const lo = c.grade_min ? parseInt(c.grade_min, 10) : g; const hi = c.grade_max ? parseInt(c.grade_max, 10) : g;
+        if (!isNaN(lo) && !isNaN(hi) && (g < lo || g > hi)) return false;
+      }
+      if (subj && !(c.subject_area || "").toLowerCase().includes(subj)) return false;
+      if (nq && !`${c.course_name} ${c.course_code}`.toLowerCase().includes(nq)) return false;
+      return true;
+    }).map(c => Object.assign({}, c, { full: catalogState.full.has(c.course_code) }));
+  }
+  // render from the cache at once, then revalidate and render again only if the result changed
+  async function searchCatalog(grade, subject, name, render) {
+    loadStoredCatalog();
+    let shown = null;
+    if (catalogMem && catalogState) { const list = filterCatalog(grade, subject, name); shown = JSON.stringify(list); render(list); }
+    if (!(await refreshCatalog())) return;
+    const list = filterCatalog(grade, subject, name);
+    if (JSON.stringify(list) !== shown) render(list);
+  }
+
   function countWords(s) { if (!s) return 0; return s.trim().split(/\s+/).filter(Boolean).length; }
 
   function subjectToStyle(subj, map) {
@@ -51,6 +172,11 @@
     return `<span class="approvalTag tagPending">PENDING</span>`;
   }
 
+  function seatLabel(item) {
+    if (!item || item.seat_status !== "waitlisted") return "";
+    return `<span class="approvalTag tagPending">WAITLIST #${item.waitlist_position || "?"}</span>`;
+  }
+
   function moveItemUp(arr, idx) { if (idx <= 0) return; const tmp = arr[idx - 1]; arr[idx - 1] = arr[idx]; arr[idx] = tmp; }
   function moveItemDown(arr, idx) { if (idx >= arr.length - 1) return; const tmp = arr[idx + 1]; arr[idx + 1] = arr[idx]; arr[idx] = tmp; }
 
@@ -112,6 +238,8 @@
   const studentsCsvInput = $id("studentsCsvInput");
   const coursesCsvInput = $id("coursesCsvInput");
   const teachersCsvInput = $id("teachersCsvInput");
+  const prerequisitesCsvInput = $id("prerequisitesCsvInput");
+  const historyCsvInput = $id("historyCsvInput");
   const uploadCsvBtn = $id("uploadCsvBtn");
   const uploadMsg = $id("uploadMsg");
   const filterName = $id("filterName");
@@ -122,10 +250,14 @@
   const exportAllSchedulesBtn = $id("exportAllSchedulesBtn");
   const studentCount = $id("studentCount");
   const counselorStudentRows = $id("counselorStudentRows");
+  const studentTableScroller = $id("studentTableScroller");
   const printCardsSelectedBtn = $id("printCardsSelectedBtn");
   const printCardsAllBtn = $id("printCardsAllBtn");
+  const bulkSignOffBtn = $id("bulkSignOffBtn");
+  const bulkResetBtn = $id("bulkResetBtn");
   const rosterCourseCode = $id("rosterCourseCode");
   const rosterPrintBtn = $id("rosterPrintBtn");
+  const rosterPrintAllBtn = $id("rosterPrintAllBtn");
   const pendingApprovalCount = $id("pendingApprovalCount");
   const pendingApprovalsList = $id("pendingApprovalsList");
 
@@ -168,6 +300,8 @@
   let counselorAcademicItems = [];
   let counselorElectiveItems = [];
   let counselorEditReviewed = false;
+  let counselorPrevStudentID = null;
+  let counselorNextStudentID = null;
   let counselorHasUnsavedChanges = false;
   let counselorOriginalScheduleState = null;
 
@@ -177,6 +311,12 @@
   let counselorPage = 1;
   let counselorPerPage = 50;
   let counselorTotal = 0;
+  // checked students, kept outside the DOM because windowed rows come and go while scrolling
+  const selectedStudentIds = new Set();
+  // "Show: All" state: compact rows from the server, drawn a window at a time
+  let studentWindow = null;
+  let studentWindowFrame = 0;
+  const STUDENT_WINDOW_OVERSCAN = 10;
 
   // set spans
   if (maxAcademicSpan) maxAcademicSpan.textContent = (typeof MAX_ACADEMIC_COURSES !== "undefined") ? MAX_ACADEMIC_COURSES : "";
@@ -198,7 +338,7 @@
   // load subject colors
   async function loadSubjectColors() {
     try {
-      const r = await fetch("/api/counselor/settings");
+      const r = await fetchCached("/api/counselor/settings");
       if (!r.ok) return;
       const d = await r.json();
       subjectColors = d.subject_colors || {};
@@ -208,16 +348,15 @@
   }
 
   // -------- STUDENT --------
+  const studentFind = typeahead("studentFind", 200);
   if (studentNameInput) {
-    studentNameInput.addEventListener("input", async () => {
+    studentNameInput.addEventListener("input", () => {
       const q = studentNameInput.value.trim();
       if (!studentNameDropdown) return;
-      if (q.length < 2) { studentNameDropdown.style.display = "none"; studentNameDropdown.innerHTML = ""; return; }
-      try {
-        const r = await fetch(`/api/student/find?q=${encodeURIComponent(q)}`);
-        if (!r.ok) { studentNameDropdown.style.display = "none"; studentNameDropdown.innerHTML = ""; return; }
-        const d = await r.json();
-        if (!d.matches || d.matches.length === 0) { studentNameDropdown.style.display = "none"; studentNameDropdown.innerHTML = ""; return; }
+      const hideDropdown = () => { studentNameDropdown.style.display = "none"; studentNameDropdown.innerHTML = ""; };
+      if (q.length < 2) { studentFind.cancel(); hideDropdown(); return; }
+      studentFind.run(`/api/student/find?q=${encodeURIComponent(q.toLowerCase())}&limit=20`, d => {
+        if (!d.matches || d.matches.length === 0) { hideDropdown(); return; }
         studentNameDropdown.innerHTML = "";
         d.matches.forEach(m => {
           const opt = document.createElement("option");
@@ -228,7 +367,7 @@
           studentNameDropdown.appendChild(opt);
         });
         studentNameDropdown.style.display = "";
-      } catch (err) { console.error("student find error", err); studentNameDropdown.style.display = "none"; studentNameDropdown.innerHTML = ""; }
+      }, err => { console.error("student find error", err); hideDropdown(); });
     });
 
     studentNameDropdown.addEventListener("change", () => {
@@ -262,12 +401,15 @@
     if (studentLoginArea) show(studentLoginArea);
   });
 
+  // one request for everything the panel needs: schedule, colors, catalog state (and the catalog if ours is stale)
   async function loadStudentStatus() {
-    await loadSubjectColors();
+    loadStoredCatalog();
     try {
-      const r = await fetch("/api/student/status");
+      const r = await fetch(`/api/student/bootstrap?catalog=${encodeURIComponent(catalogMem ? catalogMem.version : "")}`);
       const d = await r.json();
       if (!d.authed) { if (studentLoginMsg) studentLoginMsg.textContent = "Not authenticated."; return; }
+      subjectColors = d.subject_colors || {};
+      applyCatalog(d.catalog_state, d.catalog);
       currentStudentInfo = d.student;
       studentAcademic = (d.schedule_items && d.schedule_items.academic) ? d.schedule_items.academic : [];
       studentElective = (d.schedule_items && d.schedule_items.elective) ? d.schedule_items.elective : [];
@@ -279,7 +421,9 @@
       renderSelectedStudentLists();
       if (studentLoginArea) hide(studentLoginArea);
       if (studentScheduleArea) show(studentScheduleArea);
-      await runStudentCourseSearch();
+      // the catalog and its state are current as of the bootstrap: filter locally, no revalidation
+      if (catalogMem) renderStudentCourseResults(filterCatalog(currentStudentInfo.grade_level, studentFilterSubject ? studentFilterSubject.value : "", studentFilterName ? studentFilterName.value : ""));
+      else await runStudentCourseSearch();
     } catch (err) { console.error("loadStudentStatus error", err); }
   }
 
@@ -295,9 +439,9 @@
       const style = subjectToStyle(it.subject_area, subjectColors);
       const cls = approvalClass(it);
       if (isAcademic) {
-        out += `<div class="selectedRow ${cls}"><span class="courseChip" style="${style}">${escapeHTML(it.display)} ${approvalLabel(it)}</span><button class="smallBtn removeBtn" data-idx="${idx}" data-type="acad">Remove</button></div>`;
+        out += `<div class="selectedRow ${cls}"><span class="courseChip" style="${style}">${escapeHTML(it.display)} ${approvalLabel(it)}${seatLabel(it)}</span><button class="smallBtn removeBtn" data-idx="${idx}" data-type="acad">Remove</button></div>`;
       } else {
-        out += `<div class="selectedRow ${cls}"><span class="priorityNum">#${idx + 1}</span><span class="courseChip" style="${style}">${escapeHTML(it.display)} ${approvalLabel(it)}</span><div class="electiveBtns"><button class="smallBtn upBtn" data-idx="${idx}">▲</button><button class="smallBtn downBtn" data-idx="${idx}">▼</button><button class="smallBtn removeBtn" data-idx="${idx}" data-type="elec">Remove</button></div></div>`;
+        out += `<div class="selectedRow ${cls}"><span class="priorityNum">#${idx + 1}</span><span class="courseChip" style="${style}">${escapeHTML(it.display)} ${approvalLabel(it)}${seatLabel(it)}</span><div class="electiveBtns"><button class="smallBtn upBtn" data-idx="${idx}">▲</button><button class="smallBtn downBtn" data-idx="${idx}">▼</button><button class="smallBtn removeBtn" data-idx="${idx}" data-type="elec">Remove</button></div></div>`;
       }
     });
     if (items.length === 0) out = `<div class="dimtext">(none selected)</div>`;
@@ -316,35 +460,34 @@
   studentRunCourseSearchBtn && studentRunCourseSearchBtn.addEventListener("click", runStudentCourseSearch);
   async function runStudentCourseSearch() {
     if (!currentStudentInfo) return;
-    const params = new URLSearchParams(); params.set("grade", currentStudentInfo.grade_level);
-    if (studentFilterSubject && studentFilterSubject.value.trim()) params.set("subject", studentFilterSubject.value.trim());
-    if (studentFilterName && studentFilterName.value.trim()) params.set("name", studentFilterName.value.trim());
     try {
-      const r = await fetch(`/api/courses?${params.toString()}`);
-      const d = await r.json();
-      lastStudentCourseSearch = d.courses || [];
-      let out = ""; lastStudentCourseSearch.forEach(c => { out += renderCourseCard(c); });
-      if (studentAvailableCourses) studentAvailableCourses.innerHTML = out;
-      if (studentAvailableCourses) studentAvailableCourses.querySelectorAll(".addCourseBtn").forEach(btn => btn.addEventListener("click", () => {
-        const code = btn.dataset.code; const found = lastStudentCourseSearch.find(x => x.course_code === code); if (!found) return;
-        const display = `${found.course_name} (${found.course_code})`;
-        const item = { display, course_code: found.course_code, subject_area: found.subject_area || "Other", requires_approval: !!found.requires_approval, approval_status: found.requires_approval ? "pending" : "approved" };
-        const isElective = (found.subject_area || "").toLowerCase().includes("cte") || (found.subject_area || "").toLowerCase().includes("elective");
-        if (isElective) { if (studentElective.length >= (typeof MAX_ELECTIVE_CHOICES !== "undefined" ? MAX_ELECTIVE_CHOICES : 3)) return; if (!studentElective.find(x => x.course_code === item.course_code)) studentElective.push(item); }
-        else { if (studentAcademic.length >= (typeof MAX_ACADEMIC_COURSES !== "undefined" ? MAX_ACADEMIC_COURSES : 4)) return; if (!studentAcademic.find(x => x.course_code === item.course_code)) studentAcademic.push(item); }
-        renderSelectedStudentLists();
-      }));
+      await searchCatalog(currentStudentInfo.grade_level, studentFilterSubject ? studentFilterSubject.value : "", studentFilterName ? studentFilterName.value : "", renderStudentCourseResults);
     } catch (err) { console.error("runStudentCourseSearch error", err); }
   }
+  function renderStudentCourseResults(courses) {
+    lastStudentCourseSearch = courses;
+    let out = ""; lastStudentCourseSearch.forEach(c => { out += renderCourseCard(c); });
+    if (studentAvailableCourses) studentAvailableCourses.innerHTML = out;
+    if (studentAvailableCourses) studentAvailableCourses.querySelectorAll(".addCourseBtn").forEach(btn => btn.addEventListener("click", () => {
+      const code = btn.dataset.code; const found = lastStudentCourseSearch.find(x => x.course_code === code); if (!found) return;
+      const display = `${found.course_name} (${found.course_code})`;
+      const item = { display, course_code: found.course_code, subject_area: found.subject_area || "Other", requires_approval: !!found.requires_approval, approval_status: found.requires_approval ? "pending" : "approved" };
+      const isElective = (found.subject_area || "").toLowerCase().includes("cte") || (found.subject_area || "").toLowerCase().includes("elective");
+      if (isElective) { if (studentElective.length >= (typeof MAX_ELECTIVE_CHOICES !== "undefined" ? MAX_ELECTIVE_CHOICES : 3)) return; if (!studentElective.find(x => x.course_code === item.course_code)) studentElective.push(item); }
+      else { if (studentAcademic.length >= (typeof MAX_ACADEMIC_COURSES !== "undefined" ? MAX_ACADEMIC_COURSES : 4)) return; if (!studentAcademic.find(x => x.course_code === item.course_code)) studentAcademic.push(item); }
+      renderSelectedStudentLists();
+    }));
+  }
 
   function renderCourseCard(c) {
     const style = subjectToStyle(c.subject_area || "Other", subjectColors);
     const approvalNote = c.requires_approval ? `<span class="approvalTag tagPending">Requires Approval</span>` : "";
+    const fullNote = c.full ? `<span class="approvalTag tagRejected">FULL</span>` : "";
     return `
       <div class="courseCard">
         <div class="courseHeader">
           <div class="courseTitle"><span>${escapeHTML(c.course_name)}</span><span class="courseCode">(${escapeHTML(c.course_code)})</span></div>
-          <div class="courseMeta"><span class="coursePill" style="${style}">${escapeHTML(c.subject_area || "Other")}</span><span class="dimtext">${escapeHTML(c.level || "")}</span>${approvalNote}</div>
+          <div class="courseMeta"><span class="coursePill" style="${style}">${escapeHTML(c.subject_area || "Other")}</span><span class="dimtext">${escapeHTML(c.level || "")}</span>${approvalNote}${fullNote}</div>
         </div>
         <div class="courseBody"><div class="desc">${escapeHTML(c.description || "")}</div><div class="teacherRoom"><strong>${escapeHTML(c.teacher_name || "")}</strong><span class="dimtext"> ${escapeHTML(c.room || "")}</span><span class="dimtext"> ${c.teacher_email ? "• " + escapeHTML(c.teacher_email) : ""}</span></div><div class="gradeRange dimtext">Grades ${escapeHTML(c.grade_min || "")}-${escapeHTML(c.grade_max || "")}</div></div>
         <div class="courseActions"><button class="addCourseBtn" data-code="${escapeHTML(c.course_code)}">Add</button></div>
@@ -354,13 +497,18 @@
 
   studentSaveBtn && studentSaveBtn.addEventListener("click", async () => {
     if (!currentStudentInfo) return;
-    const payload = { academic_courses: studentAcademic.map(x => x.display), elective_courses: studentElective.map(x => x.display), special_instructions: specialInstructionsInput.value.trim() };
+    const payload = { academic_courses: studentAcademic.map(x => x.course_code), elective_courses: studentElective.map(x => x.course_code), special_instructions: specialInstructionsInput.value.trim() };
     try {
       const r = await fetch("/api/student/save_schedule", { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify(payload) });
-      if (!r.ok) { const txt = await r.text(); if (studentSaveMsg) studentSaveMsg.textContent = txt || "Error saving."; return; }
+      if (!r.ok) {
+        const txt = await r.text(); let err = null; try { err = JSON.parse(txt); } catch (e) { /* not JSON */ }
+        if (err && err.error === "prerequisites_not_met") { if (studentSaveMsg) studentSaveMsg.textContent = "Prerequisites not met: " + (err.courses || []).map(c => `${c.course_code} (needs ${(c.missing || []).join(", ")})`).join("; "); return; }
+        if (studentSaveMsg) studentSaveMsg.textContent = txt || "Error saving."; return;
+      }
       let d = null; try { d = await r.json(); } catch (e) { /* ignore parse */ }
       if (d && d.ok === false) { if (studentSaveMsg) studentSaveMsg.textContent = d.error || "Error saving."; return; }
       if (studentSaveMsg) studentSaveMsg.textContent = "Saved! Approval-required courses will show PENDING until a teacher approves.";
+      if (d && d.waitlisted && d.waitlisted.length && studentSaveMsg) studentSaveMsg.textContent += ` Full courses (you are on the waitlist): ${d.waitlisted.join(", ")}.`;
       await loadStudentStatus();
     } catch (err) { console.error("student save error", err); if (studentSaveMsg) studentSaveMsg.textContent = "Network error while saving."; }
   });
@@ -387,8 +535,9 @@
     try {
       const r = await fetch("/api/teacher/status");
       const d = await r.json();
-      if (!d.authed) { if (teacherLoginArea) show(teacherLoginArea); if (teacherDashboard) hide(teacherDashboard); return; }
+      if (!d.authed) { stopLiveUpdates(); if (teacherLoginArea) show(teacherLoginArea); if (teacherDashboard) hide(teacherDashboard); return; }
       if (teacherLoginArea) hide(teacherLoginArea); if (teacherDashboard) show(teacherDashboard);
+      startLiveUpdates();
       if (teacherInfo) teacherInfo.innerHTML = `<div><strong>${escapeHTML(d.teacher.teacher_name || "")}</strong></div><div class="dimtext">${escapeHTML(d.teacher.teacher_email || "")}</div>`;
       await loadTeacherRoster();
     } catch (err) { console.error("loadTeacherState error", err); }
@@ -397,7 +546,7 @@
   async function loadTeacherRoster() {
     if (!teacherRosters) return;
     try {
-      const r = await fetch("/api/teacher/roster");
+      const r = await fetchCached("/api/teacher/roster");
       if (!r.ok) { teacherRosters.innerHTML = `<div class="msg">Unable to load roster.</div>`; return; }
       const d = await r.json();
       const blocks = d.courses || [];
@@ -416,34 +565,67 @@
         </div>`;
       });
       teacherRosters.innerHTML = out;
+      teacherRosters.querySelectorAll(".rosterBulkBtn").forEach(btn => btn.addEventListener("click", async () => { await teacherBulkApproval(btn); }));
       teacherRosters.querySelectorAll(".teacherApproveBtn").forEach(btn => btn.addEventListener("click", async () => { await teacherSetApproval(btn.dataset.sid, btn.dataset.code, "approved"); }));
       teacherRosters.querySelectorAll(".teacherRejectBtn").forEach(btn => btn.addEventListener("click", async () => { await teacherSetApproval(btn.dataset.sid, btn.dataset.code, "rejected"); }));
       teacherRosters.querySelectorAll(".edit-course-desc").forEach(btn => btn.addEventListener("click", () => { const courseBlock = btn.closest(".teacherCourseBlock"); if (!courseBlock) return; openDescriptionEditorForBlock(courseBlock); }));
     } catch (err) { console.error("loadTeacherRoster error", err); teacherRosters.innerHTML = `<div class="msg">Unable to load roster.</div>`; }
   }
 
+  function approvalStatusTag(status) {
+    const st = (status || "pending").toLowerCase();
+    if (st === "approved") return `<span class="approvalTag tagApproved">APPROVED</span>`;
+    if (st === "rejected") return `<span class="approvalTag tagRejected">REJECTED</span>`;
+    return `<span class="approvalTag tagPending">PENDING</span>`;
+  }
+
   function renderTeacherStudentTable(course, students) {
     if (!students || !students.length) return `<div class="infoBlock">No students have this course on their schedule yet.</div>`;
     let rows = "";
     students.forEach(s => {
-      const st = (s.approval_status || "pending").toLowerCase();
-      let tag = `<span class="approvalTag tagPending">PENDING</span>`;
-      if (st === "approved") tag = `<span class="approvalTag tagApproved">APPROVED</span>`;
-      if (st === "rejected") tag = `<span class="approvalTag tagRejected">REJECTED</span>`;
       const showButtons = !!course.requires_approval;
-      rows += `<tr><td>${escapeHTML(s.student_name)}</td><td>${escapeHTML(s.student_id)}</td><td>${escapeHTML(s.grade_level)}</td><td>${tag}</td><td>${showButtons ? `<button class="smallBtn teacherApproveBtn" data-sid="${escapeHTML(s.student_id)}" data-code="${escapeHTML(course.course_code)}">Approve</button> <button class="smallBtn danger teacherRejectBtn" data-sid="${escapeHTML(s.student_id)}" data-code="${escapeHTML(course.course_code)}">Reject</button>` : `<span class="dimtext">N/A</span>`}</td></tr>`;
+      rows += `<tr data-sid="${escapeHTML(s.student_id)}" data-code="${escapeHTML(course.course_code)}">${showButtons ? `<td><input type="checkbox" class="rosterCB" data-sid="${escapeHTML(s.student_id)}"></td>` : ""}<td>${escapeHTML(s.student_name)}</td><td>${escapeHTML(s.student_id)}</td><td>${escapeHTML(s.grade_level)}</td><td class="rosterStatus">${approvalStatusTag(s.approval_status)}</td><td>${showButtons ? `<button class="smallBtn teacherApproveBtn" data-sid="${escapeHTML(s.student_id)}" data-code="${escapeHTML(course.course_code)}">Approve</button> <button class="smallBtn danger teacherRejectBtn" data-sid="${escapeHTML(s.student_id)}" data-code="${escapeHTML(course.course_code)}">Reject</button>` : `<span class="dimtext">N/A</span>`}</td></tr>`;
     });
-    return `<table class="simpleTable"><thead><tr><th>Student</th><th>ID</th><th>Grade</th><th>Status</th><th>Action</th></tr></thead><tbody>${rows}</tbody></table>`;
+    if (!course.requires_approval) return `<table class="simpleTable"><thead><tr><th>Student</th><th>ID</th><th>Grade</th><th>Status</th><th>Action</th></tr></thead><tbody>${rows}</tbody></table>`;
+    const code = escapeHTML(course.course_code);
+    const bulk = `<div class="row wrap" style="margin:6px 0;"><button class="smallBtn rosterBulkBtn" data-code="${code}" data-mode="all_pending" data-status="approved">Approve all pending</button> <button class="smallBtn rosterBulkBtn" data-code="${code}" data-mode="checked" data-status="approved">Approve checked</button> <button class="smallBtn danger rosterBulkBtn" data-code="${code}" data-mode="checked" data-status="rejected">Reject checked</button></div>`;
+    return `${bulk}<table class="simpleTable"><thead><tr><th></th><th>Student</th><th>ID</th><th>Grade</th><th>Status</th><th>Action</th></tr></thead><tbody>${rows}</tbody></table>`;
   }
 
   async function teacherSetApproval(student_id, course_code, status) {
     try {
       const r = await fetch("/api/teacher/set_approval", { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify({ student_id, course_code, status }) });
       const d = await r.json();
-      if (d.ok) await loadTeacherRoster();
+      if (d.ok) patchRosterStatus(student_id, course_code, status);
     } catch (err) { console.error("teacherSetApproval error", err); }
   }
 
+  // One request (and one approvals.csv write) for a whole course or a checked subset
+  async function teacherBulkApproval(btn) {
+    const code = btn.dataset.code; const status = btn.dataset.status;
+    const block = btn.closest(".teacherCourseBlock");
+    const payload = { course_code: code, status };
+    if (btn.dataset.mode === "all_pending") {
+      if (!confirm(`Approve every pending student in ${code}?`)) return;
+      payload.all_pending = true;
+    } else {
+      payload.student_ids = block ? Array.from(block.querySelectorAll(".rosterCB:checked")).map(cb => cb.dataset.sid) : [];
+      if (!payload.student_ids.length) { alert("Check one or more students first."); return; }
+    }
+    try {
+      const r = await fetch("/api/teacher/set_approvals", { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify(payload) });
+      const d = await safeJSON(r);
+      if (!r.ok || !d || !d.ok) { alert("Unable to save approvals."); return; }
+      (d.updated || []).forEach(sid => patchRosterStatus(sid, code, status));
+      if (block) block.querySelectorAll(".rosterCB:checked").forEach(cb => { cb.checked = false; });
+    } catch (err) { console.error("teacherBulkApproval error", err); }
+  }
+
+  function patchRosterStatus(student_id, course_code, status) {
+    if (!teacherRosters) return;
+    teacherRosters.querySelectorAll(`tr[data-sid="${CSS.escape(student_id)}"][data-code="${CSS.escape(course_code)}"] .rosterStatus`).forEach(td => { td.innerHTML = approvalStatusTag(status); });
+  }
+
   function openDescriptionEditorForBlock(courseBlock) {
     const courseCode = courseBlock.dataset.courseCode || courseBlock.getAttribute("data-course-code");
     const descEl = courseBlock.querySelector(".course-description");
@@ -496,8 +678,9 @@
     await loadSubjectColors();
     try {
       const rTest = await fetch("/api/counselor/students");
-      if (!rTest.ok) { if (counselorLoginArea) show(counselorLoginArea); if (counselorDashboard) hide(counselorDashboard); if (logoutCounselorBtn) hide(logoutCounselorBtn); return; }
+      if (!rTest.ok) { stopLiveUpdates(); if (counselorLoginArea) show(counselorLoginArea); if (counselorDashboard) hide(counselorDashboard); if (logoutCounselorBtn) hide(logoutCounselorBtn); return; }
       if (counselorLoginArea) hide(counselorLoginArea); if (counselorDashboard) show(counselorDashboard); if (logoutCounselorBtn) show(logoutCounselorBtn);
+      startLiveUpdates();
       await loadGradeLocks(); renderSubjectColorTable();
       counselorPage = 1; counselorPerPage = (perPageSelect && perPageSelect.value) ? (perPageSelect.value === "all" ? "all" : parseInt(perPageSelect.value, 10)) : 50;
       await loadStudentList(); await loadPendingApprovals();
@@ -506,7 +689,7 @@
 
   async function loadGradeLocks() {
     try {
-      const r = await fetch("/api/counselor/settings");
+      const r = await fetchCached("/api/counselor/settings");
       if (!r.ok) return;
       const d = await r.json();
       const locks = d.grade_submission_lock || {};
@@ -553,10 +736,22 @@
     if (studentsCsvInput && studentsCsvInput.files[0]) fd.append("studentsCsv", studentsCsvInput.files[0]);
     if (coursesCsvInput && coursesCsvInput.files[0]) fd.append("coursesCsv", coursesCsvInput.files[0]);
     if (teachersCsvInput && teachersCsvInput.files[0]) fd.append("teachersCsv", teachersCsvInput.files[0]);
+    if (prerequisitesCsvInput && prerequisitesCsvInput.files[0]) fd.append("prerequisitesCsv", prerequisitesCsvInput.files[0]);
+    if (historyCsvInput && historyCsvInput.files[0]) fd.append("historyCsv", historyCsvInput.files[0]);
     try {
       const r = await fetch("/api/counselor/upload_csv", { method: "POST", body: fd });
       const d = await r.json();
       uploadMsg.textContent = d.ok ? "Upload complete." : "Upload failed.";
+      ["students", "courses", "teachers"].forEach(t => {
+        const s = d[t];
+        if (!s) return;
+        if (!s.applied) uploadMsg.textContent += ` ${t}: not applied, ${s.error_count} invalid row(s)${s.errors.length ? ` (line ${s.errors[0].line}: ${s.errors[0].error})` : ""}.`;
+        else uploadMsg.textContent += ` ${t}: +${s.added} ~${s.updated} -${s.removed}.`;
+      });
+      const p = d.prerequisites;
+      if (p && !p.applied) uploadMsg.textContent += ` prerequisites: not applied, ${p.error_count} invalid row(s)${p.errors.length ? ` (line ${p.errors[0].line}: ${p.errors[0].error})` : ""}.`;
+      else if (p) uploadMsg.textContent += ` prerequisites: ${p.rows} row(s).`;
+      if (d.ok && d.history) uploadMsg.textContent += ` Course history: ${d.history.rows} rows, ${d.history.students_changed} students changed.`;
       if (d.ok) { await loadStudentList(); await loadPendingApprovals(); }
     } catch (err) { console.error("uploadCsv error", err); uploadMsg.textContent = "Network error"; }
   });
@@ -573,44 +768,120 @@
     if (filterCourse && filterCourse.value.trim()) params.set("course", filterCourse.value.trim());
     params.set("page", String(counselorPage));
     params.set("per_page", counselorPerPage === "all" ? "all" : String(counselorPerPage));
+    // the whole school comes back as arrays with the column names sent once
+    if (counselorPerPage === "all") params.set("format", "rows");
+    const signal = latestOnly("studentList");
     try {
-      const r = await fetch(`/api/counselor/students?${params.toString()}`);
+      const r = await fetchCached(`/api/counselor/students?${params.toString()}`, signal);
+      if (signal.aborted) return;
       if (!r.ok) { if (counselorStudentRows) counselorStudentRows.innerHTML = `<tr><td colspan="6" class="msg">Unable to load student list.</td></tr>`; return; }
       const d = await r.json();
       counselorTotal = d.total || 0;
-      const students = d.students || [];
       if (studentCount) {
         if (counselorPerPage === "all") { studentCount.textContent = `Total in view: ${counselorTotal} (showing all)`; if (pageInfo) pageInfo.textContent = `Page 1 of 1`; }
         else { const start = (d.page - 1) * d.per_page + 1; const end = Math.min(d.total, start + d.per_page - 1); studentCount.textContent = `Total in view: ${counselorTotal} (showing ${start}-${end})`; const maxPage = Math.max(1, Math.ceil(counselorTotal / d.per_page)); if (pageInfo) pageInfo.textContent = `Page ${d.page} of ${maxPage}`; }
       }
-      let out = "";
-      (students || []).forEach(stu => {
-        // Determine row class based on schedule status
-        let rowClass = "studentRowNotScheduled";
-        if (stu.scheduled) {
-          if (stu.reviewed) {
-            rowClass = "studentRowReviewed";  // Blue for reviewed
-          } else {
-            rowClass = "studentRowScheduled";  // Green for scheduled but not reviewed
-          }
-        }
-        let chipsHTML = "";
-        (stu.academic_courses || []).slice(0, 2).forEach(cn => { chipsHTML += `<span class="courseChip" style="${subjectToStyle("Other", subjectColors)}">${escapeHTML(cn)}</span> `; });
-        if ((stu.academic_courses || []).length > 2) chipsHTML += `<span class="courseChip" style="${subjectToStyle("Other", subjectColors)}">+${(stu.academic_courses || []).length - 2} more</span>`;
-        const approvalsSummary = `<span class="approvalMini">Pending: <strong>${stu.pending_approvals || 0}</strong></span> <span class="approvalMini">Rejected: <strong>${stu.rejected_approvals || 0}</strong></span>`;
-        out += `<tr class="${rowClass}"><td><input type="checkbox" class="selectStudentCB" data-id="${escapeHTML(stu.student_id)}"></td><td><div class="boldish">${escapeHTML(stu.student_name)}</div><div class="dimtext">ID: ${escapeHTML(stu.student_id)} • Grade ${escapeHTML(stu.grade_level)}</div></td><td>${chipsHTML}</td><td>${escapeHTML(stu.top_elective || "")}</td><td>${approvalsSummary}</td><td><button class="smallBtn editBtn" data-id="${escapeHTML(stu.student_id)}">Edit</button> <a class="buttonlike small" href="/schedule_card/${encodeURIComponent(stu.student_id)}" target="_blank">Card</a></td></tr>`;
-      });
-      if (counselorStudentRows) counselorStudentRows.innerHTML = out;
+      selectedStudentIds.clear();
+      if (!counselorStudentRows) return;
+      if (counselorPerPage === "all") {
+        const col = {};
+        (d.fields || []).forEach((f, i) => { col[f] = i; });
+        studentWindow = { rows: d.rows || [], col, first: -1, last: -1, rowHeight: 60, measured: false };
+        if (studentTableScroller) { studentTableScroller.classList.add("windowed"); studentTableScroller.scrollTop = 0; }
+        renderStudentWindow();
+      } else {
+        studentWindow = null;
+        if (studentTableScroller) studentTableScroller.classList.remove("windowed");
+        counselorStudentRows.innerHTML = (d.students || []).map(studentRowHTML).join("");
+      }
+    } catch (err) { if (isAbort(err)) return; console.error("loadStudentList error", err); if (counselorStudentRows) counselorStudentRows.innerHTML = `<tr><td colspan="6" class="msg">Network error loading students.</td></tr>`; }
+  }
 
-      // Use event delegation to handle Edit clicks reliably
-      if (counselorStudentRows) {
-        counselorStudentRows.removeEventListener("click", counselorStudentRowsClickHandler);
-        counselorStudentRows.addEventListener("click", counselorStudentRowsClickHandler);
+  function studentRowHTML(stu) {
+    // Determine row class based on schedule status
+    let rowClass = "studentRowNotScheduled";
+    if (stu.scheduled) {
+      if (stu.reviewed) {
+        rowClass = "studentRowReviewed";  // Blue for reviewed
+      } else {
+        rowClass = "studentRowScheduled";  // Green for scheduled but not reviewed
       }
-    } catch (err) { console.error("loadStudentList error", err); if (counselorStudentRows) counselorStudentRows.innerHTML = `<tr><td colspan="6" class="msg">Network error loading students.</td></tr>`; }
+    }
+    const academic = stu.academic_courses || [];
+    const academicCount = stu.academic_count != null ? stu.academic_count : academic.length;
+    let chipsHTML = "";
+    academic.slice(0, 2).forEach(cn => { chipsHTML += `<span class="courseChip" style="${subjectToStyle("Other", subjectColors)}">${escapeHTML(cn)}</span> `; });
+    if (academicCount > 2) chipsHTML += `<span class="courseChip" style="${subjectToStyle("Other", subjectColors)}">+${academicCount - 2} more</span>`;
+    const approvalsSummary = `<span class="approvalMini">Pending: <strong class="pendingCount">${stu.pending_approvals || 0}</strong></span> <span class="approvalMini">Rejected: <strong class="rejectedCount">${stu.rejected_approvals || 0}</strong></span>`;
+    const checked = selectedStudentIds.has(stu.student_id) ? " checked" : "";
+    return `<tr class="${rowClass}" data-sid="${escapeHTML(stu.student_id)}"><td><input type="checkbox" class="selectStudentCB" data-id="${escapeHTML(stu.student_id)}"${checked}></td><td><div class="boldish">${escapeHTML(stu.student_name)}</div><div class="dimtext">ID: ${escapeHTML(stu.student_id)} • Grade ${escapeHTML(stu.grade_level)}</div></td><td>${chipsHTML}</td><td>${escapeHTML(stu.top_elective || "")}</td><td>${approvalsSummary}</td><td><button class="smallBtn editBtn" data-id="${escapeHTML(stu.student_id)}">Edit</button> <a class="buttonlike small" href="/schedule_card/${encodeURIComponent(stu.student_id)}" target="_blank">Card</a></td></tr>`;
   }
 
-  // event delegation handler
+  function studentFromRow(row, col) {
+    return {
+      student_id: row[col.student_id], student_name: row[col.student_name], grade_level: row[col.grade_level],
+      academic_courses: row[col.academic_preview], academic_count: row[col.academic_count], top_elective: row[col.top_elective],
+      scheduled: row[col.scheduled], reviewed: row[col.reviewed],
+      pending_approvals: row[col.pending_approvals], rejected_approvals: row[col.rejected_approvals]
+    };
+  }
+
+  // Only the rows in (or just around) the visible part of the scroller get DOM;
+  // one spacer row above and one below stand in for the rest at a measured row height.
+  function renderStudentWindow() {
+    studentWindowFrame = 0;
+    const w = studentWindow;
+    if (!w || !counselorStudentRows) return;
+    if (!w.rows.length) { counselorStudentRows.innerHTML = `<tr><td colspan="6" class="msg">No students in view.</td></tr>`; return; }
+    const head = studentTableScroller ? studentTableScroller.querySelector("thead") : null;
+    const scrollTop = studentTableScroller ? Math.max(0, studentTableScroller.scrollTop - (head ? head.offsetHeight : 0)) : 0;
+    const viewHeight = (studentTableScroller && studentTableScroller.clientHeight) || window.innerHeight;
+    const first = Math.max(0, Math.floor(scrollTop / w.rowHeight) - STUDENT_WINDOW_OVERSCAN);
+    const last = Math.min(w.rows.length, Math.ceil((scrollTop + viewHeight) / w.rowHeight) + STUDENT_WINDOW_OVERSCAN);
+    if (first === w.first && last === w.last) return;
+    w.first = first; w.last = last;
+    const spacer = n => n > 0 ? `<tr class="spacerRow" style="height:${n * w.rowHeight}px"><td colspan="6"></td></tr>` : "";
+    let out = spacer(first);
+    for (let i = first; i < last; i++) out += studentRowHTML(studentFromRow(w.rows[i], w.col));
+    out += spacer(w.rows.length - last);
+    counselorStudentRows.innerHTML = out;
+    if (!w.measured) {
+      // rows are single-line in this mode, so one measurement holds for the whole list
+      w.measured = true;
+      const drawn = counselorStudentRows.querySelectorAll("tr[data-sid]");
+      if (drawn.length) {
+        const h = Array.from(drawn).reduce((sum, tr) => sum + tr.offsetHeight, 0) / drawn.length;
+        if (h > 0 && Math.abs(h - w.rowHeight) >= 1) { w.rowHeight = h; w.first = w.last = -1; renderStudentWindow(); }
+      }
+    }
+  }
+
+  // Live updates in windowed mode go to the row data first, so a row that scrolls
+  // out and back is drawn with the new values; a drawn row is re-rendered in place.
+  function patchStudentWindowRow(studentId, values) {
+    const w = studentWindow;
+    if (!w) return false;
+    if (!w.index) { w.index = new Map(); w.rows.forEach((row, i) => w.index.set(row[w.col.student_id], i)); }
+    const i = w.index.get(studentId);
+    if (i === undefined) return true;
+    const row = w.rows[i];
+    Object.keys(values).forEach(k => { if (w.col[k] !== undefined) row[w.col[k]] = values[k]; });
+    const tr = i >= w.first && i < w.last && counselorStudentRows ? counselorStudentRows.querySelector(`tr[data-sid="${CSS.escape(studentId)}"]`) : null;
+    if (tr) tr.outerHTML = studentRowHTML(studentFromRow(row, w.col));
+    return true;
+  }
+
+  function scheduleStudentWindow() {
+    if (studentWindow && !studentWindowFrame) studentWindowFrame = requestAnimationFrame(renderStudentWindow);
+  }
+  studentTableScroller && studentTableScroller.addEventListener("scroll", scheduleStudentWindow, { passive: true });
+  window.addEventListener("resize", () => { if (studentWindow) { studentWindow.first = -1; scheduleStudentWindow(); } });
+
+  function checkedStudentIds() {
+    return Array.from(selectedStudentIds);
+  }
+
+  // event delegation: rows are replaced on every load (and every scroll in windowed mode)
   function counselorStudentRowsClickHandler(ev) {
     const btn = ev.target.closest(".editBtn");
     if (!btn) return;
@@ -618,10 +889,18 @@
     if (!sid) return;
     openCounselorEditSchedule(sid);
   }
+  if (counselorStudentRows) {
+    counselorStudentRows.addEventListener("click", counselorStudentRowsClickHandler);
+    counselorStudentRows.addEventListener("change", ev => {
+      const cb = ev.target.closest(".selectStudentCB");
+      if (!cb || !cb.dataset.id) return;
+      if (cb.checked) selectedStudentIds.add(cb.dataset.id); else selectedStudentIds.delete(cb.dataset.id);
+    });
+  }
 
   // Print selected/all handlers unchanged (omitted here for brevity, but left intact)
   printCardsSelectedBtn && printCardsSelectedBtn.addEventListener("click", async () => {
-    const checked = Array.from(document.querySelectorAll(".selectStudentCB:checked")).map(cb => cb.dataset.id).filter(Boolean);
+    const checked = checkedStudentIds();
     if (!checked || checked.length === 0) { alert("Select one or more students to print."); return; }
     try {
       const resp = await fetch("/api/printables/schedule_cards_pdf", { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify({ student_ids: checked }) });
@@ -630,18 +909,32 @@
     } catch (err) { console.error("print selected error", err); alert("Error generating PDF."); }
   });
 
+  // Bulk actions on the checked students: one request, one write per table on the server
+  async function runBulkAction(action, confirmText) {
+    const checked = checkedStudentIds();
+    if (!checked.length) { alert("Select one or more students first."); return; }
+    if (confirmText && !confirm(confirmText.replace("{n}", checked.length))) return;
+    try {
+      const r = await fetch("/api/counselor/bulk", { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify({ action, student_ids: checked }) });
+      const d = await safeJSON(r);
+      if (!r.ok || !d) { alert("Bulk action failed."); return; }
+      if (d.failed) alert(`${d.applied} done, ${d.failed} skipped (${d.results.filter(x => !x.ok).map(x => `${x.student_id}: ${x.error}`).join(", ")})`);
+      await loadStudentList(); await loadPendingApprovals();
+    } catch (err) { console.error("bulk action error", err); alert("Network error."); }
+  }
+  bulkSignOffBtn && bulkSignOffBtn.addEventListener("click", () => runBulkAction("sign_off", ""));
+  bulkResetBtn && bulkResetBtn.addEventListener("click", () => runBulkAction("reset", "Reset the schedules of {n} selected students? This clears their courses and approvals."));
+
   printCardsAllBtn && printCardsAllBtn.addEventListener("click", async () => {
-    const params = new URLSearchParams();
-    if (filterName && filterName.value.trim()) params.set("q_name", filterName.value.trim());
-    if (filterGrade && filterGrade.value.trim()) params.set("grade", filterGrade.value.trim());
-    if (filterCourse && filterCourse.value.trim()) params.set("course", filterCourse.value.trim());
-    params.set("page", "1"); params.set("per_page", "all");
+    // the server resolves the students in view from the same filters the list uses
+    const filters = {
+      q_name: filterName ? filterName.value.trim() : "",
+      grade: filterGrade ? filterGrade.value.trim() : "",
+      course: filterCourse ? filterCourse.value.trim() : ""
+    };
     try {
-      const r = await fetch(`/api/counselor/students?${params.toString()}`);
-      if (!r.ok) { alert("Failed to get students in view for PDF."); return; }
-      const d = await r.json(); const ids = (d.students || []).map(s => s.student_id);
-      if (!ids || ids.length === 0) { alert("No students in view to print."); return; }
-      const resp = await fetch("/api/printables/schedule_cards_pdf", { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify({ student_ids: ids }) });
+      const resp = await fetch("/api/printables/schedule_cards_pdf", { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify(filters) });
+      if (resp.status === 400) { alert("No students in view to print."); return; }
       if (!resp.ok) { const txt = await resp.text(); alert("Failed to generate PDF: " + txt); return; }
       const blob = await resp.blob(); const url = window.URL.createObjectURL(blob); const a = document.createElement("a"); a.href = url; a.download = "schedule_cards_all.pdf"; document.body.appendChild(a); a.click(); a.remove(); window.URL.revokeObjectURL(url);
     } catch (err) { console.error("print all error", err); alert("Error generating PDF for all in view."); }
@@ -656,16 +949,24 @@
   });
   exportAllSchedulesBtn && exportAllSchedulesBtn.addEventListener("click", () => { window.open("/api/counselor/export_all_schedules", "_blank"); });
   rosterPrintBtn && rosterPrintBtn.addEventListener("click", () => { const code = rosterCourseCode.value.trim(); if (!code) return; window.open(`/roster/${encodeURIComponent(code)}`, "_blank"); });
+  rosterPrintAllBtn && rosterPrintAllBtn.addEventListener("click", async () => {
+    try {
+      const resp = await fetch("/api/printables/rosters_pdf", { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify({ all: true }) });
+      if (!resp.ok) { const txt = await resp.text(); alert("Failed to generate PDF: " + txt); return; }
+      const blob = await resp.blob(); const url = window.URL.createObjectURL(blob); const a = document.createElement("a"); a.href = url; a.download = "rosters.pdf"; document.body.appendChild(a); a.click(); a.remove(); window.URL.revokeObjectURL(url);
+    } catch (err) { console.error("print rosters error", err); alert("Error generating roster PDF."); }
+  });
 
   async function loadPendingApprovals() {
     try {
-      const r = await fetch("/api/counselor/pending_approvals");
+      const r = await fetchCached("/api/counselor/pending_approvals");
       if (!r.ok) { if (pendingApprovalCount) pendingApprovalCount.textContent = ""; if (pendingApprovalsList) pendingApprovalsList.innerHTML = `<div class="msg">Unable to load pending approvals.</div>`; return; }
       const d = await r.json();
+      pendingApprovalTotal = d.total || 0;
       if (pendingApprovalCount) pendingApprovalCount.textContent = `Pending approvals: ${d.total}`;
       if (!d.pending || !d.pending.length) { if (pendingApprovalsList) pendingApprovalsList.innerHTML = `<div class="infoBlock">No pending approvals.</div>`; return; }
       let rows = "";
-      d.pending.forEach(p => { rows += `<tr><td>${escapeHTML(p.course_name)} <span class="dimtext">(${escapeHTML(p.course_code)})</span></td><td>${escapeHTML(p.student_name)} <span class="dimtext">(${escapeHTML(p.student_id)})</span></td><td>${escapeHTML(p.grade_level)}</td><td>${escapeHTML(p.teacher_email || "")}</td><td class="dimtext">${escapeHTML(p.updated_at || "")}</td></tr>`; });
+      d.pending.forEach(p => { rows += `<tr data-sid="${escapeHTML(p.student_id)}" data-code="${escapeHTML(p.course_code)}"><td>${escapeHTML(p.course_name)} <span class="dimtext">(${escapeHTML(p.course_code)})</span></td><td>${escapeHTML(p.student_name)} <span class="dimtext">(${escapeHTML(p.student_id)})</span></td><td>${escapeHTML(p.grade_level)}</td><td>${escapeHTML(p.teacher_email || "")}</td><td class="dimtext">${escapeHTML(p.updated_at || "")}</td></tr>`; });
       if (pendingApprovalsList) pendingApprovalsList.innerHTML = `<table class="simpleTable"><thead><tr><th>Course</th><th>Student</th><th>Grade</th><th>Teacher</th><th>Last Updated</th></tr></thead><tbody>${rows}</tbody></table>`;
     } catch (err) { console.error("loadPendingApprovals error", err); if (pendingApprovalCount) pendingApprovalCount.textContent = ""; if (pendingApprovalsList) pendingApprovalsList.innerHTML = `<div class="msg">Unable to load pending approvals.</div>`; }
   }
@@ -742,12 +1043,26 @@
     }
   }
 
+  // one GET per student: schedule, items, eligible courses, catalog state and the prev/next ids in the current filter
+  function editPayloadUrl(student_id) {
+    const params = new URLSearchParams({ student_id });
+    if (filterName && filterName.value.trim()) params.set("q_name", filterName.value.trim());
+    if (filterGrade && filterGrade.value.trim()) params.set("grade", filterGrade.value.trim());
+    if (filterCourse && filterCourse.value.trim()) params.set("course", filterCourse.value.trim());
+    loadStoredCatalog();
+    params.set("catalog", catalogMem ? catalogMem.version : "");
+    return `/api/counselor/edit_payload?${params.toString()}`;
+  }
+
   async function openCounselorEditSchedule(student_id) {
     try {
-      const r = await fetch(`/api/counselor/get_schedule?student_id=${encodeURIComponent(student_id)}`);
+      const r = await fetchCached(editPayloadUrl(student_id));
       if (!r.ok) { alert("Unable to fetch schedule for editing."); return; }
       const d = await r.json();
       if (!d.schedule) { alert("Schedule not found."); return; }
+      applyCatalog(d.catalog_state, d.catalog);
+      counselorPrevStudentID = d.previous_student_id || null;
+      counselorNextStudentID = d.next_student_id || null;
       counselorEditStudentID = d.schedule.student_id;
       counselorEditStudentName = d.schedule.student_name;
       counselorEditStudentGrade = d.schedule.grade_level;
@@ -771,7 +1086,14 @@
       
       renderCounselorSelectedLists();
       openEditModal();
-      await runCounselorCourseSearch();
+      if (catalogMem) {
+        const eligible = new Set(d.eligible_courses || []);
+        renderCounselorCourseResults(filterCatalog("", cFilterSubject ? cFilterSubject.value : "", cFilterNameSearch ? cFilterNameSearch.value : "").filter(c => eligible.has(c.course_code)));
+      } else {
+        await runCounselorCourseSearch();
+      }
+      // warm the neighbours so Previous/Next revalidate with a body-less 304
+      [counselorPrevStudentID, counselorNextStudentID].forEach(id => { if (id) sharedGet(editPayloadUrl(id)).catch(() => {}); });
     } catch (err) { console.error("openCounselorEditSchedule error", err); alert("Network error while opening edit modal."); }
   }
 
@@ -788,9 +1110,9 @@
       const style = subjectToStyle(it.subject_area, subjectColors);
       const cls = approvalClass(it);
       if (isAcademic) {
-        out += `<div class="selectedRow ${cls}"><span class="courseChip" style="${style}">${escapeHTML(it.display)} ${approvalLabel(it)}</span><button class="smallBtn removeCounselorBtn" data-idx="${idx}" data-type="acad">Remove</button></div>`;
+        out += `<div class="selectedRow ${cls}"><span class="courseChip" style="${style}">${escapeHTML(it.display)} ${approvalLabel(it)}${seatLabel(it)}</span><button class="smallBtn removeCounselorBtn" data-idx="${idx}" data-type="acad">Remove</button></div>`;
       } else {
-        out += `<div class="selectedRow ${cls}"><span class="priorityNum">#${idx + 1}</span><span class="courseChip" style="${style}">${escapeHTML(it.display)} ${approvalLabel(it)}</span><div class="electiveBtns"><button class="smallBtn upCounselorBtn" data-idx="${idx}">▲</button><button class="smallBtn downCounselorBtn" data-idx="${idx}">▼</button><button class="smallBtn removeCounselorBtn" data-idx="${idx}" data-type="elec">Remove</button></div></div>`;
+        out += `<div class="selectedRow ${cls}"><span class="priorityNum">#${idx + 1}</span><span class="courseChip" style="${style}">${escapeHTML(it.display)} ${approvalLabel(it)}${seatLabel(it)}</span><div class="electiveBtns"><button class="smallBtn upCounselorBtn" data-idx="${idx}">▲</button><button class="smallBtn downCounselorBtn" data-idx="${idx}">▼</button><button class="smallBtn removeCounselorBtn" data-idx="${idx}" data-type="elec">Remove</button></div></div>`;
       }
     });
     if (items.length === 0) out = `<div class="dimtext">(none selected)</div>`;
@@ -807,29 +1129,28 @@
   cRunCourseSearchBtn && cRunCourseSearchBtn.addEventListener("click", runCounselorCourseSearch);
   async function runCounselorCourseSearch() {
     if (!counselorEditStudentGrade) return;
-    const params = new URLSearchParams(); params.set("grade", counselorEditStudentGrade);
-    if (cFilterSubject && cFilterSubject.value.trim()) params.set("subject", cFilterSubject.value.trim());
-    if (cFilterNameSearch && cFilterNameSearch.value.trim()) params.set("name", cFilterNameSearch.value.trim());
     try {
-      const r = await fetch(`/api/courses?${params.toString()}`);
-      const d = await r.json(); lastCounselorCourseSearch = d.courses || [];
-      let out = ""; lastCounselorCourseSearch.forEach(c => { out += renderCourseCard(c); });
-      if (cAvailableCoursesGrid) cAvailableCoursesGrid.innerHTML = out;
-      if (cAvailableCoursesGrid) cAvailableCoursesGrid.querySelectorAll(".addCourseBtn").forEach(btn => btn.addEventListener("click", () => {
-        const code = btn.dataset.code; const found = lastCounselorCourseSearch.find(x => x.course_code === code); if (!found) return;
-        const display = `${found.course_name} (${found.course_code})`; const item = { display, course_code: found.course_code, subject_area: found.subject_area || "Other", requires_approval: !!found.requires_approval, approval_status: found.requires_approval ? "pending" : "approved" };
-        const isElective = (found.subject_area || "").toLowerCase().includes("cte") || (found.subject_area || "").toLowerCase().includes("elective");
-        if (isElective) { if (counselorElectiveItems.length >= (typeof MAX_ELECTIVE_CHOICES !== "undefined" ? MAX_ELECTIVE_CHOICES : 3)) return; if (!counselorElectiveItems.find(x => x.course_code === item.course_code)) counselorElectiveItems.push(item); }
-        else { if (counselorAcademicItems.length >= (typeof MAX_ACADEMIC_COURSES !== "undefined" ? MAX_ACADEMIC_COURSES : 4)) return; if (!counselorAcademicItems.find(x => x.course_code === item.course_code)) counselorAcademicItems.push(item); }
-        renderCounselorSelectedLists();
-      }));
+      await searchCatalog(counselorEditStudentGrade, cFilterSubject ? cFilterSubject.value : "", cFilterNameSearch ? cFilterNameSearch.value : "", renderCounselorCourseResults);
     } catch (err) { console.error("runCounselorCourseSearch error", err); }
   }
+  function renderCounselorCourseResults(courses) {
+    lastCounselorCourseSearch = courses;
+    let out = ""; lastCounselorCourseSearch.forEach(c => { out += renderCourseCard(c); });
+    if (cAvailableCoursesGrid) cAvailableCoursesGrid.innerHTML = out;
+    if (cAvailableCoursesGrid) cAvailableCoursesGrid.querySelectorAll(".addCourseBtn").forEach(btn => btn.addEventListener("click", () => {
+      const code = btn.dataset.code; const found = lastCounselorCourseSearch.find(x => x.course_code === code); if (!found) return;
+      const display = `${found.course_name} (${found.course_code})`; const item = { display, course_code: found.course_code, subject_area: found.subject_area || "Other", requires_approval: !!found.requires_approval, approval_status: found.requires_approval ? "pending" : "approved" };
+      const isElective = (found.subject_area || "").toLowerCase().includes("cte") || (found.subject_area || "").toLowerCase().includes("elective");
+      if (isElective) { if (counselorElectiveItems.length >= (typeof MAX_ELECTIVE_CHOICES !== "undefined" ? MAX_ELECTIVE_CHOICES : 3)) return; if (!counselorElectiveItems.find(x => x.course_code === item.course_code)) counselorElectiveItems.push(item); }
+      else { if (counselorAcademicItems.length >= (typeof MAX_ACADEMIC_COURSES !== "undefined" ? MAX_ACADEMIC_COURSES : 4)) return; if (!counselorAcademicItems.find(x => x.course_code === item.course_code)) counselorAcademicItems.push(item); }
+      renderCounselorSelectedLists();
+    }));
+  }
 
   // Save edited schedule (robust handling)
   saveCounselorScheduleBtn && saveCounselorScheduleBtn.addEventListener("click", async () => {
     if (!counselorEditStudentID) { if (editScheduleMsg) editScheduleMsg.textContent = "No student selected."; return; }
-    const payload = { student_id: counselorEditStudentID, student_name: counselorEditStudentName, grade_level: counselorEditStudentGrade, academic_courses: counselorAcademicItems.map(x => x.display), elective_courses: counselorElectiveItems.map(x => x.display), special_instructions: (counselorNotesInput ? counselorNotesInput.value.trim() : "") };
+    const payload = { student_id: counselorEditStudentID, student_name: counselorEditStudentName, grade_level: counselorEditStudentGrade, academic_courses: counselorAcademicItems.map(x => x.course_code), elective_courses: counselorElectiveItems.map(x => x.course_code), special_instructions: (counselorNotesInput ? counselorNotesInput.value.trim() : "") };
     try {
       const r = await fetch("/api/counselor/save_schedule", { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify(payload) });
       if (!r.ok) { const txt = await r.text(); if (editScheduleMsg) editScheduleMsg.textContent = txt || "Error saving."; return; }
@@ -861,7 +1182,7 @@
     if (counselorHasUnsavedChanges) {
       if (!confirm("You have unsaved changes. Save them before signing off?")) return;
       // Save first
-      const payload = { student_id: counselorEditStudentID, student_name: counselorEditStudentName, grade_level: counselorEditStudentGrade, academic_courses: counselorAcademicItems.map(x => x.display), elective_courses: counselorElectiveItems.map(x => x.display), special_instructions: (counselorNotesInput ? counselorNotesInput.value.trim() : "") };
+      const payload = { student_id: counselorEditStudentID, student_name: counselorEditStudentName, grade_level: counselorEditStudentGrade, academic_courses: counselorAcademicItems.map(x => x.course_code), elective_courses: counselorElectiveItems.map(x => x.course_code), special_instructions: (counselorNotesInput ? counselorNotesInput.value.trim() : "") };
       try {
         const r = await fetch("/api/counselor/save_schedule", { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify(payload) });
         if (!r.ok) { if (editScheduleMsg) editScheduleMsg.textContent = "Error saving before sign-off."; return; }
@@ -881,7 +1202,7 @@
       
       // Auto-progression: open next student
       setTimeout(async () => {
-        const nextId = await getNextStudentInList(counselorEditStudentID);
+        const nextId = counselorNextStudentID;
         if (nextId) {
           await openCounselorEditSchedule(nextId);
         } else {
@@ -899,7 +1220,7 @@
   previousStudentBtn && previousStudentBtn.addEventListener("click", async () => {
     if (!counselorEditStudentID) return;
     if (counselorHasUnsavedChanges && !confirm("You have unsaved changes. Continue without saving?")) return;
-    const prevId = await getPreviousStudentInList(counselorEditStudentID);
+    const prevId = counselorPrevStudentID;
     if (prevId) {
       await openCounselorEditSchedule(prevId);
       if (navigationMsg) navigationMsg.textContent = "";
@@ -911,7 +1232,7 @@
   nextStudentBtn && nextStudentBtn.addEventListener("click", async () => {
     if (!counselorEditStudentID) return;
     if (counselorHasUnsavedChanges && !confirm("You have unsaved changes. Continue without saving?")) return;
-    const nextId = await getNextStudentInList(counselorEditStudentID);
+    const nextId = counselorNextStudentID;
     if (nextId) {
       await openCounselorEditSchedule(nextId);
       if (navigationMsg) navigationMsg.textContent = "";
@@ -920,33 +1241,74 @@
     }
   });
 
-  // Helper functions for navigation
-  async function getNextStudentInList(currentId) {
-    try {
-      const payload = {
-        student_id: currentId,
-        q_name: filterName ? filterName.value.trim() : "",
-        q_grade: filterGrade ? filterGrade.value.trim() : "",
-        q_course: filterCourse ? filterCourse.value.trim() : ""
-      };
-      const r = await fetch("/api/counselor/get_next_student", { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify(payload) });
-      const d = await r.json();
-      return d.ok ? d.next_student_id : null;
-    } catch (err) { console.error("getNextStudentInList error", err); return null; }
+  // -------- LIVE UPDATES (Server-Sent Events) --------
+  // Approval and schedule changes arrive on one stream and patch rows in place;
+  // lists are only re-fetched (conditionally) when rows may have been added or removed.
+  let liveSource = null;
+  let liveRefreshTimer = null;
+  let pendingApprovalTotal = 0;
+
+  function startLiveUpdates() {
+    if (liveSource || typeof EventSource === "undefined") return;
+    liveSource = new EventSource("/api/events");
+    liveSource.addEventListener("approval", ev => { try { applyApprovalEvent(JSON.parse(ev.data)); } catch (err) { console.error("approval event", err); } });
+    liveSource.addEventListener("schedule", ev => { try { applyScheduleEvent(JSON.parse(ev.data)); } catch (err) { console.error("schedule event", err); } });
+    liveSource.addEventListener("seat", ev => { try { applySeatEvent(JSON.parse(ev.data)); } catch (err) { console.error("seat event", err); } });
+    liveSource.onerror = () => { if (liveSource && liveSource.readyState === EventSource.CLOSED) liveSource = null; };
   }
 
-  async function getPreviousStudentInList(currentId) {
-    try {
-      const payload = {
-        student_id: currentId,
-        q_name: filterName ? filterName.value.trim() : "",
-        q_grade: filterGrade ? filterGrade.value.trim() : "",
-        q_course: filterCourse ? filterCourse.value.trim() : ""
-      };
-      const r = await fetch("/api/counselor/get_previous_student", { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify(payload) });
-      const d = await r.json();
-      return d.ok ? d.previous_student_id : null;
-    } catch (err) { console.error("getPreviousStudentInList error", err); return null; }
+  function stopLiveUpdates() {
+    if (liveSource) { liveSource.close(); liveSource = null; }
+  }
+
+  function applyApprovalEvent(ev) {
+    patchRosterStatus(ev.student_id, ev.course_code, ev.status);
+    if (pendingApprovalsList && ev.status !== "pending") {
+      const row = pendingApprovalsList.querySelector(`tr[data-sid="${CSS.escape(ev.student_id)}"][data-code="${CSS.escape(ev.course_code)}"]`);
+      if (row) {
+        row.remove(); pendingApprovalTotal = Math.max(0, pendingApprovalTotal - 1);
+        if (pendingApprovalCount) pendingApprovalCount.textContent = `Pending approvals: ${pendingApprovalTotal}`;
+      }
+    }
+    if (patchStudentWindowRow(ev.student_id, { pending_approvals: ev.pending_approvals || 0, rejected_approvals: ev.rejected_approvals || 0 })) return;
+    const stuRow = counselorStudentRows && counselorStudentRows.querySelector(`tr[data-sid="${CSS.escape(ev.student_id)}"]`);
+    if (stuRow) {
+      const p = stuRow.querySelector(".pendingCount"); if (p) p.textContent = String(ev.pending_approvals || 0);
+      const rj = stuRow.querySelector(".rejectedCount"); if (rj) rj.textContent = String(ev.rejected_approvals || 0);
+    }
+  }
+
+  // A waitlisted student was promoted into a freed seat: promotions always take the head
+  // of the waitlist, so everyone else waiting for that course moves up one place.
+  function applySeatEvent(ev) {
+    if (counselorEditStudentID && editScheduleModal && editScheduleModal.getAttribute("aria-hidden") === "false") {
+      let changed = false;
+      counselorAcademicItems.concat(counselorElectiveItems).forEach(it => {
+        if (it.course_code !== ev.course_code || it.seat_status !== "waitlisted") return;
+        if (counselorEditStudentID === ev.student_id) { it.seat_status = "enrolled"; it.waitlist_position = 0; }
+        else if (it.waitlist_position > 1) it.waitlist_position -= 1;
+        changed = true;
+      });
+      if (changed) renderCounselorSelectedLists();
+    }
+    scheduleLiveRefresh();
+  }
+
+  function scheduleLiveRefresh() {
+    if (liveRefreshTimer) clearTimeout(liveRefreshTimer);
+    liveRefreshTimer = setTimeout(async () => {
+      liveRefreshTimer = null;
+      if (teacherDashboard && teacherDashboard.style.display !== "none" && teacherRosters && !teacherRosters.querySelector(".description-editor")) await loadTeacherRoster();
+      if (counselorDashboard && counselorDashboard.style.display !== "none") await loadPendingApprovals();
+    }, 500);
+  }
+
+  function applyScheduleEvent(ev) {
+    const windowed = patchStudentWindowRow(ev.student_id, { scheduled: !!ev.scheduled, reviewed: !!ev.reviewed });
+    const stuRow = !windowed && counselorStudentRows && counselorStudentRows.querySelector(`tr[data-sid="${CSS.escape(ev.student_id)}"]`);
+    if (stuRow) stuRow.className = !ev.scheduled ? "studentRowNotScheduled" : (ev.reviewed ? "studentRowReviewed" : "studentRowScheduled");
+    // a saved schedule can add or drop roster and pending rows: coalesce a burst into one refresh
+    scheduleLiveRefresh();
   }
 
   // initial landing